@@ -0,0 +1,202 @@
+"""
+Record degli appuntamenti e indice per data.
+
+La data viene convertita in `date` una sola volta, all'inserimento o alla
+lettura da SQLite, così le pagine non devono più interpretare stringhe ISO
+per separare visite future e passate. In memoria gli appuntamenti stanno in
+una tabella colonnare (vedi columnar.py) con un ordinamento per (paziente,
+data): visite future e passate di un paziente si trovano con una bisezione
+(`searchsorted`), e le visite prenotate ormai trascorse passano a
+"completata" in blocco con un'unica operazione vettoriale.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from columnar import CATEGORY, DATE, TEXT, ColumnTable, to_datetime64
+from slots import SPECIALTIES, TIME_SLOTS
+
+
+STATUS_BOOKED = "prenotata"
+STATUS_COMPLETED = "completata"
+APPOINTMENT_STATUSES = (STATUS_BOOKED, STATUS_COMPLETED)
+
+
+@dataclass(slots=True)
+class Appointment:
+    id: int
+    patient_id: int
+    specialty: str
+    date: date
+    time_slot: str | None = None
+    reason: str | None = None
+    status: str = STATUS_BOOKED
+
+    @classmethod
+    def from_dict(cls, row) -> "Appointment":
+        """Da dict (anche riga SQLite); la data può essere `date` o stringa ISO."""
+        day = row["date"]
+        return cls(
+            id=row["id"],
+            patient_id=row["patient_id"],
+            specialty=row["specialty"],
+            date=day if isinstance(day, date) else date.fromisoformat(day),
+            time_slot=row.get("time_slot"),
+            reason=row.get("reason"),
+            status=row.get("status") or STATUS_BOOKED,
+        )
+
+    @property
+    def key(self) -> tuple[date, int]:
+        return (self.date, self.id)
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "patient_id": self.patient_id,
+            "specialty": self.specialty,
+            "date": self.date,
+            "time_slot": self.time_slot,
+            "reason": self.reason,
+            "status": self.status,
+        }
+
+
+APPOINTMENT_SCHEMA = {
+    "id": np.int64,
+    "patient_id": np.int64,
+    "specialty": CATEGORY,
+    "date": DATE,
+    "time_slot": CATEGORY,
+    "reason": TEXT,
+    "status": CATEGORY,
+}
+APPOINTMENT_CATEGORIES = {
+    "specialty": SPECIALTIES,
+    "time_slot": TIME_SLOTS,
+    "status": APPOINTMENT_STATUSES,
+}
+
+# Le righe nuove restano in coda non ordinata finché non superano questa
+# quota della tabella: il riordino completo costa O(n log n) ogni O(n) inserimenti.
+MERGE_FRACTION = 8
+MIN_TAIL = 1024
+
+
+class AppointmentIndex:
+    """
+    Appuntamenti in tabella colonnare con ordinamento (paziente, data, id).
+
+    La riga di un id si legge dall'indice della tabella: gli id possono
+    arrivare fuori ordine o con buchi. Non thread-safe (lo protegge MemoryStore).
+    """
+
+    def __init__(self):
+        self.table = ColumnTable(APPOINTMENT_SCHEMA, APPOINTMENT_CATEGORIES, key="id")
+        # Righe [0, _sorted) ordinate, con le chiavi già riordinate per la bisezione
+        self._order = np.empty(0, dtype=np.int64)
+        self._order_pids = np.empty(0, dtype=np.int64)
+        self._order_days = np.empty(0, dtype="datetime64[s]")
+        self._sorted = 0
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def add(self, appt: Appointment) -> dict:
+        self.table.append(appt.as_dict())
+        return appt.as_dict()
+
+    def extend(self, columns: dict):
+        """Come `add` per un lotto di righe (colonne parallele)."""
+        self.table.extend(columns)
+
+    def get(self, appt_id: int) -> dict | None:
+        row = self.table.row_of(appt_id)
+        return None if row is None else self.table.row(row)
+
+    # ------------------------------------------------
+    # ORDINAMENTO PER PAZIENTE E DATA
+    # ------------------------------------------------
+
+    def _refresh_order(self):
+        if len(self.table) - self._sorted <= max(MIN_TAIL, len(self.table) // MERGE_FRACTION):
+            return
+        # lexsort: l'ultima chiave è la principale; a parità di data vale l'id
+        pids = self.table.column("patient_id")
+        days = self.table.column("date")
+        self._order = np.lexsort((self.table.column("id"), days, pids))
+        self._order_pids = pids[self._order]
+        self._order_days = days[self._order]
+        self._sorted = len(self.table)
+
+    def _patient_rows(self, pid: int, start=None, end=None) -> np.ndarray:
+        """Righe del paziente con data in [start, end), ordinate per data e id."""
+        self._refresh_order()
+        lo, hi = np.searchsorted(self._order_pids, [pid, pid + 1])
+        patient_days = self._order_days[lo:hi]
+        first = 0 if start is None else np.searchsorted(patient_days, to_datetime64(start))
+        last = len(patient_days) if end is None else np.searchsorted(patient_days, to_datetime64(end))
+        rows = self._order[lo + first : lo + last]
+
+        # Coda non ancora ordinata: filtro vettoriale sulle righe recenti
+        pids = self.table.column("patient_id")
+        days = self.table.column("date")
+        tail = np.arange(self._sorted, len(self.table))
+        tail = tail[pids[tail] == pid]
+        if start is not None:
+            tail = tail[days[tail] >= to_datetime64(start)]
+        if end is not None:
+            tail = tail[days[tail] < to_datetime64(end)]
+        if len(tail):
+            rows = np.concatenate([rows, tail])
+            rows = rows[np.lexsort((self.table.column("id")[rows], days[rows]))]
+        return rows
+
+    def by_patient(self, pid: int) -> list[dict]:
+        """Tutti gli appuntamenti del paziente, in ordine di data."""
+        return self.table.rows(self._patient_rows(pid))
+
+    def upcoming(self, pid: int, today: date) -> list[dict]:
+        """Appuntamenti da `today` in poi (bisezione sull'ordinamento del paziente)."""
+        return self.table.rows(self._patient_rows(pid, start=today))
+
+    def past(self, pid: int, today: date) -> list[dict]:
+        """Appuntamenti precedenti a `today`."""
+        return self.table.rows(self._patient_rows(pid, end=today))
+
+    # ------------------------------------------------
+    # STATO
+    # ------------------------------------------------
+
+    def by_status(self, status: str, pid: int | None = None) -> list[dict]:
+        if pid is None:
+            return self.table.rows(np.flatnonzero(self.table.equals("status", status)))
+        rows = self._patient_rows(pid)
+        code = self.table.dictionaries["status"].lookup(status)
+        return self.table.rows(rows[self.table.column("status")[rows] == code])
+
+    def set_status(self, appt_id: int, status: str) -> dict | None:
+        row = self.table.row_of(appt_id)
+        if row is None:
+            return None
+        self.table.set(row, "status", status)
+        return self.table.row(row)
+
+    def complete_elapsed(self, today: date) -> int:
+        """Segna come completate, in blocco, le visite prenotate con data precedente a `today`."""
+        elapsed = np.flatnonzero(
+            self.table.equals("status", STATUS_BOOKED) & (self.table.column("date") < to_datetime64(today))
+        )
+        self.table.set(elapsed, "status", STATUS_COMPLETED)
+        return len(elapsed)
+
+    def status_counts(self, status: str, size: int) -> np.ndarray:
+        """Numero di appuntamenti con lo stato dato per ogni id paziente (indice = id)."""
+        mask = self.table.equals("status", status)
+        return np.bincount(self.table.column("patient_id")[mask], minlength=size)
+
+    def to_pandas(self, pid: int | None = None) -> pd.DataFrame:
+        return self.table.to_pandas(None if pid is None else self._patient_rows(pid))
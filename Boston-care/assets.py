@@ -0,0 +1,73 @@
+"""
+Cache condivisa degli asset grafici (logo, QR code).
+
+Gli asset vengono calcolati una sola volta per processo e riutilizzati da
+tutte le sessioni e da tutti i rerun. La chiave di cache include la data di
+modifica del file sorgente, così sostituire `bs_logo.png` invalida la cache
+senza riavviare l'app.
+"""
+
+import base64
+import os
+from io import BytesIO
+
+import streamlit as st
+from PIL import Image
+
+from branded_qr import QR_FILL_COLOR, load_logo, make_branded_qr, to_png
+
+
+BASE_DIR = os.path.dirname(__file__)
+LOGO_PATH = os.path.join(BASE_DIR, "bs_logo.png")
+
+# Altezza del logo nella top bar (vedi .bs-logo nel CSS); lo rasterizziamo
+# al doppio per restare nitidi sugli schermi ad alta densità.
+LOGO_DISPLAY_HEIGHT = 32
+LOGO_PIXEL_RATIO = 2
+
+
+def file_mtime(path: str) -> float | None:
+    """Data di modifica del file (None se non esiste): usata come chiave di cache."""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+@st.cache_data(show_spinner=False)
+def _logo_data_uri(path: str, mtime: float, height: int) -> str | None:
+    try:
+        with Image.open(path) as img:
+            logo = img.convert("RGBA")
+        target_h = height * LOGO_PIXEL_RATIO
+        if logo.height > target_h:
+            target_w = max(1, round(logo.width * target_h / logo.height))
+            logo = logo.resize((target_w, target_h), Image.LANCZOS)
+        buf = BytesIO()
+        logo.save(buf, format="PNG", optimize=True)
+    except Exception:
+        return None
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def get_logo_src(height: int = LOGO_DISPLAY_HEIGHT) -> str | None:
+    """Logo come data URI, già ridotto all'altezza di visualizzazione."""
+    mtime = file_mtime(LOGO_PATH)
+    if mtime is None:
+        return None
+    return _logo_data_uri(LOGO_PATH, mtime, height)
+
+
+@st.cache_resource(show_spinner=False)
+def _qr_logo(path: str, mtime: float | None) -> Image.Image | None:
+    return load_logo(path) if mtime is not None else None
+
+
+@st.cache_data(show_spinner=False)
+def _branded_qr_png(url: str, color: str, size: int | None, logo_path: str, logo_mtime: float | None) -> bytes:
+    return to_png(make_branded_qr(url, color, _qr_logo(logo_path, logo_mtime), size))
+
+
+def get_branded_qr_png(url: str, color: str = QR_FILL_COLOR, size: int | None = None) -> bytes:
+    """QR brandizzato (cerchio bianco + logo) come PNG, generato una volta per parametri."""
+    return _branded_qr_png(url, color, size, LOGO_PATH, file_mtime(LOGO_PATH))
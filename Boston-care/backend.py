@@ -0,0 +1,455 @@
+"""
+Backend dell'app: archivio dati (in memoria o SQLite) e logica di dominio
+condivisa da tutte le sezioni in `sezioni/`.
+"""
+
+import os
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from checkins import CheckinStore
+from document_analysis import analyze_scan, analyze_upload
+from ingest import ReportStorage, ingest_upload
+from jobs import JobQueue
+from nps import TREND_WINDOWS
+from payments import MockGateway, PaymentLedger, payable
+from prevention import cohort_plans, prevention_plan
+from profiling import timed
+from reminders import FakeSmsSink, ReminderScheduler, booking_reminders
+from report_index import ReportIndex
+from slots import BOOKING_HORIZON_DAYS
+from sqlite_store import SQLiteStore
+from store import MemoryStore
+from telemetry import DASHBOARD_DAYS, TelemetryEngine
+from triage import chatbot_triage as rule_chatbot_triage
+
+
+# ====================================================
+# INIZIALIZZAZIONE SESSIONE / "DATABASE" IN MEMORIA
+# ====================================================
+
+def init_session():
+    """Stato minimo di sessione: login e paziente attivo (i dati sono nell'archivio condiviso)."""
+    if "logged_in" not in st.session_state:
+        st.session_state["logged_in"] = False
+        st.session_state["user_name"] = None
+        st.session_state["user_email"] = None
+
+    if "current_patient_id" not in st.session_state:
+        st.session_state["current_patient_id"] = None
+
+
+# ====================================================
+# FUNZIONI DI UTILITÀ (FAKE BACKEND IN MEMORIA)
+# ====================================================
+
+# Backend di archiviazione: "memory" (default, condiviso dalle sessioni del
+# processo) oppure "sqlite" (file condiviso anche tra repliche, percorso
+# configurabile).
+STORAGE_BACKEND = os.environ.get("BSC_STORAGE", "memory")
+SQLITE_PATH = os.environ.get(
+    "BSC_SQLITE_PATH",
+    os.path.join(os.path.dirname(__file__), "bsc_care.db"),
+)
+
+
+@st.cache_resource
+def get_sqlite_store(path: str) -> SQLiteStore:
+    """Un solo archivio SQLite (e pool di connessioni) per processo."""
+    return SQLiteStore(path)
+
+
+@st.cache_resource
+def get_memory_store() -> MemoryStore:
+    """Un solo archivio in memoria per processo: le sessioni tengono solo i propri id."""
+    return MemoryStore()
+
+
+def get_store() -> MemoryStore | SQLiteStore:
+    if STORAGE_BACKEND == "sqlite":
+        store = get_sqlite_store(SQLITE_PATH)
+    else:
+        store = get_memory_store()
+    # Al primo accesso di ogni giorno le visite trascorse passano a "completata"
+    store.complete_elapsed()
+    return store
+
+
+def register_patient(name: str, email: str, age: int, sex: str, phone: str | None = None):
+    """Registra un nuovo paziente legato all'email di login."""
+    patient = {
+        "name": name,
+        "email": (email or "").lower(),
+        "age": age,
+        "sex": sex,
+        "phone": phone or "",
+    }
+    return get_store().add_patient(patient)
+
+
+@timed()
+def get_patients_by_email(email: str):
+    """Restituisce tutti i pazienti associati a una certa email."""
+    return get_store().patients_by_email(email)
+
+
+def get_patient_by_id(pid: int):
+    """Restituisce il paziente con id = pid, se esiste."""
+    return get_store().get_patient(pid)
+
+
+@timed()
+def create_appointment(
+    patient_id: int, specialty: str, d: date, time_slot: str, reason: str | None = None
+):
+    """Prenota una visita nella fascia oraria (SlotUnavailable se piena o non prenotabile)."""
+    appt = {
+        "patient_id": patient_id,
+        "specialty": specialty,
+        "date": d,
+        "time_slot": time_slot,
+        "reason": reason,
+        "status": "prenotata",
+    }
+    return get_store().book_appointment(appt)
+
+
+@timed()
+def slot_availability(specialty: str, start: date | None = None, days: int = BOOKING_HORIZON_DAYS) -> dict:
+    """Posti liberi per giorno e fascia sull'orizzonte di prenotazione."""
+    return get_store().slot_availability(specialty, start or date.today(), days)
+
+
+@st.cache_resource
+def get_reminder_scheduler(path: str | None) -> ReminderScheduler:
+    # In demo i messaggi finiscono in un mittente finto; in produzione va
+    # passato qui il client del gateway SMS/push con lo stesso send_batch().
+    return ReminderScheduler(FakeSmsSink(), path=path)
+
+
+def reminder_scheduler() -> ReminderScheduler:
+    # Con SQLite la coda dei promemoria è persistente nello stesso file
+    return get_reminder_scheduler(SQLITE_PATH if STORAGE_BACKEND == "sqlite" else None)
+
+
+def schedule_booking_reminders(appt: dict, kinds: list[str]) -> list[dict]:
+    """Programma i promemoria scelti in prenotazione (chiavi di reminders.REMINDER_KINDS)."""
+    if not kinds:
+        return []
+    items = booking_reminders(appt, get_patient_by_id(appt["patient_id"]), kinds)
+    reminder_scheduler().schedule_many(items)
+    return items
+
+
+def get_reminders_by_patient(pid: int) -> list[dict]:
+    return reminder_scheduler().reminders_for(pid)
+
+
+@timed()
+def get_appointments_by_patient(pid: int):
+    """Restituisce tutti gli appuntamenti validi per uno specifico paziente."""
+    return get_store().appointments_by_patient(pid)
+
+
+def add_feedback(patient_id: int | None, rating: int, comment: str | None, touchpoint: str):
+    """Aggiunge un feedback (NPS-like) all'archivio."""
+    get_store().add_feedback(
+        {
+            "patient_id": patient_id,
+            "rating": rating,
+            "comment": comment,
+            "touchpoint": touchpoint,
+            "created_on": date.today().isoformat(),
+        }
+    )
+
+
+@timed()
+def feedback_summary():
+    """Sintesi NPS-like dei feedback raccolti (aggregato incrementale)."""
+    return get_store().feedback_summary()
+
+
+@timed()
+def feedback_trends():
+    """Sintesi NPS sulle finestre mobili (ultimi 7/30 giorni) e per touchpoint."""
+    store = get_store()
+    return {
+        "windows": {days: store.feedback_window_summary(days) for days in TREND_WINDOWS},
+        "touchpoints": store.feedback_touchpoint_summary(),
+    }
+
+
+@timed()
+def patient_summary(pid: int):
+    """Riepilogo di paziente: dati, appuntamenti futuri/passati, numero feedback."""
+    store = get_store()
+    patient = store.get_patient(pid)
+    if not patient:
+        return None
+
+    return {
+        "patient": patient,
+        "upcoming_appointments": store.upcoming_appointments(pid),
+        "past_appointments": store.past_appointments(pid),
+        "feedback_count": store.feedback_count(pid),
+    }
+
+
+@timed()
+def patient_rollup(
+    name_filter: str = "",
+    sort_by: str = "id",
+    descending: bool = False,
+    offset: int = 0,
+    limit: int = 25,
+):
+    """Riepilogo di tutti i pazienti in un solo passaggio, paginato lato server."""
+    return get_store().patient_rollup(name_filter, sort_by, descending, offset, limit)
+
+
+# ====================================================
+# LAVORI IN BACKGROUND (ANALISI REFERTI)
+# ====================================================
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Una coda di lavori per processo, condivisa da tutte le sessioni."""
+    return JobQueue(max_workers=int(os.environ.get("BSC_JOB_WORKERS", "4")))
+
+
+def submit_report_scan(patient_id: int | None, owner: str | None) -> str:
+    """Avvia la scansione di un referto e restituisce subito l'id del lavoro."""
+    return get_job_queue().submit("scan", analyze_scan, patient_id, owner=owner)
+
+
+def submit_upload_analysis(patient_id: int | None, file_name: str, size_bytes: int | None, owner: str | None) -> str:
+    """Avvia l'analisi di un referto caricato e restituisce subito l'id del lavoro."""
+    return get_job_queue().submit(
+        "upload", analyze_upload, patient_id, file_name, size_bytes, owner=owner
+    )
+
+
+def get_job_status(job_id: str) -> dict | None:
+    return get_job_queue().status(job_id)
+
+
+# ====================================================
+# ARCHIVIO REFERTI (FILE SU DISCO + METADATI NELL'ARCHIVIO)
+# ====================================================
+
+REPORTS_DIR = os.environ.get(
+    "BSC_REPORTS_DIR",
+    os.path.join(os.path.dirname(__file__), "referti_archivio"),
+)
+
+
+@st.cache_resource
+def get_report_storage(root: str) -> ReportStorage:
+    return ReportStorage(root)
+
+
+@st.cache_resource
+def get_report_index(path: str) -> ReportIndex:
+    return ReportIndex(path)
+
+
+def report_index() -> ReportIndex:
+    # Con SQLite l'indice vive nello stesso file del database (tabelle separate)
+    return get_report_index(SQLITE_PATH if STORAGE_BACKEND == "sqlite" else ":memory:")
+
+
+def archive_report(uploaded_file, patient_id: int | None) -> dict:
+    """Archivia e indicizza un referto caricato (solleva QuotaExceeded se oltre quota)."""
+    report = ingest_upload(
+        uploaded_file,
+        patient_id,
+        get_report_storage(REPORTS_DIR),
+        get_store(),
+        get_job_queue(),
+    )
+    if not report["duplicate"]:
+        ext = os.path.splitext(report["file_name"])[1].replace(".", "").upper() or "FILE"
+        report_index().add(
+            patient_id,
+            exam=report["file_name"],
+            exam_date=report["uploaded_at"][:10],
+            facility="Caricato dal paziente",
+            status="Archiviato",
+            file_type=ext,
+        )
+    return report
+
+
+@timed()
+def search_reports(
+    patient_id: int | None,
+    text: str = "",
+    date_from: date | None = None,
+    date_to: date | None = None,
+    offset: int = 0,
+    limit: int = 20,
+) -> tuple[list[dict], int]:
+    """Ricerca paginata nell'archivio referti del paziente (testo per prefisso + periodo)."""
+    index = report_index()
+    index.ensure_demo(patient_id)
+    return index.search(patient_id, text, date_from, date_to, offset, limit)
+
+
+def get_reports_by_patient(pid: int | None) -> list[dict]:
+    return get_store().reports_by_patient(pid)
+
+
+# ====================================================
+# MONITORAGGIO POST-PROCEDURA (SERIE DEI CHECK-IN)
+# ====================================================
+
+CHECKINS_DIR = os.environ.get(
+    "BSC_CHECKINS_DIR",
+    os.path.join(os.path.dirname(__file__), "checkin_archivio"),
+)
+
+
+@st.cache_resource
+def get_checkin_store(root: str | None) -> CheckinStore:
+    return CheckinStore(root)
+
+
+def checkin_store() -> CheckinStore:
+    # Come per l'archivio: su disco con SQLite, altrimenti solo in memoria (condiviso)
+    return get_checkin_store(CHECKINS_DIR if STORAGE_BACKEND == "sqlite" else None)
+
+
+def record_checkin(
+    patient_id: int, pain: int, breath: bool, fever: bool, since_proc: int, level: str
+) -> dict:
+    """Registra il check-in nella serie del paziente; restituisce i suoi indicatori."""
+    return checkin_store().add(patient_id, pain, breath, fever, since_proc, level)
+
+
+@timed()
+def checkin_history(patient_id: int):
+    return checkin_store().history(patient_id)
+
+
+@timed()
+def deteriorating_patients() -> list[dict]:
+    """Pazienti con check-in in peggioramento, con il nome dall'archivio."""
+    rows = checkin_store().deteriorating()
+    for row in rows:
+        patient = get_patient_by_id(row["patient_id"])
+        row["name"] = patient["name"] if patient else "—"
+    return rows
+
+
+# ====================================================
+# TELEMETRIA DA DISPOSITIVO / WEARABLE
+# ====================================================
+
+TELEMETRY_DIR = os.environ.get(
+    "BSC_TELEMETRY_DIR",
+    os.path.join(os.path.dirname(__file__), "telemetria"),
+)
+# Porta del listener TCP per i gateway (vuota = solo file depositati in inbox/)
+TELEMETRY_PORT = os.environ.get("BSC_TELEMETRY_PORT", "")
+
+
+@st.cache_resource
+def get_telemetry(root: str) -> TelemetryEngine:
+    engine = TelemetryEngine(root)
+    # I file depositati in inbox/ si acquisiscono in background, non durante il rendering
+    engine.poll_background()
+    if TELEMETRY_PORT:
+        engine.serve_background(port=int(TELEMETRY_PORT))
+    return engine
+
+
+@timed()
+def device_summary(patient_id: int) -> dict:
+    """Aggregati degli ultimi 30 giorni del dispositivo del paziente (dagli aggregati giornalieri)."""
+    return get_telemetry(TELEMETRY_DIR).summary(patient_id, DASHBOARD_DAYS)
+
+
+def device_hourly_series(patient_id: int, metric: str = "hr") -> list[tuple]:
+    return get_telemetry(TELEMETRY_DIR).rollup_series(patient_id, metric, "1h")
+
+
+def simulate_device_data(patient_id: int) -> int:
+    """Demo: 30 giorni di letture simulate, solo per un paziente senza dati (un nuovo clic non li duplica)."""
+    return get_telemetry(TELEMETRY_DIR).simulate_patient(patient_id, DASHBOARD_DAYS)
+
+
+# ====================================================
+# PAGAMENTI
+# ====================================================
+
+@st.cache_resource
+def get_payment_ledger(path: str) -> PaymentLedger:
+    return PaymentLedger(MockGateway(), path)
+
+
+def payment_ledger() -> PaymentLedger:
+    # Come per l'indice dei referti: nel file SQLite, altrimenti in memoria (condiviso)
+    return get_payment_ledger(SQLITE_PATH if STORAGE_BACKEND == "sqlite" else ":memory:")
+
+
+@timed()
+def get_payable_appointments(pid: int) -> list[dict]:
+    """Visite future del paziente con importo da listino."""
+    return payable(get_store().upcoming_appointments(pid))
+
+
+def get_payment_intent(appt_id: int) -> dict | None:
+    """Stato attuale del pagamento della visita (letto a ogni esecuzione della riga)."""
+    return payment_ledger().intent(appt_id)
+
+
+@timed()
+def pay_appointment(appt: dict, method: str) -> dict:
+    """Paga la visita (idempotente: ripetere la chiamata non addebita di nuovo)."""
+    return payment_ledger().pay(appt, method)
+
+
+def settle_payments() -> list[dict]:
+    return payment_ledger().settle()
+
+
+def reconcile_payments() -> dict:
+    return payment_ledger().reconcile()
+
+
+# ====================================================
+# LOGICA CHATBOT TRIAGE (DEMO)
+# ====================================================
+
+def chatbot_triage(symptom: str, severity: int, red_flags: list[str], free_text: str):
+    # Le regole vivono in triage.py (tabella condivisa con la valutazione a lotti)
+    return rule_chatbot_triage(severity, red_flags, free_text)
+
+
+# ====================================================
+# PIANO DI PREVENZIONE (DEMO)
+# ====================================================
+
+def generate_prevention_plan(age: int, sex: str, conditions: list[str] | None):
+    # Il piano si legge dal catalogo precompilato (vedi prevention.py)
+    plan = prevention_plan(age, sex, conditions)
+    return plan.risk_profile, list(plan.recommendations), list(plan.screenings)
+
+
+@timed()
+def cohort_prevention_plans(conditions_by_patient: dict[int, list[str]] | None = None) -> pd.DataFrame:
+    """Piani di prevenzione per tutti i pazienti in archivio (campagne di outreach)."""
+    patients = get_store().patients_frame()
+    conditions_by_patient = conditions_by_patient or {}
+    plans = cohort_plans(
+        patients["age"],
+        patients["sex"],
+        [conditions_by_patient.get(pid, ()) for pid in patients["id"]],
+    )
+    plans.insert(0, "email", patients["email"])
+    plans.insert(0, "name", patients["name"])
+    plans.insert(0, "patient_id", patients["id"])
+    return plans
@@ -0,0 +1,47 @@
+"""
+Micro-benchmark (pytest-benchmark) delle funzioni di backend più usate nei rerun.
+
+Il file non segue lo schema `test_*.py`, quindi la normale esecuzione di
+pytest non lo raccoglie: va indicato esplicitamente. Per confrontare con
+una misura salvata e fallire sulle regressioni:
+
+Uso (dalla cartella Boston-care, con `pip install pytest pytest-benchmark`):
+    python -m pytest benchmarks/bench_backend.py --benchmark-autosave
+    python -m pytest benchmarks/bench_backend.py --benchmark-compare --benchmark-compare-fail=mean:20%
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend  # noqa: E402
+from seed import seed_store  # noqa: E402
+
+SIZES = (1_000, 100_000)
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda n: f"{n // 1000}k")
+def seeded(request):
+    """Archivio condiviso in memoria, ricreato e popolato per ogni volume."""
+    backend.get_memory_store.clear()
+    yield seed_store(backend.get_memory_store(), request.param)
+    backend.get_memory_store.clear()
+
+
+def test_feedback_summary(benchmark, seeded):
+    result = benchmark(backend.feedback_summary)
+    assert result["n_responses"] == seeded["feedbacks"]
+
+
+def test_patient_summary(benchmark, seeded):
+    result = benchmark(backend.patient_summary, seeded["bench_pid"])
+    assert result["patient"]["id"] == seeded["bench_pid"]
+
+
+@pytest.mark.parametrize("severity, red_flags", [(3, []), (8, ["dolore toracico", "svenimento"])])
+def test_chatbot_triage(benchmark, severity, red_flags):
+    result = benchmark(backend.chatbot_triage, "Dolore", severity, red_flags, "da due giorni")
+    assert result
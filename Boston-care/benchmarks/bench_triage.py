@@ -0,0 +1,72 @@
+"""
+Benchmark del motore di triage: valutazione record per record (come fanno
+le pagine) contro la valutazione vettoriale di un intero lotto.
+
+Uso (dalla cartella Boston-care):
+    python benchmarks/bench_triage.py --records 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from triage import RED_FLAGS, chatbot_level, checkin_triage, score_batch  # noqa: E402
+
+
+def make_records(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    flags = [
+        [flag for bit, flag in enumerate(RED_FLAGS) if mask & (1 << bit)]
+        for mask in rng.integers(0, 1 << len(RED_FLAGS), n)
+    ]
+    return pd.DataFrame(
+        {
+            "pain": rng.integers(0, 11, n),
+            "breath": rng.random(n) < 0.2,
+            "fever": rng.random(n) < 0.3,
+            "days": rng.integers(0, 61, n),
+            "severity": rng.integers(0, 11, n),
+            "red_flags": flags,
+        }
+    )
+
+
+def score_scalar(frame: pd.DataFrame) -> pd.DataFrame:
+    checkin, chatbot = [], []
+    for pain, breath, fever, days, severity, flags in frame.itertuples(index=False):
+        checkin.append(checkin_triage(pain, breath, fever, days)[0])
+        chatbot.append(chatbot_level(severity, flags))
+    return pd.DataFrame({"checkin": checkin, "chatbot": chatbot}, index=frame.index)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    frame = make_records(args.records)
+    scalar, t_scalar = timed(score_scalar, frame)
+    batch, t_batch = timed(score_batch, frame)
+
+    if not (scalar == batch).all(axis=None):
+        raise SystemExit("ERRORE: i livelli a lotti differiscono da quelli record per record")
+
+    for label, elapsed in (("singolo", t_scalar), ("lotto", t_batch)):
+        print(f"{label:>8}: {elapsed * 1000:9.1f} ms  {args.records / elapsed:12,.0f} record/s")
+    print(f"speed-up: {t_scalar / t_batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
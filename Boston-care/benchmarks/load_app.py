@@ -0,0 +1,149 @@
+"""
+Test di carico headless dell'app: latenza dei rerun e memoria al crescere dei dati.
+
+Per ogni volume di dati un processo nuovo riempie l'archivio (vedi seed.py),
+apre `--sessions` sessioni con `streamlit.testing.v1.AppTest` e ripete per
+`--rounds` giri i flussi login, prenotazione, pagamento e dashboard clinica,
+misurando ogni rerun. Riporta p50/p95/max per flusso e il picco di memoria
+del processo (RSS), che è distinto per volume perché ogni volume gira in un
+processo separato.
+
+Uso (dalla cartella Boston-care):
+    python benchmarks/load_app.py --sizes 1000 10000 100000 1000000 --sessions 4 --rounds 5
+    BSC_STORAGE=sqlite python benchmarks/load_app.py --sizes 1000 10000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+APP = os.path.join(APP_DIR, "appgithub.py")
+FLOWS = ("login", "prenotazione", "pagamento", "dashboard_clinica")
+
+
+def _button(at, label: str):
+    return next(b for b in at.button if b.label == label)
+
+
+def _check(at, flow: str):
+    if at.exception:
+        raise RuntimeError(f"{flow}: {[e.value for e in at.exception]}")
+
+
+def _timed_run(at, flow: str, timings: dict, action=None):
+    start = time.perf_counter()
+    (action or at).run()
+    timings[flow].append((time.perf_counter() - start) * 1000)
+    _check(at, flow)
+
+
+def run_flows(at, timings: dict, bench_email: str):
+    """Un giro dei flussi su una sessione già avviata (pagina di login visibile)."""
+    at.text_input[0].input(bench_email)
+    _timed_run(at, "login", timings, _button(at, "Accedi").click())
+
+    at.switch_page("sezioni/visite.py")
+    _timed_run(at, "prenotazione", timings)
+    _timed_run(at, "prenotazione", timings, _button(at, "Prenota visita").click())
+
+    at.switch_page("sezioni/pagamenti.py")
+    _timed_run(at, "pagamento", timings)
+    pay = [b for b in at.button if b.label == "Paga ora"]
+    if pay:
+        _timed_run(at, "pagamento", timings, pay[0].click())
+
+    at.switch_page("sezioni/dashboard_clinica.py")
+    _timed_run(at, "dashboard_clinica", timings)
+
+
+def run_size(n_records: int, sessions: int, rounds: int) -> dict:
+    """Eseguito in un processo nuovo: archivio, cache Streamlit e picco RSS partono da zero."""
+    tmp = tempfile.mkdtemp(prefix="bsc_load_")
+    for var, sub in (("BSC_TELEMETRY_DIR", "telemetria"), ("BSC_CHECKINS_DIR", "checkin"), ("BSC_REPORTS_DIR", "referti")):
+        os.environ.setdefault(var, os.path.join(tmp, sub))
+    os.environ.setdefault("BSC_SQLITE_PATH", os.path.join(tmp, "bsc_load.db"))
+    sys.path[:0] = [APP_DIR, BENCH_DIR]
+
+    from streamlit.testing.v1 import AppTest
+
+    import backend
+    from seed import BENCH_EMAIL, seed_store
+
+    # Lo stesso archivio condiviso che useranno le sessioni AppTest di questo processo
+    store = backend.get_store()
+    start = time.perf_counter()
+    counts = seed_store(store, n_records)
+    seed_s = time.perf_counter() - start
+    rss_seeded = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    timings = defaultdict(list)
+    for _ in range(rounds):
+        apps = [AppTest.from_file(APP, default_timeout=300) for _ in range(sessions)]
+        for at in apps:
+            at.run()
+            _check(at, "avvio")
+        for at in apps:
+            run_flows(at, timings, BENCH_EMAIL)
+
+    return {
+        "records": n_records,
+        "backend": backend.STORAGE_BACKEND,
+        **counts,
+        "seed_s": seed_s,
+        "rss_seeded_mb": rss_seeded,
+        "rss_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "flows": {
+            flow: {
+                "reruns": len(ms),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "max_ms": float(np.max(ms)),
+            }
+            for flow, ms in timings.items()
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--json", help="salva i risultati anche in questo file JSON")
+    args = parser.parse_args(argv)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for n in args.sizes:
+        with ctx.Pool(1) as pool:
+            result = pool.apply(run_size, (n, args.sessions, args.rounds))
+        results.append(result)
+        print(
+            f"\n{n:,} record ({result['backend']}): seed {result['seed_s']:.1f} s, "
+            f"RSS dopo il seed {result['rss_seeded_mb']:.0f} MB, picco {result['rss_peak_mb']:.0f} MB"
+        )
+        for flow in FLOWS:
+            stats = result["flows"].get(flow)
+            if stats:
+                print(
+                    f"  {flow:>18}: p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms  "
+                    f"max {stats['max_ms']:8.1f} ms  ({stats['reruns']} rerun)"
+                )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Dati sintetici per i benchmark: pazienti, appuntamenti e feedback.
+
+Un volume di N record si divide in N/10 pazienti, N/2 appuntamenti e il
+resto in feedback. I primi pazienti sono legati all'email di login dei
+benchmark, così i flussi guidati trovano un paziente attivo e delle visite
+da pagare.
+"""
+
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nps import TOUCHPOINTS  # noqa: E402
+from slots import SPECIALTIES, TIME_SLOTS  # noqa: E402
+
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PATIENTS = 3
+
+
+def split_records(n_records: int) -> tuple[int, int, int]:
+    patients = max(BENCH_PATIENTS, n_records // 10)
+    appointments = n_records // 2
+    return patients, appointments, max(0, n_records - patients - appointments)
+
+
+def seed_store(store, n_records: int, seed: int = 0, today: date | None = None) -> dict:
+    """Riempie l'archivio (MemoryStore o SQLiteStore) tramite i suoi metodi pubblici."""
+    today = today or date.today()
+    rng = np.random.default_rng(seed)
+    n_patients, n_appts, n_feedbacks = split_records(n_records)
+
+    sexes = rng.choice(["F", "M"], n_patients)
+    ages = rng.integers(18, 90, n_patients)
+    pids = []
+    for i in range(n_patients):
+        email = BENCH_EMAIL if i < BENCH_PATIENTS else f"paziente{i}@example.com"
+        patient = store.add_patient(
+            {"name": f"Paziente {i}", "email": email, "age": int(ages[i]), "sex": sexes[i], "phone": ""}
+        )
+        pids.append(patient["id"])
+
+    # Un anno di storico e l'orizzonte di prenotazione; visite future garantite ai pazienti di login
+    owners = rng.integers(0, n_patients, n_appts)
+    owners[: BENCH_PATIENTS * 4] = np.repeat(np.arange(BENCH_PATIENTS), 4)
+    offsets = rng.integers(-365, 90, n_appts)
+    offsets[: BENCH_PATIENTS * 4] = rng.integers(1, 90, BENCH_PATIENTS * 4)
+    specialties = rng.integers(0, len(SPECIALTIES), n_appts)
+    bands = rng.integers(0, len(TIME_SLOTS), n_appts)
+    for owner, offset, spec, band in zip(owners, offsets, specialties, bands):
+        store.add_appointment(
+            {
+                "patient_id": pids[owner],
+                "specialty": SPECIALTIES[spec],
+                "date": today + timedelta(days=int(offset)),
+                "time_slot": TIME_SLOTS[band],
+                "reason": None,
+                "status": "prenotata",
+            }
+        )
+
+    ratings = rng.integers(0, 11, n_feedbacks)
+    raters = rng.integers(0, n_patients, n_feedbacks)
+    touch = rng.integers(0, len(TOUCHPOINTS), n_feedbacks)
+    days_ago = rng.integers(0, 365, n_feedbacks)
+    for rating, rater, tp, ago in zip(ratings, raters, touch, days_ago):
+        store.add_feedback(
+            {
+                "patient_id": pids[rater],
+                "rating": int(rating),
+                "comment": None,
+                "touchpoint": TOUCHPOINTS[tp],
+                "created_on": (today - timedelta(days=int(ago))).isoformat(),
+            }
+        )
+
+    # Stato a regime: le visite trascorse sono già completate
+    store.complete_elapsed(today)
+    return {"patients": n_patients, "appointments": n_appts, "feedbacks": n_feedbacks, "bench_pid": pids[0]}
@@ -0,0 +1,290 @@
+"""
+Generazione di QR code brandizzati Boston Scientific (blu, badge circolare, logo al centro).
+
+Usabile come libreria (`make_branded_qr`) oppure da riga di comando:
+
+    # un QR per ogni reparto x campagna, in parallelo, dentro uno ZIP
+    python branded_qr.py batch --base-url https://.../ --ward cardiologia --ward ortopedia \\
+        --campaign open-day-2025 --out qr_eventi.zip
+
+    # stessi QR in un PDF multipagina (una pagina per QR)
+    python branded_qr.py batch --base-url https://.../ --ward cardiologia --out qr_eventi.pdf
+
+    # endpoint HTTP: GET /qr.png?url=...&color=%23005c99&size=600
+    python branded_qr.py serve --port 8765
+"""
+
+import argparse
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from itertools import islice, product
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+import qrcode
+from PIL import Image, ImageDraw
+
+
+DEFAULT_LOGO_PATH = os.path.join(os.path.dirname(__file__), "bs_logo.png")
+QR_FILL_COLOR = "#005c99"
+QR_BOX_SIZE = 10
+MAX_SIZE = 4000
+PDF_CHUNK_PAGES = 64   # pagine tenute in memoria alla volta scrivendo il PDF
+
+# Logo già ridimensionato per lato: i QR dello stesso batch hanno quasi
+# sempre la stessa versione, quindi il LANCZOS si fa una volta sola.
+_resized_logos: dict[tuple[int, int], tuple[Image.Image, Image.Image]] = {}
+
+
+def load_logo(path: str = DEFAULT_LOGO_PATH) -> Image.Image | None:
+    """Decodifica il logo una volta (RGBA); None se manca o non è leggibile."""
+    try:
+        with Image.open(path) as img:
+            return img.convert("RGBA")
+    except Exception:
+        return None
+
+
+def _fit_logo(logo: Image.Image, side: int) -> Image.Image:
+    key = (id(logo), side)
+    cached = _resized_logos.get(key)
+    if cached is None or cached[0] is not logo:
+        cached = (logo, logo.resize((side, side), Image.LANCZOS))
+        _resized_logos[key] = cached
+    return cached[1]
+
+
+def make_branded_qr(
+    url: str,
+    color: str = QR_FILL_COLOR,
+    logo: Image.Image | None = None,
+    size: int | None = None,
+    box_size: int = QR_BOX_SIZE,
+) -> Image.Image:
+    """
+    QR con alta correzione di errore, colorato, su cerchio bianco e con il logo
+    (~1/3 della larghezza) al centro. `size` è il lato finale in pixel
+    (None = dimensione naturale data da `box_size`).
+    """
+    # 1) QR base con alta correzione di errore
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_H,
+        box_size=box_size,
+        border=3,
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+
+    # 2) QR colorato
+    qr_img = qr.make_image(fill_color=color, back_color="white").convert("RGBA")
+    qr_width, qr_height = qr_img.size
+
+    # 3) Sfondo circolare bianco dietro al QR (effetto "badge" circolare)
+    circle_diameter = qr_width + 60
+    bg = Image.new("RGBA", (circle_diameter, circle_diameter), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(bg)
+    draw.ellipse(
+        (0, 0, circle_diameter - 1, circle_diameter - 1),
+        fill=(255, 255, 255, 255)
+    )
+    offset = (
+        (circle_diameter - qr_width) // 2,
+        (circle_diameter - qr_height) // 2,
+    )
+    bg.paste(qr_img, offset, qr_img)
+
+    # 4) Logo al centro
+    if logo is not None:
+        logo_size = qr_width // 3
+        fitted = _fit_logo(logo, logo_size)
+        logo_pos = (
+            circle_diameter // 2 - logo_size // 2,
+            circle_diameter // 2 - logo_size // 2,
+        )
+        bg.paste(fitted, logo_pos, fitted)
+
+    if size and size != circle_diameter:
+        bg = bg.resize((size, size), Image.LANCZOS)
+    return bg
+
+
+def to_png(img: Image.Image) -> bytes:
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def tracking_url(base_url: str, ward: str | None = None, campaign: str | None = None) -> str:
+    """Aggiunge i parametri di tracciamento (utm + reparto) all'URL dell'app."""
+    parts = urlparse(base_url)
+    query = parse_qs(parts.query)
+    query["utm_source"] = ["qr"]
+    query["utm_medium"] = ["print"]
+    if campaign:
+        query["utm_campaign"] = [campaign]
+    if ward:
+        query["ward"] = [ward]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+# ====================================================
+# BATCH IN PARALLELO
+# ====================================================
+
+_worker_logo: Image.Image | None = None
+
+
+def _init_worker(logo_path: str | None):
+    # Ogni processo decodifica il logo una volta sola e lo riusa per tutti i QR
+    global _worker_logo
+    _worker_logo = load_logo(logo_path) if logo_path else None
+
+
+def _render_job(job: tuple[str, str, str, int | None]) -> tuple[str, bytes]:
+    name, url, color, size = job
+    return name, to_png(make_branded_qr(url, color, _worker_logo, size))
+
+
+def render_batch(
+    jobs: list[tuple[str, str]],
+    color: str = QR_FILL_COLOR,
+    size: int | None = None,
+    logo_path: str | None = DEFAULT_LOGO_PATH,
+    workers: int | None = None,
+):
+    """Genera (nome, PNG) per ogni (nome, url) usando un pool di processi, nell'ordine dato."""
+    tasks = [(name, url, color, size) for name, url in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(logo_path,)) as pool:
+        yield from pool.map(_render_job, tasks, chunksize=max(1, len(tasks) // 64))
+
+
+def write_zip(out_path: str, rendered) -> int:
+    count = 0
+    with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for name, png in rendered:
+            zf.writestr(f"{name}.png", png)
+            count += 1
+    return count
+
+
+def _pdf_page(png: bytes) -> Image.Image:
+    with Image.open(BytesIO(png)) as img:
+        page = Image.new("RGB", img.size, "white")
+        page.paste(img, (0, 0), img)
+    return page
+
+
+def write_pdf(out_path: str, rendered) -> int:
+    """Una pagina per QR, scritta a blocchi di PDF_CHUNK_PAGES (i blocchi successivi in append)."""
+    count = 0
+    rendered = iter(rendered)
+    while pages := [_pdf_page(png) for _, png in islice(rendered, PDF_CHUNK_PAGES)]:
+        pages[0].save(out_path, format="PDF", save_all=True, append_images=pages[1:], append=count > 0)
+        count += len(pages)
+    return count
+
+
+def _batch_jobs(args) -> list[tuple[str, str]]:
+    wards = args.ward or [None]
+    campaigns = args.campaign or [None]
+    jobs = []
+    for ward, campaign in product(wards, campaigns):
+        name = "_".join(part for part in ("qr", ward, campaign) if part)
+        jobs.append((name, tracking_url(args.base_url, ward, campaign)))
+    return jobs
+
+
+# ====================================================
+# ENDPOINT HTTP
+# ====================================================
+
+class QrRequestHandler(BaseHTTPRequestHandler):
+    """GET /qr.png?url=...&color=...&size=... -> PNG del QR brandizzato."""
+
+    logo: Image.Image | None = None
+
+    def do_GET(self):
+        parts = urlparse(self.path)
+        if parts.path != "/qr.png":
+            self.send_error(404)
+            return
+        params = parse_qs(parts.query)
+        url = params.get("url", [""])[0]
+        if not url:
+            self.send_error(400, "Parametro 'url' mancante")
+            return
+        color = params.get("color", [QR_FILL_COLOR])[0]
+        try:
+            size = int(params["size"][0]) if "size" in params else None
+        except ValueError:
+            self.send_error(400, "Parametro 'size' non valido")
+            return
+        if size is not None and not 0 < size <= MAX_SIZE:
+            self.send_error(400, f"'size' deve essere tra 1 e {MAX_SIZE}")
+            return
+        try:
+            png = to_png(make_branded_qr(url, color, self.logo, size))
+        except ValueError as exc:
+            self.send_error(400, str(exc))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(png)))
+        self.send_header("Cache-Control", "public, max-age=86400")
+        self.end_headers()
+        self.wfile.write(png)
+
+
+def serve(host: str, port: int, logo_path: str | None = DEFAULT_LOGO_PATH):
+    QrRequestHandler.logo = load_logo(logo_path) if logo_path else None
+    server = ThreadingHTTPServer((host, port), QrRequestHandler)
+    print(f"QR endpoint su http://{host}:{port}/qr.png?url=...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="QR code brandizzati Boston Scientific Care")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    batch = sub.add_parser("batch", help="genera QR per reparto/campagna in ZIP o PDF")
+    batch.add_argument("--base-url", required=True)
+    batch.add_argument("--ward", action="append", help="reparto (ripetibile)")
+    batch.add_argument("--campaign", action="append", help="campagna (ripetibile)")
+    batch.add_argument("--out", required=True, help="file .zip o .pdf di destinazione")
+    batch.add_argument("--color", default=QR_FILL_COLOR)
+    batch.add_argument("--size", type=int, default=None, help="lato finale in pixel")
+    batch.add_argument("--logo", default=DEFAULT_LOGO_PATH)
+    batch.add_argument("--no-logo", action="store_true")
+    batch.add_argument("--workers", type=int, default=None)
+
+    srv = sub.add_parser("serve", help="endpoint HTTP che restituisce QR in PNG")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--logo", default=DEFAULT_LOGO_PATH)
+    srv.add_argument("--no-logo", action="store_true")
+
+    args = parser.parse_args(argv)
+    logo_path = None if args.no_logo else args.logo
+
+    if args.command == "serve":
+        serve(args.host, args.port, logo_path)
+        return
+
+    rendered = render_batch(_batch_jobs(args), args.color, args.size, logo_path, args.workers)
+    if args.out.lower().endswith(".pdf"):
+        count = write_pdf(args.out, rendered)
+    else:
+        count = write_zip(args.out, rendered)
+    print(f"{count} QR generati in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Importazione ed esportazione a lotti di pazienti, appuntamenti e feedback.
+
+I file (CSV, JSONL o Parquet, riconosciuti dall'estensione) sono letti a
+blocchi di `--chunk` righe: ogni blocco viene validato con operazioni
+vettoriali (email, età, sesso, date ISO, valori ammessi) e le righe valide
+sono scritte con un inserimento a lotti in un'unica transazione, quindi la
+memoria resta limitata a un blocco alla volta anche per registri da
+centinaia di migliaia di pazienti. Le righe scartate, con il numero di riga
+e il motivo, possono essere salvate in un file a parte (`--scarti`).
+
+Gli id sono assegnati dall'archivio: negli appuntamenti e nei feedback
+`patient_id` si riferisce agli id dell'app (ad esempio da un'esportazione),
+quindi i pazienti vanno importati per primi. Gli appuntamenti importati non
+occupano posti nelle fasce orarie, come `add_appointment`.
+
+Uso da riga di comando (dalla cartella Boston-care):
+    python bulk.py import patients registro.csv --scarti scarti.csv
+    python bulk.py import appointments visite.parquet --chunk 100000
+    python bulk.py export feedbacks feedback.jsonl --db bsc_care.db
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from appointments import APPOINTMENT_SCHEMA, APPOINTMENT_STATUSES, STATUS_BOOKED
+from columnar import CATEGORY, DATE, NULL_INT, TEXT
+from nps import TOUCHPOINTS
+from slots import SPECIALTIES, TIME_SLOTS
+from sqlite_store import SQLiteStore
+from store import FEEDBACK_SCHEMA, PATIENT_SCHEMA, PATIENT_SEXES
+
+
+CHUNK_ROWS = 50_000
+TABLES = ("patients", "appointments", "feedbacks")
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet", ".pq": "parquet"}
+
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+AGE_RANGE = (0, 120)  # come il form di registrazione
+RATING_RANGE = (0, 10)
+
+SCHEMAS = {"patients": PATIENT_SCHEMA, "appointments": APPOINTMENT_SCHEMA, "feedbacks": FEEDBACK_SCHEMA}
+
+
+def file_format(path: str) -> str:
+    """Formato dall'estensione (anche compressa, es. `.csv.gz`)."""
+    name = path.lower().removesuffix(".gz")
+    fmt = FORMATS.get(os.path.splitext(name)[1])
+    if fmt is None:
+        raise ValueError(f"Formato non riconosciuto: {path} (attesi {', '.join(sorted(set(FORMATS.values())))})")
+    return fmt
+
+
+# ====================================================
+# LETTURA E SCRITTURA A BLOCCHI
+# ====================================================
+
+def read_chunks(path: str, chunk_size: int = CHUNK_ROWS):
+    """DataFrame di al più `chunk_size` righe; i CSV arrivano come testo, la validazione li converte."""
+    fmt = file_format(path)
+    if fmt == "csv":
+        with pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False) as reader:
+            yield from reader
+    elif fmt == "jsonl":
+        with pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False, convert_dates=False) as reader:
+            yield from reader
+    else:
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+
+class ChunkWriter:
+    """Accoda DataFrame a un file CSV, JSONL o Parquet (un blocco alla volta in memoria)."""
+
+    def __init__(self, path: str, arrow_schema=None):
+        self.path = path
+        self.format = file_format(path)
+        self.arrow_schema = arrow_schema
+        self.rows = 0
+        self._parquet = None
+
+    def write(self, frame: pd.DataFrame):
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, schema=self.arrow_schema, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            mode = "a" if self.rows else "w"
+            with open(self.path, mode, encoding="utf-8", newline="") as fh:
+                if self.format == "csv":
+                    frame.to_csv(fh, header=not self.rows, index=False)
+                elif len(frame):
+                    frame.to_json(fh, orient="records", lines=True, force_ascii=False)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def arrow_schema(schema: dict):
+    """Schema Parquet stabile tra i blocchi: testi e categorie come stringhe, date come date32."""
+    import pyarrow as pa
+
+    fields = []
+    for name, kind in schema.items():
+        if kind == DATE:
+            fields.append((name, pa.date32()))
+        elif kind in (CATEGORY, TEXT):
+            fields.append((name, pa.string()))
+        else:
+            fields.append((name, pa.from_numpy_dtype(np.dtype(kind))))
+    return pa.schema(fields)
+
+
+def export_frame(frame: pd.DataFrame, schema: dict, fmt: str) -> pd.DataFrame:
+    """
+    Stessa forma per entrambi gli archivi: categorie come testo, date ISO
+    (oggetti `date` per Parquet), interi mancanti vuoti invece di NULL_INT o NaN.
+    """
+    frame = frame.copy()
+    for name, kind in schema.items():
+        if kind == CATEGORY:
+            frame[name] = frame[name].astype(object).where(frame[name].notna(), None)
+        elif kind == DATE:
+            frame[name] = frame[name].dt.date if fmt == "parquet" else frame[name].dt.strftime("%Y-%m-%d")
+        elif kind != TEXT:
+            frame[name] = frame[name].mask(frame[name] == NULL_INT).astype("Int64")
+    return frame
+
+
+# ====================================================
+# VALIDAZIONE VETTORIALE
+# ====================================================
+
+def _text(raw: pd.DataFrame, name: str, lower: bool = False) -> pd.Series:
+    """Testo senza spazi ai bordi; None se la colonna manca o il valore è vuoto."""
+    if name not in raw:
+        return pd.Series(None, index=raw.index, dtype=object)
+    values = raw[name].astype("string").str.strip()
+    if lower:
+        values = values.str.lower()
+    values = values.replace("", pd.NA)
+    return values.astype(object).where(values.notna(), None)
+
+
+def _integer(raw: pd.DataFrame, name: str) -> pd.Series:
+    """Interi (Int64); NA se il valore manca o non è un intero."""
+    if name not in raw:
+        return pd.Series(pd.NA, index=raw.index, dtype="Int64")
+    numbers = pd.to_numeric(raw[name], errors="coerce")
+    return numbers.where(numbers % 1 == 0).astype("Int64")
+
+
+def _date(raw: pd.DataFrame, name: str) -> pd.Series:
+    """Date ISO (AAAA-MM-GG) come datetime64[s]; NaT se mancanti o non valide."""
+    if name in raw and pd.api.types.is_datetime64_any_dtype(raw[name]):
+        return raw[name].dt.normalize().astype("datetime64[s]")
+    days = pd.to_datetime(_text(raw, name), format="%Y-%m-%d", errors="coerce")
+    return days.astype("datetime64[s]")
+
+
+def _between(values: pd.Series, low: int, high: int) -> pd.Series:
+    return values.between(low, high).fillna(False).astype(bool)
+
+
+def _split(raw: pd.DataFrame, clean: dict, checks: list) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Applica i controlli (maschera delle righe non valide, motivo) e restituisce
+    le righe valide già convertite e quelle scartate con il primo motivo.
+    """
+    error = pd.Series(None, index=raw.index, dtype=object)
+    for invalid, reason in checks:
+        error = error.mask(error.isna() & invalid, reason)
+    ok = error.isna().to_numpy()
+    valid = pd.DataFrame(clean, index=raw.index)[ok].reset_index(drop=True)
+    rejected = raw[~ok].assign(errore=error[~ok])
+    return valid, rejected
+
+
+def validate_patients(raw: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    name = _text(raw, "name")
+    email = _text(raw, "email", lower=True)
+    age = _integer(raw, "age")
+    sex = _text(raw, "sex")
+    phone = _text(raw, "phone")
+    clean = {"name": name, "email": email, "age": age, "sex": sex, "phone": phone.where(phone.notna(), "")}
+    return _split(
+        raw,
+        clean,
+        [
+            (name.isna(), "nome mancante"),
+            (~email.str.fullmatch(EMAIL_PATTERN, na=False).astype(bool), "email non valida"),
+            (~_between(age, *AGE_RANGE), f"età non valida ({AGE_RANGE[0]}-{AGE_RANGE[1]})"),
+            (~sex.isin(PATIENT_SEXES), f"sesso non valido ({', '.join(PATIENT_SEXES)})"),
+        ],
+    )
+
+
+def validate_appointments(raw: pd.DataFrame, patient_ids: set[int]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    patient_id = _integer(raw, "patient_id")
+    specialty = _text(raw, "specialty")
+    day = _date(raw, "date")
+    time_slot = _text(raw, "time_slot")
+    status = _text(raw, "status")
+    status = status.where(status.notna(), STATUS_BOOKED)
+    clean = {
+        "patient_id": patient_id,
+        "specialty": specialty,
+        "date": day,
+        "time_slot": time_slot,
+        "reason": _text(raw, "reason"),
+        "status": status,
+    }
+    return _split(
+        raw,
+        clean,
+        [
+            (~patient_id.isin(patient_ids), "paziente inesistente"),
+            (~specialty.isin(SPECIALTIES), "specialità non valida"),
+            (day.isna(), "data non valida (AAAA-MM-GG)"),
+            (time_slot.notna() & ~time_slot.isin(TIME_SLOTS), "fascia oraria non valida"),
+            (~status.isin(APPOINTMENT_STATUSES), "stato non valido"),
+        ],
+    )
+
+
+def validate_feedbacks(raw: pd.DataFrame, patient_ids: set[int]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    patient_id = _integer(raw, "patient_id")
+    rating = _integer(raw, "rating")
+    touchpoint = _text(raw, "touchpoint")
+    created_on = _date(raw, "created_on")
+    clean = {
+        "patient_id": patient_id,
+        "rating": rating,
+        "comment": _text(raw, "comment"),
+        "touchpoint": touchpoint,
+        "created_on": created_on,
+    }
+    anonymous = _text(raw, "patient_id").isna()  # il paziente è facoltativo
+    return _split(
+        raw,
+        clean,
+        [
+            (~anonymous & ~patient_id.isin(patient_ids), "paziente inesistente"),
+            (~_between(rating, *RATING_RANGE), f"voto non valido ({RATING_RANGE[0]}-{RATING_RANGE[1]})"),
+            (~touchpoint.isin(TOUCHPOINTS), "touchpoint non valido"),
+            (created_on.isna(), "data non valida (AAAA-MM-GG)"),
+        ],
+    )
+
+
+# ====================================================
+# IMPORTAZIONE ED ESPORTAZIONE
+# ====================================================
+
+def import_file(
+    store, table: str, path: str, chunk_size: int = CHUNK_ROWS, rejects_path: str | None = None
+) -> dict:
+    """
+    Importa un file nell'archivio (MemoryStore o SQLiteStore), un blocco per
+    transazione. Restituisce il numero di righe lette, importate e scartate.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Tabella non valida: {table}")
+    counts = {"rows": 0, "imported": 0, "rejected": 0}
+    rejects = ChunkWriter(rejects_path) if rejects_path else None
+    try:
+        for raw in read_chunks(path, chunk_size):
+            raw = raw.reset_index(drop=True)
+            if table == "patients":
+                valid, rejected = validate_patients(raw)
+                store.add_patients(valid)
+            else:
+                # Pazienti citati nel blocco che esistono davvero (una sola query)
+                cited = _integer(raw, "patient_id").dropna().unique()
+                patient_ids = store.existing_patient_ids([int(pid) for pid in cited])
+                if table == "appointments":
+                    valid, rejected = validate_appointments(raw, patient_ids)
+                    # In ordine di (paziente, data) gli indici SQLite crescono quasi in sequenza
+                    store.add_appointments(valid.sort_values(["patient_id", "date"], kind="stable", ignore_index=True))
+                else:
+                    valid, rejected = validate_feedbacks(raw, patient_ids)
+                    store.add_feedbacks(valid)
+            if rejects is not None and len(rejected):
+                # Numero di riga dei dati nel file (1 = prima riga dopo l'intestazione)
+                rejects.write(rejected.assign(riga=rejected.index + counts["rows"] + 1))
+            counts["rows"] += len(raw)
+            counts["imported"] += len(valid)
+            counts["rejected"] += len(rejected)
+    finally:
+        if rejects is not None:
+            rejects.close()
+    return counts
+
+
+def export_file(store, table: str, path: str, chunk_size: int = CHUNK_ROWS) -> int:
+    """Esporta una tabella a blocchi nel formato del file; restituisce le righe scritte."""
+    if table not in TABLES:
+        raise ValueError(f"Tabella non valida: {table}")
+    schema = SCHEMAS[table]
+    fmt = file_format(path)
+    with ChunkWriter(path, arrow_schema(schema) if fmt == "parquet" else None) as writer:
+        for frame in store.iter_frames(table, chunk_size):
+            writer.write(export_frame(frame, schema, fmt))
+        if not writer.rows:
+            # Tabella vuota: il file si crea comunque, con l'intestazione (o lo schema Parquet)
+            writer.write(pd.DataFrame(columns=list(schema)))
+        return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importazione ed esportazione a lotti dell'archivio")
+    parser.add_argument(
+        "--db",
+        default=os.environ.get("BSC_SQLITE_PATH", os.path.join(os.path.dirname(__file__), "bsc_care.db")),
+        help="database SQLite dell'app (default: BSC_SQLITE_PATH)",
+    )
+    parser.add_argument("--chunk", type=int, default=CHUNK_ROWS, help="righe per blocco/transazione")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_imp = sub.add_parser("import", help="importa un file CSV/JSONL/Parquet")
+    p_imp.add_argument("table", choices=TABLES)
+    p_imp.add_argument("file")
+    p_imp.add_argument("--scarti", help="file in cui salvare le righe scartate, con il motivo")
+
+    p_exp = sub.add_parser("export", help="esporta una tabella in CSV/JSONL/Parquet")
+    p_exp.add_argument("table", choices=TABLES)
+    p_exp.add_argument("file")
+
+    args = parser.parse_args(argv)
+    store = SQLiteStore(args.db)
+    start = time.perf_counter()
+    if args.command == "import":
+        counts = import_file(store, args.table, args.file, args.chunk, args.scarti)
+        print(
+            f"{args.file}: {counts['imported']} righe importate, {counts['rejected']} scartate "
+            f"su {counts['rows']} ({time.perf_counter() - start:.1f} s)"
+        )
+    else:
+        rows = export_file(store, args.table, args.file, args.chunk)
+        print(f"{args.file}: {rows} righe esportate ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Serie storiche dei check-in post-procedura.
+
+Ogni check-in è un record a dimensione fissa (array NumPy strutturato) in
+una partizione per paziente: in memoria un buffer che cresce per raddoppio,
+su disco un file `paz<id>.bin` aperto in sola aggiunta. Accanto alla serie
+ogni paziente ha degli indicatori aggiornati ad ogni check-in (andamento del
+dolore su una finestra mobile, giorni consecutivi in giallo/rosso), così la
+dashboard clinica elenca i pazienti in peggioramento senza rileggere la storia.
+"""
+
+import os
+import threading
+from collections import deque
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from triage import CHECKIN_LEVELS
+
+
+# Record di un check-in (16 byte)
+CHECKIN_DTYPE = np.dtype(
+    [
+        ("day", "<i4"),         # data del check-in (ordinale, date.toordinal)
+        ("since_proc", "<i2"),  # giorni dalla procedura
+        ("pain", "i1"),
+        ("breath", "?"),
+        ("fever", "?"),
+        ("level", "i1"),        # indice in CHECKIN_LEVELS (0 = verde)
+        ("_pad", "V6"),
+    ]
+)
+LEVEL_NAMES = tuple(level for _, level, *_ in CHECKIN_LEVELS)
+ALERT_LEVEL = LEVEL_NAMES.index("giallo")  # da giallo in su il giorno conta come "di allerta"
+
+PAIN_WINDOW = 6         # ultimi check-in considerati per l'andamento del dolore
+ALERT_STREAK_DAYS = 2   # giorni consecutivi in giallo/rosso per segnalare il paziente
+PAIN_RISE = 2.0         # aumento medio del dolore (punti) per segnalare il paziente
+INITIAL_CAPACITY = 16
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class CheckinTrend:
+    """Indicatori incrementali di un paziente, aggiornati ad ogni check-in."""
+
+    __slots__ = ("count", "last_day", "last_level", "day_level", "streak_before", "_pain", "_pain_sum")
+
+    def __init__(self):
+        self.count = 0
+        self.last_day = None      # ordinale dell'ultimo giorno con check-in
+        self.last_level = 0       # livello dell'ultimo check-in
+        self.day_level = 0        # livello peggiore dell'ultimo giorno
+        self.streak_before = 0    # giorni di allerta consecutivi fino al giorno precedente
+        self._pain = deque(maxlen=PAIN_WINDOW)
+        self._pain_sum = 0
+
+    def add(self, day: int, pain: int, level: int):
+        if day != self.last_day:
+            # Nuovo giorno: la serie di allerta prosegue solo se i giorni sono contigui
+            contiguous = self.last_day is not None and day == self.last_day + 1
+            self.streak_before = self.alert_streak if contiguous else 0
+            self.last_day = day
+            self.day_level = level
+        else:
+            self.day_level = max(self.day_level, level)
+        self.last_level = level
+        self.count += 1
+        if len(self._pain) == self._pain.maxlen:
+            self._pain_sum -= self._pain[0]
+        self._pain.append(pain)
+        self._pain_sum += pain
+
+    @property
+    def alert_streak(self) -> int:
+        return self.streak_before + 1 if self.day_level >= ALERT_LEVEL else 0
+
+    @property
+    def pain_mean(self) -> float:
+        return self._pain_sum / len(self._pain) if self._pain else 0.0
+
+    @property
+    def pain_trend(self) -> float:
+        """Media della metà recente della finestra meno media della metà precedente."""
+        n = len(self._pain)
+        if n < 2:
+            return 0.0
+        half = n // 2
+        recent = sum(self._pain[i] for i in range(n - half, n))
+        older = self._pain_sum - recent
+        return recent / half - older / (n - half)
+
+    def deteriorating(self, today: int) -> bool:
+        if self.last_day is None or today - self.last_day > 1:
+            return False  # nessun check-in recente: la serie di allerta è interrotta
+        return (
+            self.alert_streak >= ALERT_STREAK_DAYS
+            or self.pain_trend >= PAIN_RISE
+            or self.last_level == len(LEVEL_NAMES) - 1
+        )
+
+    def summary(self) -> dict:
+        return {
+            "checkins": self.count,
+            "last_day": date.fromordinal(self.last_day) if self.last_day else None,
+            "last_level": LEVEL_NAMES[self.last_level],
+            "alert_streak": self.alert_streak,
+            "pain_mean": round(self.pain_mean, 1),
+            "pain_trend": round(self.pain_trend, 1),
+        }
+
+
+class _Series:
+    """Buffer a crescita per raddoppio dei record di un paziente."""
+
+    __slots__ = ("data", "size")
+
+    def __init__(self, data: np.ndarray | None = None):
+        if data is None:
+            data = np.zeros(INITIAL_CAPACITY, dtype=CHECKIN_DTYPE)
+            self.size = 0
+        else:
+            self.size = len(data)
+        self.data = data
+
+    def append(self, record: np.ndarray):
+        if self.size == len(self.data):
+            grown = np.zeros(max(INITIAL_CAPACITY, 2 * self.size), dtype=CHECKIN_DTYPE)
+            grown[: self.size] = self.data[: self.size]
+            self.data = grown
+        self.data[self.size] = record
+        self.size += 1
+
+    def view(self) -> np.ndarray:
+        return self.data[: self.size]
+
+
+class CheckinStore:
+    """Serie dei check-in per paziente (thread-safe), con persistenza opzionale."""
+
+    def __init__(self, root: str | None = None):
+        self.root = root
+        self._lock = threading.Lock()
+        self._series: dict[int, _Series] = {}
+        self._trends: dict[int, CheckinTrend] = {}
+        if root:
+            os.makedirs(root, exist_ok=True)
+            self._load()
+
+    def _partition_path(self, patient_id: int) -> str:
+        return os.path.join(self.root, f"paz{patient_id}.bin")
+
+    def _load(self):
+        # All'avvio le partizioni si rileggono una volta e gli indicatori si ricostruiscono
+        for name in os.listdir(self.root):
+            if not (name.startswith("paz") and name.endswith(".bin")):
+                continue
+            patient_id = int(name[3:-4])
+            data = np.fromfile(os.path.join(self.root, name), dtype=CHECKIN_DTYPE)
+            trend = CheckinTrend()
+            for rec in data:
+                trend.add(int(rec["day"]), int(rec["pain"]), int(rec["level"]))
+            self._series[patient_id] = _Series(data.copy())
+            self._trends[patient_id] = trend
+
+    def add(
+        self,
+        patient_id: int,
+        pain: int,
+        breath: bool,
+        fever: bool,
+        since_proc: int,
+        level: str,
+        day: date | None = None,
+    ) -> dict:
+        """Aggiunge un check-in e restituisce gli indicatori aggiornati del paziente."""
+        day_ord = (day or date.today()).toordinal()
+        record = np.zeros(1, dtype=CHECKIN_DTYPE)
+        record["day"] = day_ord
+        record["since_proc"] = since_proc
+        record["pain"] = pain
+        record["breath"] = breath
+        record["fever"] = fever
+        record["level"] = LEVEL_NAMES.index(level)
+        with self._lock:
+            series = self._series.setdefault(patient_id, _Series())
+            trend = self._trends.setdefault(patient_id, CheckinTrend())
+            series.append(record[0])
+            trend.add(day_ord, pain, int(record["level"][0]))
+            if self.root:
+                with open(self._partition_path(patient_id), "ab") as fh:
+                    fh.write(record.tobytes())
+            return trend.summary()
+
+    def history(self, patient_id: int) -> pd.DataFrame:
+        """Serie del paziente come DataFrame (una riga per check-in, in ordine di arrivo)."""
+        with self._lock:
+            series = self._series.get(patient_id)
+            data = series.view().copy() if series else np.zeros(0, dtype=CHECKIN_DTYPE)
+        return pd.DataFrame(
+            {
+                "data": pd.to_datetime(data["day"].astype("int64") - _EPOCH_ORDINAL, unit="D"),
+                "giorni_dalla_procedura": data["since_proc"],
+                "dolore": data["pain"],
+                "fiato_corto": data["breath"],
+                "febbre": data["fever"],
+                "livello": np.array(LEVEL_NAMES, dtype=object)[data["level"]],
+            }
+        )
+
+    def trend(self, patient_id: int) -> dict | None:
+        with self._lock:
+            trend = self._trends.get(patient_id)
+            return trend.summary() if trend else None
+
+    def deteriorating(self, today: date | None = None) -> list[dict]:
+        """Pazienti in peggioramento, dal più critico (letti dai soli indicatori)."""
+        today_ord = (today or date.today()).toordinal()
+        with self._lock:
+            rows = [
+                {"patient_id": pid, **trend.summary()}
+                for pid, trend in self._trends.items()
+                if trend.deteriorating(today_ord)
+            ]
+        rows.sort(
+            key=lambda r: (LEVEL_NAMES.index(r["last_level"]), r["alert_streak"], r["pain_trend"]),
+            reverse=True,
+        )
+        return rows
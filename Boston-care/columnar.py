@@ -0,0 +1,288 @@
+"""
+Tabelle colonnari in memoria per i record dell'archivio.
+
+Ogni colonna è un array NumPy che cresce per raddoppio (come le serie dei
+check-in): un record costa pochi byte per campo invece di un dict con le sue
+chiavi. Le colonne categoriche (specialità, stato, touchpoint, sesso, ...)
+sono codificate a dizionario: l'array contiene codici interi e il valore
+testuale è memorizzato una volta sola. I filtri sono confronti vettoriali
+sui codici e `to_pandas()` crea un DataFrame che punta agli stessi buffer,
+senza copie (i testi liberi restano oggetti Python).
+
+Le viste restituite (colonne e DataFrame) riflettono le modifiche successive
+in place, ad esempio un cambio di stato: vanno usate in sola lettura e
+subito, non conservate.
+
+Con una colonna chiave (`key="id"`) la tabella tiene anche un indice
+chiave -> riga: gli id possono arrivare fuori ordine o con buchi.
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+
+INITIAL_CAPACITY = 1024
+
+# Tipi di colonna dello schema (oltre ai dtype NumPy numerici)
+DATE = "date"  # datetime64[s]: pandas lo usa senza conversioni
+TEXT = "text"  # oggetti Python (stringhe libere, None)
+CATEGORY = "category"  # codici interi (int8 finché bastano) + dizionario dei valori
+
+NULL_CODE = -1  # categoria assente (None)
+NULL_INT = -1  # intero assente (es. età non indicata)
+
+
+class Dictionary:
+    """Dizionario di una colonna categorica: valore <-> codice."""
+
+    def __init__(self, values: tuple = ()):
+        self.values: list = []
+        self._codes: dict = {}
+        for value in values:
+            self.encode(value)
+
+    def encode(self, value) -> int:
+        if value is None:
+            return NULL_CODE
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value) -> int | None:
+        """Codice di un valore già visto (None se mai inserito: nessuna riga lo contiene)."""
+        return NULL_CODE if value is None else self._codes.get(value)
+
+    def encode_many(self, values) -> np.ndarray:
+        """Codici di un lotto di valori (un solo `encode` per valore distinto)."""
+        local, uniques = pd.factorize(np.asarray(values, dtype=object))
+        codes = np.array([self.encode(value) for value in uniques] + [NULL_CODE], dtype=np.int64)
+        # factorize usa -1 per i mancanti: l'ultimo elemento di `codes` è proprio NULL_CODE
+        return codes[local]
+
+    def decode(self, code: int):
+        return None if code == NULL_CODE else self.values[code]
+
+
+def code_dtype(n_categories: int) -> np.dtype:
+    """Larghezza dei codici che pandas sceglie per `n_categories` (con la stessa to_pandas() non copia)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def to_datetime64(day: date) -> np.datetime64:
+    return np.datetime64(day, "D").astype("datetime64[s]")
+
+
+class ColumnTable:
+    """Tabella a colonne con append, filtri vettoriali ed esportazione zero-copy."""
+
+    def __init__(
+        self,
+        schema: dict[str, str | type],
+        categories: dict[str, tuple] | None = None,
+        key: str | None = None,
+    ):
+        self.schema = dict(schema)
+        self.key = key
+        # Indice = valore della chiave (interi positivi), valore = riga; -1 se assente
+        self._rows_by_key = np.full(INITIAL_CAPACITY if key else 0, -1, dtype=np.int64)
+        self.dictionaries = {
+            name: Dictionary((categories or {}).get(name, ()))
+            for name, kind in self.schema.items()
+            if kind == CATEGORY
+        }
+        self._size = 0
+        self._data = {name: self._empty(kind, INITIAL_CAPACITY) for name, kind in self.schema.items()}
+
+    @staticmethod
+    def _empty(kind, capacity: int) -> np.ndarray:
+        if kind == DATE:
+            return np.zeros(capacity, dtype="datetime64[s]")
+        if kind == TEXT:
+            return np.full(capacity, None, dtype=object)
+        if kind == CATEGORY:
+            return np.full(capacity, NULL_CODE, dtype=np.int8)
+        return np.zeros(capacity, dtype=kind)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def _capacity(self) -> int:
+        return len(next(iter(self._data.values())))
+
+    @property
+    def nbytes(self) -> int:
+        """Byte occupati dai buffer (capacità inclusa, oggetti di testo esclusi)."""
+        return sum(array.nbytes for array in self._data.values())
+
+    # ------------------------------------------------
+    # SCRITTURA
+    # ------------------------------------------------
+
+    def _encode(self, name: str, value):
+        kind = self.schema[name]
+        if kind == CATEGORY:
+            code = self.dictionaries[name].encode(value)
+            self._fit_codes(name)
+            return code
+        if kind == DATE:
+            return to_datetime64(value if isinstance(value, date) else date.fromisoformat(value))
+        if kind != TEXT and value is None:
+            return NULL_INT
+        return value
+
+    def _fit_codes(self, name: str):
+        # Allarga i codici quando il dizionario cresce (vedi `code_dtype`)
+        dtype = code_dtype(len(self.dictionaries[name].values))
+        if dtype != self._data[name].dtype:
+            self._data[name] = self._data[name].astype(dtype)
+
+    def _encode_many(self, name: str, values, n: int) -> np.ndarray:
+        kind = self.schema[name]
+        if values is None:
+            return self._empty(kind, n) if kind in (DATE, TEXT, CATEGORY) else np.full(n, NULL_INT)
+        if kind == CATEGORY:
+            codes = self.dictionaries[name].encode_many(values)
+            self._fit_codes(name)
+            return codes
+        if kind == DATE:
+            return np.asarray(values, dtype="datetime64[s]")
+        if kind == TEXT:
+            return np.asarray(values, dtype=object)
+        return pd.Series(values, copy=False).fillna(NULL_INT).to_numpy(dtype=kind)
+
+    def append(self, row: dict) -> int:
+        """
+        Aggiunge un record (i campi non presenti nello schema sono ignorati) e
+        restituisce la riga. Se un valore non è valido (data, intero fuori
+        range) solleva l'eccezione senza aggiungere la riga: la dimensione
+        cresce solo dopo aver scritto tutte le colonne.
+        """
+        if self._size == self._capacity:
+            self._grow()
+        index = self._size
+        for name in self.schema:
+            value = self._encode(name, row.get(name))
+            self._data[name][index] = value
+        if self.key is not None:
+            self._index_keys(np.array([row[self.key]], dtype=np.int64), index)
+        self._size += 1
+        return index
+
+    def extend(self, columns: dict) -> range:
+        """Aggiunge un lotto di righe da colonne parallele (array o Series) e restituisce le righe."""
+        n = len(next(iter(columns.values())))
+        start = self._size
+        while start + n > self._capacity:
+            self._grow()
+        for name in self.schema:
+            values = self._encode_many(name, columns.get(name), n)
+            self._data[name][start : start + n] = values
+        if self.key is not None and n:
+            self._index_keys(np.asarray(columns[self.key], dtype=np.int64), start)
+        self._size += n
+        return range(start, start + n)
+
+    def _index_keys(self, keys: np.ndarray, first_row: int):
+        top = int(keys.max())
+        if top >= len(self._rows_by_key):
+            grown = np.full(max(2 * len(self._rows_by_key), top + 1), -1, dtype=np.int64)
+            grown[: len(self._rows_by_key)] = self._rows_by_key
+            self._rows_by_key = grown
+        self._rows_by_key[keys] = np.arange(first_row, first_row + len(keys))
+
+    def _grow(self):
+        for name, array in self._data.items():
+            grown = self._empty(self.schema[name], 2 * len(array)).astype(array.dtype)
+            grown[: len(array)] = array
+            self._data[name] = grown
+
+    def set(self, index: int | np.ndarray, name: str, value):
+        """Aggiorna un campo su una riga (o su più righe insieme)."""
+        value = self._encode(name, value)
+        self._data[name][index] = value
+
+    # ------------------------------------------------
+    # LETTURA
+    # ------------------------------------------------
+
+    def row_of(self, key: int) -> int | None:
+        """Riga del record con quella chiave (None se non esiste)."""
+        if 0 <= key < len(self._rows_by_key) and self._rows_by_key[key] >= 0:
+            return int(self._rows_by_key[key])
+        return None
+
+    def rows_of(self, keys) -> np.ndarray:
+        """Righe delle chiavi esistenti, nell'ordine dato (quelle assenti si saltano)."""
+        keys = np.asarray(keys, dtype=np.int64)
+        keys = keys[(keys >= 0) & (keys < len(self._rows_by_key))]
+        rows = self._rows_by_key[keys]
+        return rows[rows >= 0]
+
+    def column(self, name: str) -> np.ndarray:
+        """Vista sulle righe valide (codici per le colonne categoriche)."""
+        return self._data[name][: self._size]
+
+    def equals(self, name: str, value) -> np.ndarray:
+        """Maschera delle righe con `name == value` (confronto sui codici per le categorie)."""
+        if self.schema[name] == CATEGORY:
+            code = self.dictionaries[name].lookup(value)
+            if code is None:
+                return np.zeros(self._size, dtype=bool)
+            return self.column(name) == code
+        if self.schema[name] == DATE:
+            value = to_datetime64(value)
+        return self.column(name) == value
+
+    def _value(self, name: str, index: int):
+        kind = self.schema[name]
+        raw = self._data[name][index]
+        if kind == CATEGORY:
+            return self.dictionaries[name].decode(int(raw))
+        if kind == DATE:
+            return raw.astype("datetime64[D]").item()
+        if kind == TEXT:
+            return raw
+        value = raw.item()
+        return None if value == NULL_INT else value
+
+    def row(self, index: int) -> dict:
+        return {name: self._value(name, index) for name in self.schema}
+
+    def rows(self, indices) -> list[dict]:
+        return [self.row(int(i)) for i in indices]
+
+    def to_pandas(self, indices: np.ndarray | None = None) -> pd.DataFrame:
+        """
+        DataFrame delle righe (tutte, senza copie, se `indices` è None):
+        le categorie diventano `pd.Categorical` sugli stessi codici.
+        """
+        columns = {}
+        for name, kind in self.schema.items():
+            array = self.column(name) if indices is None else self._data[name][indices]
+            if kind == CATEGORY:
+                categories = pd.Index(self.dictionaries[name].values, dtype=object)
+                columns[name] = pd.Categorical.from_codes(array, categories=categories, validate=False)
+            elif kind == TEXT:
+                columns[name] = pd.Series(array, dtype=object, copy=False)
+            else:
+                columns[name] = array
+        return pd.DataFrame(columns, copy=False)
+
+
+def frame_from_rows(rows: list[dict], schema: dict[str, str | type]) -> pd.DataFrame:
+    """DataFrame con gli stessi tipi di `ColumnTable.to_pandas()` da record dict (backend SQLite)."""
+    frame = pd.DataFrame(rows, columns=list(schema))
+    for name, kind in schema.items():
+        if kind == CATEGORY:
+            frame[name] = frame[name].astype("category")
+        elif kind == DATE:
+            frame[name] = pd.to_datetime(frame[name]).astype("datetime64[s]")
+    return frame
@@ -0,0 +1,43 @@
+"""
+Analisi automatica dei referti (demo).
+
+Queste funzioni girano nei worker della coda di lavori (vedi `jobs.py`), mai
+nello script Streamlit: quando verrà collegato un OCR reale, i tempi di
+analisi potranno crescere senza bloccare l'interfaccia.
+"""
+
+import os
+import time
+from datetime import datetime
+
+
+# Durata simulata dell'analisi (sostituire con la chiamata OCR reale)
+SCAN_SECONDS = 1.5
+UPLOAD_SECONDS_PER_MB = 0.5
+
+
+def analyze_scan(patient_id: int | None) -> dict:
+    """Simula la scansione da fotocamera di un referto cartaceo."""
+    time.sleep(SCAN_SECONDS)
+    return {
+        "patient_id": patient_id,
+        "source": "fotocamera",
+        "summary": (
+            "Referto scansionato (demo). I principali dati clinici sono stati "
+            "riconosciuti e associati al profilo paziente."
+        ),
+        "analyzed_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def analyze_upload(patient_id: int | None, file_name: str, size_bytes: int | None) -> dict:
+    """Simula l'estrazione dei dati da un referto caricato (PDF o immagine)."""
+    size_mb = (size_bytes or 0) / (1024 * 1024)
+    time.sleep(min(5.0, 0.2 + size_mb * UPLOAD_SECONDS_PER_MB))
+    ext = os.path.splitext(file_name)[1].lower().replace(".", "").upper() or "FILE"
+    return {
+        "patient_id": patient_id,
+        "source": "upload",
+        "summary": f"{file_name} ({ext}) analizzato (demo): nessun dato reale estratto.",
+        "analyzed_at": datetime.now().isoformat(timespec="seconds"),
+    }
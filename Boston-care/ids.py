@@ -0,0 +1,36 @@
+"""
+Generazione degli id dei record.
+
+Gli id non dipendono più dalla lunghezza delle liste: in memoria vengono da
+un contatore monotono condiviso tra i thread, su SQLite da una tabella di
+sequenze incrementata nella stessa transazione dell'inserimento (vedi
+`sqlite_store.py`), così sessioni e processi concorrenti non ottengono mai lo
+stesso id e un id cancellato non viene riassegnato. Come con le sequenze,
+un inserimento fallito lascia un buco nella numerazione: le tabelle
+colonnari di MemoryStore trovano la riga di un id con un indice dedicato.
+"""
+
+import itertools
+
+
+class IdAllocator:
+    """Contatore monotono di id, sicuro tra thread."""
+
+    def __init__(self, start: int = 1):
+        # next() su itertools.count è un'unica operazione atomica in CPython:
+        # nessun lock nel percorso di inserimento.
+        self._counter = itertools.count(start)
+
+    def next_id(self) -> int:
+        return next(self._counter)
+
+    def next_ids(self, n: int) -> range:
+        """
+        Blocco di `n` id consecutivi per un inserimento a lotti. `list(islice(...))`
+        è una sola chiamata C su itertools.count: in CPython nessun altro thread
+        può prendere un id a metà blocco.
+        """
+        if n <= 0:
+            return range(0)
+        block = list(itertools.islice(self._counter, n))
+        return range(block[0], block[-1] + 1)
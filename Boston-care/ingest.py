@@ -0,0 +1,151 @@
+"""
+Acquisizione dei referti caricati dai pazienti.
+
+Ogni file viene letto a blocchi e scritto su disco in uno storage
+indirizzato per contenuto (percorso = SHA-256), così lo stesso referto
+caricato due volte occupa spazio una sola volta e nessun file viene mai
+tenuto per intero in memoria o in `st.session_state`. Le miniature delle
+immagini sono generate in background dalla coda di lavori.
+"""
+
+import hashlib
+import os
+import tempfile
+from datetime import datetime
+
+from PIL import Image
+
+
+CHUNK_SIZE = 1024 * 1024                  # 1 MB per lettura
+MAX_FILE_BYTES = 20 * 1024 * 1024         # quota per singolo referto
+MAX_PATIENT_BYTES = 200 * 1024 * 1024     # quota totale per paziente
+THUMBNAIL_SIZE = (256, 256)
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+class QuotaExceeded(ValueError):
+    """Il file (o il totale del paziente) supera la quota consentita."""
+
+
+class ReportStorage:
+    """Storage su disco indirizzato per contenuto: <root>/ab/cd/<sha256>."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def thumbnail_path(self, digest: str) -> str:
+        return self.blob_path(digest) + ".thumb.png"
+
+    def store_stream(self, stream, max_bytes: int = MAX_FILE_BYTES, accept=None) -> tuple[str, int, bool]:
+        """
+        Copia lo stream a blocchi calcolando lo SHA-256; interrompe appena
+        supera `max_bytes`. `accept(digest, dimensione)`, se indicata, viene
+        chiamata prima di rendere definitivo il file e può sollevare per
+        scartarlo. Restituisce (digest, dimensione, nuovo_su_disco).
+        """
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise QuotaExceeded(
+                            f"File oltre lo spazio consentito ({max_bytes // (1024 * 1024)} MB)"
+                        )
+                    sha.update(chunk)
+                    out.write(chunk)
+            digest = sha.hexdigest()
+            if accept is not None:
+                accept(digest, size)
+            final_path = self.blob_path(digest)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+                return digest, size, False
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+            return digest, size, True
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def make_thumbnail(source_path: str, thumb_path: str, size: tuple[int, int] = THUMBNAIL_SIZE) -> str:
+    """Miniatura PNG di un'immagine (eseguita nei worker della coda di lavori)."""
+    if os.path.exists(thumb_path):
+        return thumb_path
+    with Image.open(source_path) as img:
+        img.draft("RGB", size)  # decodifica JPEG già ridotta, senza caricare l'originale intero
+        img.thumbnail(size)
+        tmp_path = thumb_path + ".tmp"
+        img.convert("RGB").save(tmp_path, format="PNG")
+    os.replace(tmp_path, thumb_path)
+    return thumb_path
+
+
+def ingest_upload(
+    uploaded_file,
+    patient_id: int | None,
+    storage: ReportStorage,
+    store,
+    job_queue=None,
+    max_file_bytes: int = MAX_FILE_BYTES,
+    max_patient_bytes: int = MAX_PATIENT_BYTES,
+) -> dict:
+    """
+    Archivia un file caricato (UploadedFile o qualunque oggetto con `.name`
+    e `.read(n)`), registra i metadati nell'archivio e accoda la miniatura.
+    Solleva QuotaExceeded se il file o il totale del paziente sono oltre quota;
+    un referto già archiviato per il paziente non consuma quota.
+    """
+    declared = getattr(uploaded_file, "size", None)
+    if declared is not None and declared > max_file_bytes:
+        raise QuotaExceeded(f"File oltre il limite di {max_file_bytes // (1024 * 1024)} MB")
+
+    def check_quota(digest: str, size: int):
+        # Controllo anticipato: evita di scrivere su disco un file già oltre quota.
+        # Quello che conta è in `add_report`, atomico con l'inserimento.
+        if store.report_by_digest(patient_id, digest) is not None:
+            return
+        if store.report_bytes_by_patient(patient_id) + size > max_patient_bytes:
+            raise QuotaExceeded("Spazio referti del paziente esaurito")
+
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+    digest, size, _ = storage.store_stream(uploaded_file, max_bytes=max_file_bytes, accept=check_quota)
+
+    existing = store.report_by_digest(patient_id, digest)
+    if existing is not None:
+        return {**existing, "duplicate": True}
+
+    ext = os.path.splitext(uploaded_file.name)[1].lower()
+    # Due caricamenti identici in parallelo: il secondo riceve la riga del primo.
+    # Caricamenti diversi in parallelo: la quota è ricontrollata insieme all'inserimento
+    report, created = store.add_report(
+        {
+            "patient_id": patient_id,
+            "sha256": digest,
+            "file_name": uploaded_file.name,
+            "content_type": getattr(uploaded_file, "type", None) or "",
+            "size": size,
+            "uploaded_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        max_patient_bytes=max_patient_bytes,
+    )
+    if not created:
+        return {**report, "duplicate": True}
+    if job_queue is not None and ext in IMAGE_EXTENSIONS:
+        job_queue.submit(
+            "thumbnail", make_thumbnail, storage.blob_path(digest), storage.thumbnail_path(digest)
+        )
+    return {**report, "duplicate": False}
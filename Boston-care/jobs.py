@@ -0,0 +1,95 @@
+"""
+Coda di lavori in background (analisi referti, scansioni, ...).
+
+Le pagine inviano un lavoro e ricevono subito un id; l'esecuzione avviene in
+un pool di thread (o di processi, per lavori CPU-bound come l'OCR) e lo stato
+si legge dalla tabella dei lavori, così lo script Streamlit non resta mai
+bloccato in attesa.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class JobQueue:
+    """Pool di esecuzione + tabella dei lavori interrogabile per id."""
+
+    def __init__(self, max_workers: int = 4, use_processes: bool = False, max_history: int = 1000):
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = executor_cls(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, dict] = OrderedDict()
+        self._max_history = max_history
+
+    def submit(self, kind: str, fn, *args, owner: str | None = None, **kwargs) -> str:
+        """Accoda `fn(*args, **kwargs)` e restituisce subito l'id del lavoro."""
+        job_id = uuid.uuid4().hex
+        future = self._executor.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._jobs[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "owner": owner,
+                "submitted_at": time.time(),
+                "finished_at": None,
+                "future": future,
+            }
+            self._prune()
+        future.add_done_callback(lambda _: self._mark_finished(job_id))
+        return job_id
+
+    def _mark_finished(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["finished_at"] = time.time()
+
+    def _prune(self):
+        # Teniamo solo gli ultimi `max_history` lavori conclusi
+        excess = len(self._jobs) - self._max_history
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, job in self._jobs.items() if job["future"].done()][:excess]:
+            del self._jobs[job_id]
+
+    def status(self, job_id: str) -> dict | None:
+        """Istantanea del lavoro: stato, risultato o errore (None se sconosciuto)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        future: Future = job["future"]
+        snapshot = {k: v for k, v in job.items() if k != "future"}
+        snapshot["result"] = None
+        snapshot["error"] = None
+        if future.done():
+            exc = future.exception()
+            if exc is None:
+                snapshot["status"] = JOB_DONE
+                snapshot["result"] = future.result()
+            else:
+                snapshot["status"] = JOB_FAILED
+                snapshot["error"] = str(exc)
+        else:
+            snapshot["status"] = JOB_RUNNING if future.running() else JOB_PENDING
+        return snapshot
+
+    def jobs_for(self, owner: str, kind: str | None = None) -> list[dict]:
+        with self._lock:
+            ids = [
+                jid for jid, job in self._jobs.items()
+                if job["owner"] == owner and (kind is None or job["kind"] == kind)
+            ]
+        return [s for s in (self.status(jid) for jid in ids) if s is not None]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,142 @@
+"""
+Aggregati NPS incrementali per i feedback dei pazienti.
+
+Ogni feedback aggiorna dei contatori (risposte, somma dei voti, promotori,
+detrattori) globali, per touchpoint e per giorno: la sintesi si legge in
+tempo costante, senza ripassare tutta la storia dei feedback. I contatori
+giornalieri permettono le finestre mobili (ultimi 7/30 giorni) usate dalla
+dashboard clinica per i trend.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+PROMOTER_MIN = 9   # voti 9-10
+DETRACTOR_MAX = 6  # voti 0-6
+TREND_WINDOWS = (7, 30)
+TOUCHPOINTS = ("visita", "ricovero", "pronto soccorso", "altro")
+
+
+class NpsAggregate:
+    """Contatori NPS di un gruppo di feedback."""
+
+    __slots__ = ("n", "total", "promoters", "detractors")
+
+    def __init__(self, n: int = 0, total: int = 0, promoters: int = 0, detractors: int = 0):
+        self.n = n
+        self.total = total
+        self.promoters = promoters
+        self.detractors = detractors
+
+    def add(self, rating: int):
+        self.n += 1
+        self.total += rating
+        if rating >= PROMOTER_MIN:
+            self.promoters += 1
+        elif rating <= DETRACTOR_MAX:
+            self.detractors += 1
+
+    def merge(self, other: "NpsAggregate"):
+        self.n += other.n
+        self.total += other.total
+        self.promoters += other.promoters
+        self.detractors += other.detractors
+
+    def summary(self) -> dict:
+        """Stesso formato storico di feedback_summary()."""
+        if not self.n:
+            return {
+                "n_responses": 0,
+                "average_rating": 0.0,
+                "nps": 0.0,
+            }
+        return {
+            "n_responses": self.n,
+            "average_rating": round(self.total / self.n, 2),
+            "nps": round((self.promoters - self.detractors) / self.n * 100, 1),
+        }
+
+
+def nps_counts(ratings, **keys) -> pd.DataFrame:
+    """
+    Contatori NPS (n, total, promoters, detractors) di un lotto di voti,
+    raggruppati per le chiavi indicate (sequenze parallele ai voti).
+    """
+    ratings = np.asarray(ratings, dtype=np.int64)
+    frame = pd.DataFrame(
+        {
+            **keys,
+            "n": 1,
+            "total": ratings,
+            "promoters": (ratings >= PROMOTER_MIN).astype(np.int64),
+            "detractors": (ratings <= DETRACTOR_MAX).astype(np.int64),
+        }
+    )
+    return frame.groupby(list(keys), sort=False, observed=True).sum().reset_index()
+
+
+class FeedbackAggregator:
+    """Aggregato NPS globale, per touchpoint e a finestre temporali."""
+
+    def __init__(self, retention_days: int = max(TREND_WINDOWS)):
+        self.retention_days = retention_days
+        self.overall = NpsAggregate()
+        self.by_touchpoint: dict[str, NpsAggregate] = defaultdict(NpsAggregate)
+        self._daily: dict[date, NpsAggregate] = defaultdict(NpsAggregate)
+        self._latest_day: date | None = None
+
+    def add(self, rating: int, touchpoint: str, day: date):
+        self.overall.add(rating)
+        self.by_touchpoint[touchpoint].add(rating)
+
+        if self._latest_day is None or day > self._latest_day:
+            self._latest_day = day
+            self._prune()
+        if day > self._latest_day - timedelta(days=self.retention_days):
+            self._daily[day].add(rating)
+
+    def add_many(self, ratings, touchpoints, days):
+        """Come `add` per un lotto di feedback: un aggiornamento per touchpoint e per giorno."""
+        if not len(ratings):
+            return
+        for row in nps_counts(ratings, touchpoint=touchpoints).itertuples(index=False):
+            counts = NpsAggregate(int(row.n), int(row.total), int(row.promoters), int(row.detractors))
+            self.overall.merge(counts)
+            self.by_touchpoint[row.touchpoint].merge(counts)
+
+        by_day = nps_counts(ratings, day=pd.to_datetime(days))
+        by_day["day"] = by_day["day"].dt.date
+        latest = by_day["day"].max()
+        if self._latest_day is None or latest > self._latest_day:
+            self._latest_day = latest
+            self._prune()
+        oldest = self._latest_day - timedelta(days=self.retention_days)
+        for row in by_day[by_day["day"] > oldest].itertuples(index=False):
+            self._daily[row.day].merge(
+                NpsAggregate(int(row.n), int(row.total), int(row.promoters), int(row.detractors))
+            )
+
+    def _prune(self):
+        oldest = self._latest_day - timedelta(days=self.retention_days)
+        for day in [d for d in self._daily if d <= oldest]:
+            del self._daily[day]
+
+    def summary(self) -> dict:
+        return self.overall.summary()
+
+    def touchpoint_summary(self) -> dict[str, dict]:
+        return {tp: agg.summary() for tp, agg in self.by_touchpoint.items()}
+
+    def window_summary(self, days: int, today: date | None = None) -> dict:
+        """Sintesi degli ultimi `days` giorni (oggi compreso)."""
+        today = today or date.today()
+        window = NpsAggregate()
+        for offset in range(min(days, self.retention_days)):
+            bucket = self._daily.get(today - timedelta(days=offset))
+            if bucket is not None:
+                window.merge(bucket)
+        return window.summary()
@@ -0,0 +1,285 @@
+"""
+Pagamento delle visite: listino, intenti di pagamento e gateway.
+
+Ogni visita ha un intento di pagamento identificato da una chiave di
+idempotenza (`visita-<id>`): doppi clic e rerun di Streamlit ritrovano lo
+stesso intento invece di crearne un secondo, e la stessa chiave viene passata
+al gateway, che a sua volta non addebita due volte. Gli intenti autorizzati
+vengono regolati a lotti (`settle`) e confrontati con il rendiconto del
+gateway (`reconcile`). `MockGateway` simula il gateway in locale; un gateway
+reale deve solo offrire gli stessi metodi.
+"""
+
+import sqlite3
+import threading
+import uuid
+from datetime import date, datetime
+
+from slots import SPECIALTIES
+
+
+# ====================================================
+# LISTINO
+# ====================================================
+
+DEFAULT_PRICE_CENTS = 6000
+SPECIALTY_PRICES_CENTS = {
+    "Cardiologia": 9000,
+    "Oncologia": 12000,
+    "Prelievo sangue": 3000,
+}
+# Calcolato una volta: specialità -> importo in centesimi
+PRICE_CATALOGUE = {s: SPECIALTY_PRICES_CENTS.get(s, DEFAULT_PRICE_CENTS) for s in SPECIALTIES}
+
+PAYMENT_METHODS = ("Carta di credito", "Bancomat", "Satispay", "App bancaria")
+
+INTENT_CREATED = "creato"
+INTENT_PROCESSING = "in corso"
+INTENT_AUTHORIZED = "autorizzato"
+INTENT_SETTLED = "regolato"
+INTENT_FAILED = "rifiutato"
+
+
+def price_for(specialty: str) -> int:
+    return PRICE_CATALOGUE.get(specialty, DEFAULT_PRICE_CENTS)
+
+
+def format_eur(cents: int) -> str:
+    return f"€ {cents // 100},{cents % 100:02d}"
+
+
+def idempotency_key(appointment_id: int) -> str:
+    return f"visita-{appointment_id}"
+
+
+class PaymentError(RuntimeError):
+    """Il gateway ha rifiutato il pagamento."""
+
+
+# ====================================================
+# GATEWAY SIMULATO
+# ====================================================
+
+class MockGateway:
+    """Gateway locale: autorizza, regola a lotti e fornisce il rendiconto."""
+
+    def __init__(self, decline_methods: tuple[str, ...] = ()):
+        self.decline_methods = decline_methods
+        self._lock = threading.Lock()
+        self._charges: dict[str, dict] = {}  # chiave di idempotenza -> addebito
+
+    def authorize(self, key: str, amount_cents: int, method: str) -> str:
+        """Autorizza l'importo; la stessa chiave restituisce sempre lo stesso addebito."""
+        with self._lock:
+            charge = self._charges.get(key)
+            if charge is None:
+                if method in self.decline_methods:
+                    raise PaymentError(f"Pagamento rifiutato dal circuito ({method}).")
+                charge = {
+                    "ref": "ch_" + uuid.uuid4().hex[:16],
+                    "key": key,
+                    "amount_cents": amount_cents,
+                    "settled_batch": None,
+                }
+                self._charges[key] = charge
+            return charge["ref"]
+
+    def settle_batch(self, refs: list[str]) -> tuple[str, list[str]]:
+        """Regola un lotto di addebiti autorizzati: (id del lotto, riferimenti regolati)."""
+        batch_id = "batch_" + uuid.uuid4().hex[:12]
+        wanted = set(refs)
+        settled = []
+        with self._lock:
+            for charge in self._charges.values():
+                if charge["ref"] in wanted and charge["settled_batch"] is None:
+                    charge["settled_batch"] = batch_id
+                    settled.append(charge["ref"])
+        return batch_id, settled
+
+    def statement(self) -> list[dict]:
+        """Rendiconto degli addebiti (per la riconciliazione)."""
+        with self._lock:
+            return [dict(charge) for charge in self._charges.values()]
+
+
+# ====================================================
+# INTENTI DI PAGAMENTO
+# ====================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payment_intents (
+    id               INTEGER PRIMARY KEY,
+    idempotency_key  TEXT NOT NULL UNIQUE,
+    appointment_id   INTEGER NOT NULL,
+    patient_id       INTEGER,
+    amount_cents     INTEGER NOT NULL,
+    method           TEXT,
+    status           TEXT NOT NULL,
+    gateway_ref      TEXT,
+    error            TEXT,
+    batch_id         TEXT,
+    created_at       TEXT NOT NULL,
+    updated_at       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_payment_intents_status ON payment_intents(status);
+CREATE INDEX IF NOT EXISTS idx_payment_intents_patient ON payment_intents(patient_id);
+"""
+INTENT_COLUMNS = (
+    "id, idempotency_key, appointment_id, patient_id, amount_cents, method, status, "
+    "gateway_ref, error, batch_id, created_at, updated_at"
+)
+SQL_CREATE_INTENT = (
+    "INSERT OR IGNORE INTO payment_intents "
+    "(idempotency_key, appointment_id, patient_id, amount_cents, status, created_at, updated_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SQL_INTENT_BY_KEY = f"SELECT {INTENT_COLUMNS} FROM payment_intents WHERE idempotency_key = ?"
+SQL_INTENTS_BY_PATIENT = f"SELECT {INTENT_COLUMNS} FROM payment_intents WHERE patient_id = ? ORDER BY id"
+SQL_INTENTS_BY_STATUS = f"SELECT {INTENT_COLUMNS} FROM payment_intents WHERE status = ? ORDER BY id LIMIT ?"
+SQL_ALL_INTENTS = f"SELECT {INTENT_COLUMNS} FROM payment_intents WHERE gateway_ref IS NOT NULL"
+# Solo un intento non ancora autorizzato può passare ad "in corso": è il lock di riga
+SQL_CLAIM_INTENT = (
+    "UPDATE payment_intents SET method = ?, status = 'in corso', updated_at = ? "
+    "WHERE idempotency_key = ? AND status IN ('creato', 'rifiutato')"
+)
+SQL_FINISH_INTENT = (
+    "UPDATE payment_intents SET status = ?, gateway_ref = ?, error = ?, updated_at = ? "
+    "WHERE idempotency_key = ?"
+)
+SQL_SETTLE_INTENT = (
+    "UPDATE payment_intents SET status = 'regolato', batch_id = ?, updated_at = ? "
+    "WHERE gateway_ref = ? AND status = 'autorizzato'"
+)
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class PaymentLedger:
+    """Registro degli intenti di pagamento su SQLite (thread-safe, una connessione con lock)."""
+
+    def __init__(self, gateway, path: str = ":memory:"):
+        self.gateway = gateway
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def _intent(self, key: str) -> dict:
+        return dict(self._conn.execute(SQL_INTENT_BY_KEY, (key,)).fetchone())
+
+    def intent(self, appointment_id: int) -> dict | None:
+        """Intento della visita, se già creato (sola lettura)."""
+        with self._lock:
+            row = self._conn.execute(SQL_INTENT_BY_KEY, (idempotency_key(appointment_id),)).fetchone()
+        return dict(row) if row else None
+
+    def intent_for(self, appointment: dict) -> dict:
+        """Intento della visita (creato al primo accesso, poi sempre lo stesso)."""
+        key = idempotency_key(appointment["id"])
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.execute(
+                SQL_CREATE_INTENT,
+                (
+                    key,
+                    appointment["id"],
+                    appointment["patient_id"],
+                    price_for(appointment["specialty"]),
+                    INTENT_CREATED,
+                    now,
+                    now,
+                ),
+            )
+            return self._intent(key)
+
+    def pay(self, appointment: dict, method: str) -> dict:
+        """
+        Autorizza il pagamento della visita una sola volta: se l'intento è già
+        autorizzato (o in corso in un'altra sessione) lo restituisce invariato.
+        """
+        intent = self.intent_for(appointment)
+        key = intent["idempotency_key"]
+        with self._lock, self._conn:
+            claimed = self._conn.execute(SQL_CLAIM_INTENT, (method, _now(), key)).rowcount
+        if not claimed:
+            with self._lock:
+                return self._intent(key)
+        try:
+            ref = self.gateway.authorize(key, intent["amount_cents"], method)
+            result = (INTENT_AUTHORIZED, ref, None)
+        except PaymentError as exc:
+            result = (INTENT_FAILED, None, str(exc))
+        except Exception as exc:
+            # Errore inatteso del gateway: l'intento non resta "in corso" e si può
+            # ritentare (stessa chiave di idempotenza)
+            with self._lock, self._conn:
+                self._conn.execute(SQL_FINISH_INTENT, (INTENT_FAILED, None, repr(exc), _now(), key))
+            raise
+        with self._lock, self._conn:
+            self._conn.execute(SQL_FINISH_INTENT, (*result, _now(), key))
+            return self._intent(key)
+
+    def intents_by_patient(self, patient_id: int) -> dict[int, dict]:
+        with self._lock:
+            rows = self._conn.execute(SQL_INTENTS_BY_PATIENT, (patient_id,)).fetchall()
+        return {row["appointment_id"]: dict(row) for row in rows}
+
+    def settle(self, batch_size: int = 500) -> list[dict]:
+        """Regola a lotti gli intenti autorizzati; un riepilogo per lotto."""
+        batches = []
+        while True:
+            with self._lock:
+                rows = self._conn.execute(SQL_INTENTS_BY_STATUS, (INTENT_AUTHORIZED, batch_size)).fetchall()
+            if not rows:
+                return batches
+            batch_id, settled = self.gateway.settle_batch([row["gateway_ref"] for row in rows])
+            now = _now()
+            with self._lock, self._conn:
+                self._conn.executemany(SQL_SETTLE_INTENT, [(batch_id, now, ref) for ref in settled])
+            amounts = {row["gateway_ref"]: row["amount_cents"] for row in rows}
+            batches.append(
+                {
+                    "batch_id": batch_id,
+                    "count": len(settled),
+                    "amount_cents": sum(amounts[ref] for ref in settled),
+                }
+            )
+            if len(settled) < len(rows):
+                return batches  # addebiti non regolabili: li segnalerà la riconciliazione
+
+    def reconcile(self) -> dict:
+        """Confronta registro e rendiconto del gateway: differenze per riferimento."""
+        charges = {c["ref"]: c for c in self.gateway.statement()}
+        with self._lock:
+            intents = {row["gateway_ref"]: dict(row) for row in self._conn.execute(SQL_ALL_INTENTS)}
+        issues = []
+        for ref, charge in charges.items():
+            intent = intents.get(ref)
+            if intent is None:
+                issues.append({"ref": ref, "problem": "addebito senza intento registrato"})
+            elif intent["amount_cents"] != charge["amount_cents"]:
+                issues.append({"ref": ref, "problem": "importo diverso"})
+            elif (intent["status"] == INTENT_SETTLED) != (charge["settled_batch"] is not None):
+                issues.append({"ref": ref, "problem": "stato di regolamento diverso"})
+        for ref in intents.keys() - charges.keys():
+            issues.append({"ref": ref, "problem": "intento senza addebito sul gateway"})
+        common = charges.keys() & intents.keys()
+        return {
+            "charges": len(charges),
+            "intents": len(intents),
+            "matched": len(common - {issue["ref"] for issue in issues}),
+            "issues": issues,
+        }
+
+
+def payable(appointments: list[dict], today: date | None = None) -> list[dict]:
+    """Visite prenotate da oggi in poi, con l'importo dal listino."""
+    today = today or date.today()
+    return [
+        {**appt, "amount_cents": price_for(appt["specialty"])}
+        for appt in appointments
+        if appt["date"] >= today and appt["status"] == "prenotata"
+    ]
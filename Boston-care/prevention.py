@@ -0,0 +1,145 @@
+"""
+Catalogo precompilato dei piani di prevenzione.
+
+Lo spazio degli input è piccolo e discreto (fascia d'età × sesso ×
+sottoinsieme delle 5 condizioni note): all'import ogni piano viene calcolato
+una volta dalle tabelle di regole e salvato in una tabella indicizzata da
+(fascia, sesso, maschera di bit delle condizioni). La pagina di prevenzione
+legge dal catalogo tramite una funzione memoizzata; le campagne di outreach
+usano `cohort_plans`, che risolve un'intera coorte con un solo passaggio NumPy.
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+# ====================================================
+# TABELLE DI REGOLE
+# ====================================================
+
+# (età limite esclusa, profilo di rischio, raccomandazione, screening); l'ultima fascia è aperta
+AGE_BANDS = (
+    (40, "basso", "Mantieni uno stile di vita attivo e una dieta equilibrata.", None),
+    (
+        60,
+        "moderato",
+        "Controlla regolarmente pressione, colesterolo e glicemia.",
+        "Check-up cardiovascolare ogni 1-2 anni.",
+    ),
+    (
+        None,
+        "elevato",
+        "Programma controlli regolari con il medico di riferimento.",
+        "Controlli cardiologici e metabolici almeno annuali.",
+    ),
+)
+_AGE_LIMITS = [limit for limit, *_ in AGE_BANDS[:-1]]
+
+# Screening per sesso; qualunque altro valore non aggiunge screening specifici
+SEXES = ("F", "M", None)
+SEX_SCREENINGS = {
+    "F": "Valuta uno screening senologico e ginecologico secondo indicazione medica.",
+    "M": "Valuta screening prostato-specifici secondo indicazione medica.",
+}
+
+# Condizioni note, nell'ordine in cui compaiono le raccomandazioni nel piano
+CONDITION_RULES = (
+    ("diabete", "Controlla regolarmente glicemia e programma visita oculistica periodica."),
+    ("ipertensione", "Monitora la pressione e riduci l'apporto di sale."),
+    ("ipercolesterolemia", "Riduci grassi saturi e segui dieta ipolipidica."),
+    ("fumo", "Valuta un programma di cessazione del fumo."),
+    ("obesità", "Consulta nutrizionista e valuta attività fisica regolare."),
+)
+CONDITION_BITS = {name: 1 << i for i, (name, _) in enumerate(CONDITION_RULES)}
+N_MASKS = 1 << len(CONDITION_RULES)
+
+
+class PreventionPlan(NamedTuple):
+    risk_profile: str
+    recommendations: tuple[str, ...]
+    screenings: tuple[str, ...]
+
+
+# ====================================================
+# CATALOGO
+# ====================================================
+
+def _build_plan(band: int, sex: str | None, mask: int) -> PreventionPlan:
+    _, risk_profile, band_rec, band_screening = AGE_BANDS[band]
+    recs = [band_rec]
+    screenings = [band_screening] if band_screening else []
+    if sex in SEX_SCREENINGS:
+        screenings.append(SEX_SCREENINGS[sex])
+    recs += [rec for name, rec in CONDITION_RULES if mask & CONDITION_BITS[name]]
+    return PreventionPlan(risk_profile, tuple(recs), tuple(screenings))
+
+
+def _build_catalogue() -> np.ndarray:
+    # Tabella piatta: indice = (fascia * len(SEXES) + sesso) * N_MASKS + maschera
+    catalogue = np.empty(len(AGE_BANDS) * len(SEXES) * N_MASKS, dtype=object)
+    for band in range(len(AGE_BANDS)):
+        for sex_idx, sex in enumerate(SEXES):
+            for mask in range(N_MASKS):
+                catalogue[(band * len(SEXES) + sex_idx) * N_MASKS + mask] = _build_plan(band, sex, mask)
+    return catalogue
+
+
+CATALOGUE = _build_catalogue()
+
+
+def age_band(age: int) -> int:
+    return bisect_right(_AGE_LIMITS, age)
+
+
+def sex_index(sex: str | None) -> int:
+    return SEXES.index(sex) if sex in SEX_SCREENINGS else len(SEXES) - 1
+
+
+def condition_mask(conditions) -> int:
+    """Elenco di condizioni -> maschera di bit (condizioni sconosciute ignorate)."""
+    mask = 0
+    for name in conditions or ():
+        mask |= CONDITION_BITS.get(name, 0)
+    return mask
+
+
+@lru_cache(maxsize=1024)
+def _lookup(age: int, sex: str | None, mask: int) -> PreventionPlan:
+    return CATALOGUE[(age_band(age) * len(SEXES) + sex_index(sex)) * N_MASKS + mask]
+
+
+def prevention_plan(age: int, sex: str | None, conditions=None) -> PreventionPlan:
+    """Piano per un paziente, letto dal catalogo (memoizzato per età/sesso/condizioni)."""
+    return _lookup(int(age), sex, condition_mask(conditions))
+
+
+# ====================================================
+# MODALITÀ COORTE (CAMPAGNE DI OUTREACH)
+# ====================================================
+
+def cohort_plans(ages, sexes, conditions) -> pd.DataFrame:
+    """
+    Piani per un'intera coorte in un solo passaggio: `ages`, `sexes` e
+    `conditions` (elenchi di condizioni o maschere di bit) sono sequenze
+    parallele. Restituisce profilo di rischio, raccomandazioni e screening.
+    """
+    ages = np.asarray(ages, dtype=np.int64)
+    bands = np.searchsorted(np.asarray(_AGE_LIMITS), ages, side="right")
+    sex_codes = pd.Categorical(list(sexes), categories=[s for s in SEXES if s is not None]).codes
+    sex_codes = np.where(sex_codes < 0, len(SEXES) - 1, sex_codes)
+    if isinstance(conditions, np.ndarray) and conditions.dtype.kind in "iu":
+        masks = conditions
+    else:
+        masks = np.fromiter((condition_mask(c) for c in conditions), dtype=np.int64, count=len(ages))
+    plans = CATALOGUE[(bands * len(SEXES) + sex_codes) * N_MASKS + masks]
+    return pd.DataFrame(
+        {
+            "risk_profile": [p.risk_profile for p in plans],
+            "recommendations": [p.recommendations for p in plans],
+            "screenings": [p.screenings for p in plans],
+        }
+    )
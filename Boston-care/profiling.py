@@ -0,0 +1,264 @@
+"""
+Strumentazione dei rerun: tempo e allocazioni per sezione.
+
+`section("nome")` (context manager) e `@timed()` (decoratore) misurano il
+tempo reale di un blocco e quanti blocchi di memoria alloca
+(`sys.getallocatedblocks`, quasi gratuito); con tracemalloc attivo si
+registrano anche i byte netti allocati. Ogni misura finisce in un ring
+buffer in memoria di processo, etichettata con il rerun di appartenenza
+(`begin_rerun` / `end_rerun` nell'entrypoint), e la pagina amministrativa
+nascosta la legge da lì. `prometheus_text()` e `json_dump()` fanno da
+endpoint di esportazione.
+
+I contatori di memoria sono globali al processo: con più sessioni
+contemporanee le allocazioni di una sezione includono anche quelle degli
+altri thread, quindi vanno lette come stima.
+"""
+
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+PROFILING_ENABLED = os.environ.get("BSC_PROFILING", "1") != "0"
+RING_SIZE = int(os.environ.get("BSC_PROFILING_RING", "20000"))
+RERUN_SECTION = "rerun"
+
+# Una misura: (timestamp, id rerun, pagina, sezione, profondità, ms, blocchi, byte)
+SAMPLE_FIELDS = ("ts", "rerun", "page", "section", "depth", "ms", "blocks", "bytes")
+
+
+class Profiler:
+    """Ring buffer delle misure più contatori cumulativi per sezione (thread-safe)."""
+
+    def __init__(self, size: int = RING_SIZE, enabled: bool = PROFILING_ENABLED):
+        self.enabled = enabled
+        self._samples: deque[tuple] = deque(maxlen=size)
+        self._totals: dict[str, list] = {}  # sezione -> [conteggio, secondi totali]
+        self._lock = threading.Lock()
+        self._rerun_ids = itertools.count(1)
+        self._local = threading.local()  # rerun corrente e pila delle sezioni aperte
+
+    # ------------------------------------------------
+    # MISURA
+    # ------------------------------------------------
+
+    def begin_rerun(self, page: str | None = None):
+        """Apre un rerun: le sezioni misurate da qui in poi, nello stesso thread, gli appartengono."""
+        if not self.enabled:
+            return
+        self._local.rerun = next(self._rerun_ids)
+        self._local.page = page
+        self._local.stack = [self._start(RERUN_SECTION)]
+
+    def set_page(self, page: str):
+        self._local.page = page
+
+    def end_rerun(self):
+        stack = getattr(self._local, "stack", None)
+        if not self.enabled or not stack:
+            return
+        self._finish(stack[0], 0)
+        self._local.stack = []
+        self._local.rerun = None
+
+    @contextmanager
+    def section(self, name: str):
+        """Misura il blocco come sezione `name` (annidabile)."""
+        if not self.enabled:
+            yield
+            return
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        start = self._start(name)
+        stack.append(start)
+        try:
+            yield
+        finally:
+            stack.pop()
+            self._finish(start, len(stack))
+
+    def timed(self, name: str | None = None):
+        """Decoratore: misura ogni chiamata come sezione (default: modulo.funzione)."""
+
+        def decorate(fn):
+            label = name or f"{fn.__module__}.{fn.__name__}"
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.section(label):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def _start(self, name: str) -> tuple:
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        return (name, time.perf_counter(), sys.getallocatedblocks(), traced)
+
+    def _finish(self, start: tuple, depth: int):
+        name, t0, blocks0, traced0 = start
+        elapsed = time.perf_counter() - t0
+        blocks = sys.getallocatedblocks() - blocks0
+        traced = None
+        if traced0 is not None and tracemalloc.is_tracing():
+            traced = tracemalloc.get_traced_memory()[0] - traced0
+        sample = (
+            time.time(),
+            getattr(self._local, "rerun", None),
+            getattr(self._local, "page", None),
+            name,
+            depth,
+            elapsed * 1000.0,
+            blocks,
+            traced,
+        )
+        with self._lock:
+            self._samples.append(sample)
+            total = self._totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += elapsed
+
+    # ------------------------------------------------
+    # TRACEMALLOC
+    # ------------------------------------------------
+
+    @staticmethod
+    def tracing() -> bool:
+        return tracemalloc.is_tracing()
+
+    @staticmethod
+    def set_tracing(on: bool):
+        # tracemalloc rallenta tutto il processo: si accende solo quando serve
+        if on and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not on and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # ------------------------------------------------
+    # LETTURA
+    # ------------------------------------------------
+
+    def samples(self, last: int | None = None) -> list[dict]:
+        with self._lock:
+            rows = list(self._samples)
+        if last is not None:
+            rows = rows[-last:]
+        return [dict(zip(SAMPLE_FIELDS, row)) for row in rows]
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def section_stats(self) -> list[dict]:
+        """Per sezione, sulla finestra del ring buffer: chiamate, media/p50/p95/max ms, blocchi e KB medi."""
+        with self._lock:
+            rows = list(self._samples)
+        by_section: dict[str, list[tuple]] = {}
+        for row in rows:
+            by_section.setdefault(row[3], []).append(row)
+        stats = []
+        for name, items in by_section.items():
+            ms = np.array([row[5] for row in items])
+            traced = [row[7] for row in items if row[7] is not None]
+            stats.append(
+                {
+                    "section": name,
+                    "calls": len(items),
+                    "mean_ms": float(ms.mean()),
+                    "p50_ms": float(np.percentile(ms, 50)),
+                    "p95_ms": float(np.percentile(ms, 95)),
+                    "max_ms": float(ms.max()),
+                    "mean_blocks": float(np.mean([row[6] for row in items])),
+                    "mean_kb": float(np.mean(traced)) / 1024 if traced else None,
+                }
+            )
+        stats.sort(key=lambda row: row["mean_ms"] * row["calls"], reverse=True)
+        return stats
+
+    def page_stats(self) -> list[dict]:
+        """Durata dei rerun completi per pagina (p50/p95/max ms)."""
+        with self._lock:
+            rows = [row for row in self._samples if row[3] == RERUN_SECTION]
+        by_page: dict[str, list[float]] = {}
+        for row in rows:
+            by_page.setdefault(row[2] or "-", []).append(row[5])
+        return sorted(
+            (
+                {
+                    "page": page,
+                    "reruns": len(ms),
+                    "p50_ms": float(np.percentile(ms, 50)),
+                    "p95_ms": float(np.percentile(ms, 95)),
+                    "max_ms": float(np.max(ms)),
+                }
+                for page, ms in by_page.items()
+            ),
+            key=lambda row: row["p95_ms"],
+            reverse=True,
+        )
+
+    def last_rerun(self) -> list[dict]:
+        """Sezioni dell'ultimo rerun concluso, nell'ordine in cui sono terminate."""
+        with self._lock:
+            rows = list(self._samples)
+        closed = [row for row in rows if row[3] == RERUN_SECTION and row[1] is not None]
+        if not closed:
+            return []
+        rerun = closed[-1][1]
+        return [dict(zip(SAMPLE_FIELDS, row)) for row in rows if row[1] == rerun]
+
+    # ------------------------------------------------
+    # ESPORTAZIONE
+    # ------------------------------------------------
+
+    def prometheus_text(self) -> str:
+        """Formato testo Prometheus: summary per sezione (quantili sulla finestra, somme cumulative)."""
+        with self._lock:
+            totals = {name: tuple(total) for name, total in self._totals.items()}
+        quantiles = {row["section"]: row for row in self.section_stats()}
+        lines = [
+            "# HELP bsc_section_seconds Tempo reale per sezione dei rerun Streamlit.",
+            "# TYPE bsc_section_seconds summary",
+        ]
+        for name in sorted(totals):
+            count, seconds = totals[name]
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            stats = quantiles.get(name)
+            if stats:
+                lines.append(f'bsc_section_seconds{{section="{label}",quantile="0.5"}} {stats["p50_ms"] / 1000:.6f}')
+                lines.append(f'bsc_section_seconds{{section="{label}",quantile="0.95"}} {stats["p95_ms"] / 1000:.6f}')
+            lines.append(f'bsc_section_seconds_sum{{section="{label}"}} {seconds:.6f}')
+            lines.append(f'bsc_section_seconds_count{{section="{label}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def json_dump(self, last: int = 1000) -> str:
+        return json.dumps(
+            {
+                "sections": self.section_stats(),
+                "pages": self.page_stats(),
+                "samples": self.samples(last),
+                "tracemalloc": self.tracing(),
+            },
+            ensure_ascii=False,
+        )
+
+
+# Un solo profiler per processo: i moduli lo importano già pronto
+PROFILER = Profiler()
+section = PROFILER.section
+timed = PROFILER.timed
+
+if os.environ.get("BSC_TRACEMALLOC") == "1":
+    Profiler.set_tracing(True)
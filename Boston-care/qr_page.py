@@ -1,8 +1,6 @@
 import streamlit as st
-from io import BytesIO
-import qrcode
-from PIL import Image, ImageDraw
-import os
+
+from assets import get_branded_qr_png
 
 # ====================================================
 # URL DELLA TUA APP PRINCIPALE SU STREAMLIT CLOUD
@@ -67,64 +65,8 @@ st.markdown(
 # GENERAZIONE QR BRANDIZZATO (BLU, "CIRCOLARE", LOGO GRANDE)
 # ====================================================
 
-# 1) QR base con alta correzione di errore
-qr = qrcode.QRCode(
-    version=1,
-    error_correction=qrcode.constants.ERROR_CORRECT_H,
-    box_size=10,
-    border=3,
-)
-qr.add_data(APP_PUBLIC_URL)
-qr.make(fit=True)
-
-# 2) QR blu Boston Scientific
-qr_img = qr.make_image(fill_color="#005c99", back_color="white").convert("RGBA")
-qr_width, qr_height = qr_img.size
-
-# 3) Sfondo circolare bianco dietro al QR (effetto "badge" circolare)
-circle_diameter = qr_width + 60
-bg = Image.new("RGBA", (circle_diameter, circle_diameter), (0, 0, 0, 0))
-
-draw = ImageDraw.Draw(bg)
-draw.ellipse(
-    (0, 0, circle_diameter - 1, circle_diameter - 1),
-    fill=(255, 255, 255, 255)
-)
-
-# Centro il QR sul cerchio
-offset = (
-    (circle_diameter - qr_width) // 2,
-    (circle_diameter - qr_height) // 2,
-)
-bg.paste(qr_img, offset, qr_img)
-
-# 4) Logo Boston Scientific più grande al centro del QR
-try:
-    base_dir = os.path.dirname(__file__)
-    logo_path = os.path.join(base_dir, "bs_logo.png")
-    if os.path.exists(logo_path):
-        logo = Image.open(logo_path).convert("RGBA")
-
-        # Logo ~ 1/3 della larghezza del QR
-        logo_size = qr_width // 3
-        logo = logo.resize((logo_size, logo_size), Image.LANCZOS)
-
-        center_x = circle_diameter // 2
-        center_y = circle_diameter // 2
-        logo_pos = (
-            center_x - logo_size // 2,
-            center_y - logo_size // 2,
-        )
-
-        bg.paste(logo, logo_pos, logo)
-except Exception:
-    # Se qualcosa va storto con il logo, lasciamo solo QR + cerchio bianco
-    pass
-
-# 5) Salvo in buffer per Streamlit
-buf = BytesIO()
-bg.save(buf, format="PNG")
-buf.seek(0)
+# Calcolato una sola volta per URL/colore/dimensione (cache condivisa)
+qr_png = get_branded_qr_png(APP_PUBLIC_URL)
 
 
 # ====================================================
@@ -156,7 +98,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # QR al centro (niente parametri deprecati)
-st.image(buf, width=280)
+st.image(qr_png, width=280)
 
 # Chiudo il contenitore del QR
 st.markdown("</div>", unsafe_allow_html=True)
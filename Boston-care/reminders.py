@@ -0,0 +1,441 @@
+"""
+Promemoria e notifiche legati alle visite prenotate.
+
+I promemoria (SMS il giorno prima, digiuno, farmaci da verificare) entrano
+in una coda a priorità ordinata per scadenza: un thread di smistamento
+attende solo il prossimo in scadenza, li estrae a lotti e li passa ai worker,
+che li inviano tramite un mittente intercambiabile (`FakeSmsSink` in demo).
+Gli invii falliti vengono ritentati con attesa esponenziale. Con un percorso
+SQLite la coda è persistente: i promemoria non ancora inviati vengono
+ricaricati all'avvio. Se più processi condividono il file, gli id li assegna
+SQLite e ogni promemoria viene reclamato (`sending`, con il proprietario)
+prima dell'invio, così lo invia un solo processo; uno rimasto `sending` dopo
+un crash non viene ripreso, per non rischiare un doppio SMS. Nessuna
+operazione scorre l'elenco degli appuntamenti.
+"""
+
+import heapq
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+
+REMINDER_PENDING = "pending"
+REMINDER_SENDING = "sending"
+REMINDER_SENT = "sent"
+REMINDER_FAILED = "failed"
+REMINDER_CANCELLED = "cancelled"
+# Promemoria conclusi tenuti in memoria per lo storico quando non c'è un database
+FINISHED_KEEP = 1000
+
+# Tipi di promemoria della prenotazione: (anticipo rispetto alla visita, testo)
+REMINDER_KINDS = {
+    "sms": (timedelta(days=1), "Promemoria: domani alle {time} visita di {specialty}."),
+    "digiuno": (timedelta(hours=8), "Da ora digiuno fino alla visita di {specialty} delle {time}."),
+    "farmaci": (
+        timedelta(days=3),
+        "Verifica con il medico i farmaci da sospendere prima della visita di {specialty} del {day}.",
+    ),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id              INTEGER PRIMARY KEY,
+    due_at          REAL NOT NULL,
+    patient_id      INTEGER,
+    appointment_id  INTEGER,
+    kind            TEXT NOT NULL,
+    channel         TEXT NOT NULL,
+    recipient       TEXT NOT NULL DEFAULT '',
+    message         TEXT NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    status          TEXT NOT NULL DEFAULT 'pending',
+    last_error      TEXT,
+    sent_at         REAL,
+    owner           TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_status ON reminders(status);
+CREATE INDEX IF NOT EXISTS idx_reminders_patient ON reminders(patient_id);
+"""
+SQL_INSERT_REMINDER = (
+    "INSERT INTO reminders (due_at, patient_id, appointment_id, kind, channel, recipient, message) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?) RETURNING id"
+)
+# Un solo processo vince: il promemoria deve essere ancora in coda e già scaduto
+# (un altro processo può averlo riprogrammato dopo un tentativo fallito)
+SQL_CLAIM_REMINDER = (
+    f"UPDATE reminders SET status = '{REMINDER_SENDING}', owner = ? "
+    f"WHERE id = ? AND status = '{REMINDER_PENDING}' AND due_at <= ?"
+)
+SQL_CANCEL_APPOINTMENT_REMINDERS = (
+    f"UPDATE reminders SET status = '{REMINDER_CANCELLED}' "
+    f"WHERE appointment_id = ? AND status = '{REMINDER_PENDING}'"
+)
+SQL_UPDATE_REMINDER = (
+    "UPDATE reminders SET due_at = ?, attempts = ?, status = ?, last_error = ?, sent_at = ? WHERE id = ?"
+)
+SQL_PENDING_REMINDERS = (
+    "SELECT id, due_at, patient_id, appointment_id, kind, channel, recipient, message, attempts "
+    "FROM reminders WHERE status = 'pending'"
+)
+SQL_REMINDERS_BY_PATIENT = (
+    "SELECT id, due_at, patient_id, appointment_id, kind, channel, recipient, message, attempts, "
+    "status, last_error, sent_at FROM reminders WHERE patient_id = ?"
+)
+
+
+@dataclass(slots=True)
+class Reminder:
+    id: int
+    due_at: float
+    patient_id: int | None
+    appointment_id: int | None
+    kind: str
+    channel: str
+    recipient: str
+    message: str
+    attempts: int = 0
+    status: str = REMINDER_PENDING
+    last_error: str | None = None
+    sent_at: float | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "due_at": datetime.fromtimestamp(self.due_at).strftime("%d/%m/%Y %H:%M"),
+            "kind": self.kind,
+            "channel": self.channel,
+            "status": self.status,
+            "attempts": self.attempts,
+            "message": self.message,
+        }
+
+
+# ====================================================
+# MITTENTI
+# ====================================================
+
+class FakeSmsSink:
+    """
+    Mittente locale per demo e test: registra i messaggi invece di inviarli.
+    `failure_rate` simula errori del gateway per esercitare i tentativi.
+    """
+
+    def __init__(self, failure_rate: float = 0.0, latency: float = 0.0, keep: int = 1000):
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.outbox: deque[tuple[float, str, str, str]] = deque(maxlen=keep)
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+    def send_batch(self, reminders: list[Reminder]) -> list[str | None]:
+        """Un esito per promemoria: None se inviato, altrimenti il messaggio d'errore."""
+        if self.latency:
+            time.sleep(self.latency)
+        results = []
+        with self._lock:
+            for reminder in reminders:
+                if self._rng.random() < self.failure_rate:
+                    results.append("gateway non disponibile (simulato)")
+                    continue
+                self.outbox.append((time.time(), reminder.channel, reminder.recipient, reminder.message))
+                results.append(None)
+        return results
+
+
+# ====================================================
+# SCHEDULER
+# ====================================================
+
+class ReminderScheduler:
+    """Coda a priorità dei promemoria con smistamento a lotti, tentativi e metriche."""
+
+    def __init__(
+        self,
+        sender,
+        path: str | None = None,
+        workers: int = 2,
+        batch_size: int = 200,
+        max_attempts: int = 5,
+        backoff_seconds: float = 30.0,
+    ):
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._cond = threading.Condition()
+        self._heap: list[tuple[float, int]] = []
+        self._reminders: dict[int, Reminder] = {}
+        self._by_patient: dict[int | None, list[int]] = {}
+        self._by_appointment: dict[int | None, list[int]] = {}
+        self._stopping = False
+        self._pending = 0
+        self._metrics = {"scheduled": 0, "sent": 0, "failed": 0, "retries": 0, "batches": 0}
+        self._batch_seconds = 0.0
+        self._recent_sent: deque[tuple[float, int]] = deque()
+        self._finished: deque[Reminder] = deque(maxlen=FINISHED_KEEP)
+
+        self._db = None
+        self._next_id = 1  # solo senza database
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            with self._db:
+                self._db.executescript(SCHEMA)
+                _migrate(self._db)
+            for row in self._db.execute(SQL_PENDING_REMINDERS).fetchall():
+                self._index(Reminder(*row))
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="promemoria")
+        self._dispatcher = threading.Thread(target=self._run, name="promemoria-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def _index(self, reminder: Reminder):
+        self._reminders[reminder.id] = reminder
+        self._by_patient.setdefault(reminder.patient_id, []).append(reminder.id)
+        self._by_appointment.setdefault(reminder.appointment_id, []).append(reminder.id)
+        heapq.heappush(self._heap, (reminder.due_at, reminder.id))
+        self._pending += 1
+
+    def _forget(self, reminder: Reminder):
+        """Toglie dagli indici un promemoria concluso (le voci nell'heap si scartano al pop)."""
+        self._reminders.pop(reminder.id, None)
+        for index, key in ((self._by_patient, reminder.patient_id), (self._by_appointment, reminder.appointment_id)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.remove(reminder.id)
+                if not ids:
+                    del index[key]
+        if self._db is None:
+            self._finished.append(reminder)
+
+    # --- inserimento ---------------------------------------------------------
+
+    def schedule_many(self, items: list[dict]) -> list[int]:
+        """
+        Accoda più promemoria (dict con due_at, patient_id, appointment_id,
+        kind, channel, recipient, message) con un solo accesso al database.
+        """
+        with self._cond:
+            if self._db is not None:
+                # Id assegnati da SQLite: unici anche tra processi che condividono il file
+                with self._db:
+                    ids = [
+                        self._db.execute(
+                            SQL_INSERT_REMINDER,
+                            (item["due_at"], item["patient_id"], item["appointment_id"], item["kind"],
+                             item["channel"], item["recipient"], item["message"]),
+                        ).fetchone()[0]
+                        for item in items
+                    ]
+            else:
+                ids = list(range(self._next_id, self._next_id + len(items)))
+                self._next_id += len(items)
+            reminders = [Reminder(id=rid, **item) for rid, item in zip(ids, items)]
+            for reminder in reminders:
+                self._index(reminder)
+            self._metrics["scheduled"] += len(reminders)
+            self._cond.notify()
+        return [r.id for r in reminders]
+
+    def schedule(self, **item) -> int:
+        return self.schedule_many([item])[0]
+
+    def cancel_appointment(self, appointment_id: int) -> int:
+        """Annulla i promemoria non ancora inviati di un appuntamento (anche se in coda in altri processi)."""
+        with self._cond:
+            cancelled = [
+                self._reminders[rid]
+                for rid in self._by_appointment.get(appointment_id, [])
+                if self._reminders[rid].status == REMINDER_PENDING
+            ]
+            for reminder in cancelled:
+                reminder.status = REMINDER_CANCELLED
+                self._forget(reminder)
+            self._pending -= len(cancelled)
+            if self._db is not None:
+                with self._db:
+                    return self._db.execute(SQL_CANCEL_APPOINTMENT_REMINDERS, (appointment_id,)).rowcount
+        return len(cancelled)
+
+    # --- smistamento ---------------------------------------------------------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    now = time.time()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    self._cond.wait(self._heap[0][0] - now if self._heap else None)
+                if self._stopping:
+                    return
+                batch = self._pop_due(time.time())
+            if batch:
+                self._executor.submit(self._dispatch, batch)
+
+    def _pop_due(self, now: float) -> list[Reminder]:
+        batch = []
+        while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+            due_at, rid = heapq.heappop(self._heap)
+            reminder = self._reminders.get(rid)
+            # voci superate (riprogrammate o annullate) restano nell'heap e si scartano qui
+            if reminder is None or reminder.status != REMINDER_PENDING or reminder.due_at != due_at:
+                continue
+            batch.append(reminder)
+        return batch
+
+    def _claim(self, batch: list[Reminder]) -> list[Reminder]:
+        """
+        Reclama il lotto (sul database condiviso, se c'è): quelli presi da un
+        altro processo si scartano, quelli annullati nel frattempo si saltano.
+        """
+        now = time.time()
+        with self._cond:
+            if self._db is None:
+                claimed = {r.id for r in batch if r.status == REMINDER_PENDING}
+            else:
+                with self._db:
+                    claimed = {
+                        r.id
+                        for r in batch
+                        if r.status == REMINDER_PENDING
+                        and self._db.execute(SQL_CLAIM_REMINDER, (self._owner, r.id, now)).rowcount
+                    }
+            for reminder in batch:
+                if reminder.id in claimed:
+                    reminder.status = REMINDER_SENDING  # non più annullabile
+                elif reminder.status == REMINDER_PENDING:
+                    self._forget(reminder)
+                    self._pending -= 1
+        return [r for r in batch if r.id in claimed]
+
+    def _dispatch(self, batch: list[Reminder]):
+        batch = self._claim(batch)
+        if not batch:
+            return
+        started = time.time()
+        try:
+            results = self.sender.send_batch(batch)
+        except Exception as exc:  # il mittente non deve mai fermare lo scheduler
+            results = [str(exc) or exc.__class__.__name__] * len(batch)
+        finished = time.time()
+        sent = 0
+        with self._cond:
+            for reminder, error in zip(batch, results):
+                reminder.attempts += 1
+                if error is None:
+                    reminder.status = REMINDER_SENT
+                    reminder.sent_at = finished
+                    reminder.last_error = None
+                    self._forget(reminder)
+                    self._pending -= 1
+                    sent += 1
+                elif reminder.attempts >= self.max_attempts:
+                    reminder.status = REMINDER_FAILED
+                    reminder.last_error = error
+                    self._forget(reminder)
+                    self._pending -= 1
+                    self._metrics["failed"] += 1
+                else:
+                    # Di nuovo in coda anche sul database, con la nuova scadenza
+                    reminder.status = REMINDER_PENDING
+                    reminder.last_error = error
+                    reminder.due_at = finished + self.backoff_seconds * 2 ** (reminder.attempts - 1)
+                    heapq.heappush(self._heap, (reminder.due_at, reminder.id))
+                    self._metrics["retries"] += 1
+            self._metrics["sent"] += sent
+            self._metrics["batches"] += 1
+            self._batch_seconds += finished - started
+            self._recent_sent.append((finished, sent))
+            self._persist(batch)
+            self._cond.notify()
+
+    def _persist(self, reminders: list[Reminder]):
+        if self._db is None or not reminders:
+            return
+        with self._db:
+            self._db.executemany(
+                SQL_UPDATE_REMINDER,
+                [(r.due_at, r.attempts, r.status, r.last_error, r.sent_at, r.id) for r in reminders],
+            )
+
+    # --- letture -------------------------------------------------------------
+
+    def reminders_for(self, patient_id: int) -> list[dict]:
+        """Promemoria del paziente, conclusi compresi (dal database, o dagli ultimi tenuti in memoria)."""
+        with self._cond:
+            if self._db is not None:
+                rows = self._db.execute(SQL_REMINDERS_BY_PATIENT, (patient_id,)).fetchall()
+                reminders = [Reminder(*row) for row in rows]
+            else:
+                reminders = [self._reminders[rid] for rid in self._by_patient.get(patient_id, [])]
+                reminders += [r for r in self._finished if r.patient_id == patient_id]
+            return [r.as_dict() for r in sorted(reminders, key=lambda r: r.due_at)]
+
+    def metrics(self, window: float = 60.0) -> dict:
+        """Contatori cumulativi, promemoria in coda e invii al secondo nell'ultima finestra."""
+        now = time.time()
+        with self._cond:
+            while self._recent_sent and self._recent_sent[0][0] < now - window:
+                self._recent_sent.popleft()
+            recent = sum(n for _, n in self._recent_sent)
+            batches = self._metrics["batches"]
+            return {
+                **self._metrics,
+                "pending": self._pending,
+                "sent_per_second": round(recent / window, 2),
+                "avg_batch_ms": round(self._batch_seconds / batches * 1000, 2) if batches else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=wait)
+
+
+def _migrate(db: sqlite3.Connection):
+    # Database creati prima del reclamo dei promemoria tra processi
+    columns = {row[1] for row in db.execute("PRAGMA table_info(reminders)")}
+    if "owner" not in columns:
+        db.execute("ALTER TABLE reminders ADD COLUMN owner TEXT")
+
+
+def booking_reminders(
+    appt: dict,
+    patient: dict | None,
+    kinds: list[str],
+    now: datetime | None = None,
+) -> list[dict]:
+    """Promemoria della prenotazione; quelli con scadenza già passata partono subito."""
+    now = now or datetime.now()
+    start = (appt.get("time_slot") or "08:30").split("–")[0]
+    visit_at = datetime.combine(appt["date"], datetime.strptime(start, "%H:%M").time())
+    phone = (patient or {}).get("phone") or ""
+    items = []
+    for kind in kinds:
+        lead, template = REMINDER_KINDS[kind]
+        due = max(visit_at - lead, now)
+        items.append(
+            {
+                "due_at": due.timestamp(),
+                "patient_id": appt["patient_id"],
+                "appointment_id": appt["id"],
+                "kind": kind,
+                "channel": "sms" if phone else "push",
+                "recipient": phone,
+                "message": template.format(
+                    specialty=appt["specialty"], time=start, day=appt["date"].strftime("%d/%m/%Y")
+                ),
+            }
+        )
+    return items
@@ -0,0 +1,172 @@
+"""
+Indice di ricerca dei referti archiviati (SQLite FTS5).
+
+Indicizza nome esame, struttura/reparto e testo estratto, con i metadati
+(paziente, data, stato) in una tabella con indice su (paziente, data): la
+pagina referti interroga l'indice con ricerca per prefisso, filtro per
+periodo e paginazione, invece di costruire l'elenco completo ad ogni rerun.
+"""
+
+import re
+import sqlite3
+import threading
+from datetime import date
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS report_docs (
+    id          INTEGER PRIMARY KEY,
+    patient_id  INTEGER,
+    exam        TEXT NOT NULL,
+    facility    TEXT NOT NULL DEFAULT '',
+    exam_date   TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT '',
+    file_type   TEXT NOT NULL DEFAULT 'PDF',
+    body        TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_report_docs_patient_date ON report_docs(patient_id, exam_date);
+
+-- Indice "contentless": i testi si leggono da report_docs via rowid.
+-- `owner` contiene il token del paziente, così il filtro per paziente è
+-- un'intersezione di posting list dentro FTS invece di un filtro a valle.
+CREATE VIRTUAL TABLE IF NOT EXISTS report_fts USING fts5(
+    exam, facility, body, owner,
+    content='',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+SQL_INSERT_DOC = (
+    "INSERT INTO report_docs (patient_id, exam, facility, exam_date, status, file_type, body) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SQL_INSERT_FTS = "INSERT INTO report_fts (rowid, exam, facility, body, owner) VALUES (?, ?, ?, ?, ?)"
+SQL_COUNT_PATIENT = "SELECT COUNT(*) FROM report_docs WHERE patient_id IS ?"
+SQL_BEGIN_WRITE = "BEGIN IMMEDIATE"
+DOC_COLUMNS = "d.id, d.patient_id, d.exam, d.facility, d.exam_date, d.status, d.file_type"
+
+# Referti dimostrativi caricati per ogni profilo alla prima consultazione
+DEMO_REPORTS = [
+    {
+        "exam": "ECG di controllo",
+        "facility": "Cardiologia – Ospedale Demo",
+        "exam_date": "2024-11-12",
+        "status": "Referto disponibile",
+        "body": "Ritmo sinusale, frequenza nella norma.",
+    },
+    {
+        "exam": "Rx torace",
+        "facility": "Radiologia – Ospedale Demo",
+        "exam_date": "2024-10-03",
+        "status": "Referto disponibile",
+        "body": "Campi polmonari liberi.",
+    },
+    {
+        "exam": "Analisi sangue completo",
+        "facility": "Laboratorio analisi – Ospedale Demo",
+        "exam_date": "2024-09-18",
+        "status": "Referto disponibile",
+        "body": "Emocromo, glicemia e profilo lipidico.",
+    },
+]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def to_match_query(text: str) -> str:
+    """Testo libero -> query FTS5: ogni parola è un prefisso, tutte obbligatorie."""
+    return " ".join(f'"{token}"*' for token in _TOKEN_RE.findall(text or ""))
+
+
+def _owner_token(patient_id: int | None) -> str:
+    return f"paz{patient_id}" if patient_id is not None else "pazanonimo"
+
+
+class ReportIndex:
+    """Indice FTS5 + metadati dei referti, thread-safe (una connessione con lock)."""
+
+    def __init__(self, path: str = ":memory:"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def add(
+        self,
+        patient_id: int | None,
+        exam: str,
+        exam_date: date | str,
+        facility: str = "",
+        status: str = "",
+        file_type: str = "PDF",
+        body: str = "",
+    ) -> int:
+        with self._lock, self._conn:
+            return self._insert(patient_id, exam, exam_date, facility, status, file_type, body)
+
+    def _insert(
+        self,
+        patient_id: int | None,
+        exam: str,
+        exam_date: date | str,
+        facility: str = "",
+        status: str = "",
+        file_type: str = "PDF",
+        body: str = "",
+    ) -> int:
+        # Da chiamare con il lock e la transazione già aperti
+        day = exam_date.isoformat() if isinstance(exam_date, date) else exam_date
+        cur = self._conn.execute(SQL_INSERT_DOC, (patient_id, exam, facility, day, status, file_type, body))
+        self._conn.execute(SQL_INSERT_FTS, (cur.lastrowid, exam, facility, body, _owner_token(patient_id)))
+        return cur.lastrowid
+
+    def ensure_demo(self, patient_id: int | None):
+        """Carica i referti dimostrativi per il profilo, una sola volta."""
+        with self._lock:
+            # Percorso normale (profilo già popolato): una SELECT, nessun lock di scrittura
+            if self._conn.execute(SQL_COUNT_PATIENT, (patient_id,)).fetchone()[0]:
+                return
+        with self._lock, self._conn:
+            # Nuovo controllo dentro la transazione di scrittura: nemmeno un
+            # altro processo sullo stesso file può inserirli due volte
+            self._conn.execute(SQL_BEGIN_WRITE)
+            if self._conn.execute(SQL_COUNT_PATIENT, (patient_id,)).fetchone()[0]:
+                return
+            for doc in DEMO_REPORTS:
+                self._insert(patient_id, **doc)
+
+    def search(
+        self,
+        patient_id: int | None,
+        text: str = "",
+        date_from: date | None = None,
+        date_to: date | None = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> tuple[list[dict], int]:
+        """Referti del paziente per testo (prefissi) e periodo, dal più recente."""
+        where = ["d.patient_id IS ?"]
+        params: list = [patient_id]
+        match = to_match_query(text)
+        if match:
+            # La sottoquery FTS viene risolta una volta sola (non riga per riga)
+            where.append("d.id IN (SELECT rowid FROM report_fts WHERE report_fts MATCH ?)")
+            params.append(f'owner:"{_owner_token(patient_id)}" AND ({match})')
+        if date_from:
+            where.append("d.exam_date >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            where.append("d.exam_date <= ?")
+            params.append(date_to.isoformat())
+        where_sql = " AND ".join(where)
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM report_docs d WHERE {where_sql}", params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {DOC_COLUMNS} FROM report_docs d WHERE {where_sql} "
+                "ORDER BY d.exam_date DESC, d.id DESC LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+        return [dict(row) for row in rows], total
@@ -0,0 +1,52 @@
+# ====================================================
+# 6) CHATBOT SINTOMI
+# ====================================================
+
+import streamlit as st
+
+from backend import chatbot_triage
+
+
+@st.fragment
+def triage_panel():
+    """Domande e risposta del chatbot, rieseguite senza ridisegnare il resto della pagina."""
+    symptom = st.selectbox(
+        "Che tipo di sintomo senti principalmente?",
+        [
+            "Mal di testa",
+            "Dolore addominale",
+            "Dolore al petto",
+            "Fiato corto",
+            "Febbre",
+            "Stanchezza",
+            "Altro",
+        ],
+    )
+    severity = st.slider("Quanto è intenso (0-10)?", 0, 10, 5)
+    red_flags = st.multiselect(
+        "Hai anche qualcuno di questi sintomi?",
+        ["dolore toracico", "mancanza di respiro", "svenimento", "febbre alta"],
+    )
+    free_text = st.text_area("Descrivi meglio cosa senti (facoltativo)")
+
+    if st.button("Analizza sintomi"):
+        level, message = chatbot_triage(symptom, severity, red_flags, free_text)
+        st.subheader(f"Livello di urgenza stimato (demo): {level}")
+        st.write(message)
+        st.warning(
+            "Questa funzione è solo dimostrativa e NON sostituisce il parere del medico, "
+            "né fornisce indicazioni per diagnosi o terapia."
+        )
+
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">🤖 Chatbot sintomi (demo)</div>', unsafe_allow_html=True)
+
+st.write(
+    "Chatbot dimostrativo per malesseri lievi. "
+    "Non sostituisce il medico e non fornisce indicazioni diagnostiche reali."
+)
+
+triage_panel()
+
+st.markdown('</div>', unsafe_allow_html=True)
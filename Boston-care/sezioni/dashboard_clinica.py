@@ -0,0 +1,153 @@
+# ====================================================
+# 10) DASHBOARD CLINICA
+# ====================================================
+
+import streamlit as st
+
+from backend import (
+    cohort_prevention_plans,
+    deteriorating_patients,
+    feedback_summary,
+    feedback_trends,
+    get_store,
+    patient_rollup,
+)
+from nps import TREND_WINDOWS
+
+# Intestazioni della tabella pazienti
+ROLLUP_COLUMNS = {
+    "id": "ID paziente",
+    "name": "Nome",
+    "upcoming": "Visite future",
+    "past": "Visite passate",
+    "feedback_count": "Feedback registrati",
+}
+
+
+@st.fragment
+def patient_table():
+    """Tabella pazienti: filtro, ordinamento e pagine rieseguono solo la tabella."""
+    st.subheader("Pazienti")
+    colF, colS, colO, colN = st.columns([2, 1.2, 0.8, 0.8])
+    with colF:
+        name_filter = st.text_input("Cerca paziente per nome", key="rollup_filter")
+    with colS:
+        sort_label = st.selectbox("Ordina per", list(ROLLUP_COLUMNS.values()), key="rollup_sort")
+    with colO:
+        descending = st.checkbox("Decrescente", key="rollup_desc")
+    with colN:
+        page_size = st.selectbox("Righe per pagina", [10, 25, 50, 100], index=1, key="rollup_page_size")
+
+    sort_by = next(k for k, v in ROLLUP_COLUMNS.items() if v == sort_label)
+    page_no = int(st.number_input("Pagina", min_value=1, value=1, key="rollup_page"))
+    rows, total_rows = patient_rollup(
+        name_filter, sort_by, descending, (page_no - 1) * page_size, page_size
+    )
+    n_pages = max(1, -(-total_rows // page_size))
+    if page_no > n_pages:
+        # filtro più restrittivo: mostro l'ultima pagina disponibile
+        page_no = n_pages
+        rows, total_rows = patient_rollup(
+            name_filter, sort_by, descending, (page_no - 1) * page_size, page_size
+        )
+
+    if rows:
+        st.table([{ROLLUP_COLUMNS[k]: r[k] for k in ROLLUP_COLUMNS} for r in rows])
+        st.caption(f"Pagina {page_no} di {n_pages} – {total_rows} pazienti trovati.")
+    else:
+        st.write("Nessun dato paziente disponibile per la sintesi.")
+
+
+@st.fragment
+def outreach_panel():
+    """Campagna di prevenzione: piani per tutti i pazienti, calcolati in un solo passaggio."""
+    st.subheader("Campagna di prevenzione")
+    if st.button("Prepara piani di prevenzione per tutti i pazienti"):
+        plans = cohort_prevention_plans()
+        if plans.empty:
+            st.write("Nessun paziente in archivio.")
+            return
+        for col in ("recommendations", "screenings"):
+            plans[col] = plans[col].map("; ".join)
+        st.write(plans["risk_profile"].value_counts().rename("Pazienti").to_frame())
+        st.download_button(
+            "Scarica elenco per l'outreach (CSV)",
+            plans.to_csv(index=False).encode("utf-8"),
+            file_name="campagna_prevenzione.csv",
+            mime="text/csv",
+        )
+
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">🏥 Dashboard clinica (demo)</div>', unsafe_allow_html=True)
+
+st.write(
+    "Vista sintetica pensata per direzione sanitaria e clinici: panoramica pazienti, "
+    "appuntamenti e soddisfazione. I dati sono basati sulle interazioni all’interno di questa demo."
+)
+
+st.write(f"**Pazienti attivi sulla piattaforma (demo):** {get_store().count_patients()}")
+
+fb_sum = feedback_summary()
+colA, colB, colC = st.columns(3)
+with colA:
+    st.metric("Feedback raccolti", fb_sum["n_responses"])
+with colB:
+    st.metric("Rating medio", f"{fb_sum['average_rating']} / 10")
+with colC:
+    st.metric("NPS stimato", fb_sum["nps"])
+
+trends = feedback_trends()
+trend_cols = st.columns(len(TREND_WINDOWS))
+for col, days in zip(trend_cols, TREND_WINDOWS):
+    w = trends["windows"][days]
+    with col:
+        st.metric(
+            f"NPS ultimi {days} giorni",
+            w["nps"],
+            help=f"{w['n_responses']} risposte, rating medio {w['average_rating']} / 10",
+        )
+
+if trends["touchpoints"]:
+    st.subheader("Soddisfazione per touchpoint")
+    st.table(
+        [
+            {
+                "Touchpoint": tp,
+                "Risposte": tp_sum["n_responses"],
+                "Rating medio": tp_sum["average_rating"],
+                "NPS": tp_sum["nps"],
+            }
+            for tp, tp_sum in sorted(trends["touchpoints"].items())
+        ]
+    )
+
+patient_table()
+
+deteriorating = deteriorating_patients()
+st.subheader("Pazienti in peggioramento (check-in post-procedura)")
+if deteriorating:
+    st.table(
+        [
+            {
+                "ID paziente": r["patient_id"],
+                "Nome": r["name"],
+                "Ultimo check-in": r["last_day"].strftime("%d/%m/%Y"),
+                "Ultimo livello": r["last_level"],
+                "Giorni consecutivi in allerta": r["alert_streak"],
+                "Andamento dolore": f"{r['pain_trend']:+.1f}",
+            }
+            for r in deteriorating
+        ]
+    )
+else:
+    st.write("Nessun paziente con check-in in peggioramento.")
+
+outreach_panel()
+
+st.caption(
+    "In una versione enterprise reale, questa dashboard potrebbe integrarsi con il sistema informativo "
+    "ospedaliero (HIS), i registry dei device e i sistemi di business intelligence."
+)
+
+st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,118 @@
+# ====================================================
+# 9) DASHBOARD PAZIENTE
+# ====================================================
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from backend import device_hourly_series, device_summary, patient_summary, simulate_device_data
+from profiling import section
+
+current_patient_id = st.session_state.get("current_patient_id")
+
+
+@st.fragment
+def device_panel(patient_id: int):
+    """Parametri dal dispositivo: medie a 30 giorni dagli aggregati della telemetria."""
+    st.markdown("### 📡 Dati da dispositivo / wearable")
+    device = device_summary(patient_id)
+    if not device["last_ts"]:
+        st.write("Nessuna trasmissione ricevuta dal dispositivo del paziente.")
+        if not st.button("Simula 30 giorni di trasmissioni (demo)"):
+            return
+        simulate_device_data(patient_id)
+        device = device_summary(patient_id)
+
+    metrics = device["metrics"]
+
+    last_sync = datetime.fromtimestamp(device["last_ts"]).strftime("%d/%m/%Y %H:%M")
+    st.write(f"Ultima trasmissione: **{last_sync}**")
+    hr = metrics.get("hr", {})
+    spo2 = metrics.get("spo2", {})
+    episodes = metrics.get("arrhythmia", {}).get("n", 0)
+    colD1, colD2, colD3 = st.columns(3)
+    with colD1:
+        st.metric(
+            "Frequenza cardiaca media",
+            f"{hr['mean']:.0f} bpm" if hr.get("mean") is not None else "–",
+            help=f"min {hr['min']:.0f} – max {hr['max']:.0f} bpm" if hr.get("n") else None,
+        )
+    with colD2:
+        st.metric(
+            "Saturazione O₂",
+            f"{spo2['mean']:.0f} %" if spo2.get("mean") is not None else "–",
+            help=f"minimo {spo2['min']:.0f} %" if spo2.get("n") else None,
+        )
+    with colD3:
+        st.metric(f"Episodi registrati ({device['days']} gg)", f"{episodes} aritmie")
+
+    hourly = device_hourly_series(patient_id, "hr")
+    if hourly:
+        st.line_chart(
+            pd.DataFrame(
+                {
+                    "ora": pd.to_datetime([row[0] for row in hourly], unit="s"),
+                    "FC media (bpm)": [row[2] for row in hourly],
+                }
+            ),
+            x="ora",
+            y="FC media (bpm)",
+        )
+    st.caption(
+        f"Medie e conteggi sugli ultimi {device['days']} giorni, calcolati dagli aggregati "
+        "giornalieri della telemetria ricevuta dal dispositivo."
+    )
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">📊 Dashboard paziente</div>', unsafe_allow_html=True)
+
+if not current_patient_id:
+    st.info("Seleziona o registra un paziente per vedere la dashboard.")
+else:
+    summary = patient_summary(current_patient_id)
+    if summary:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Dati paziente")
+
+            patient = summary["patient"]
+
+            # Creiamo una piccola tabella anagrafica elegante
+            rows = [
+                {"Campo": "ID paziente", "Valore": patient.get("id", "-")},
+                {"Campo": "Nome", "Valore": patient.get("name", "-")},
+                {"Campo": "Email", "Valore": patient.get("email", "-")},
+                {"Campo": "Età", "Valore": patient.get("age", "-")},
+                {"Campo": "Sesso", "Valore": patient.get("sex", "-")},
+                {"Campo": "Telefono", "Valore": patient.get("phone", "-")},
+            ]
+
+            with section("dashboard_paziente.anagrafica"):
+                df_patient = pd.DataFrame(rows)
+                st.table(df_patient)
+
+        with col2:
+            st.subheader("Sintesi relazione")
+            st.metric("Feedback registrati", summary.get("feedback_count", 0))
+            st.write("Appuntamenti futuri:", len(summary.get("upcoming_appointments", [])))
+            st.write("Appuntamenti passati:", len(summary.get("past_appointments", [])))
+
+            device_panel(current_patient_id)
+
+            with section("dashboard_paziente.appuntamenti"):
+                st.subheader("Prossimi appuntamenti")
+                if summary.get("upcoming_appointments"):
+                    st.table(summary["upcoming_appointments"])
+                else:
+                    st.write("Nessun appuntamento prenotato.")
+
+                st.subheader("Appuntamenti passati")
+                past_appts = summary.get("past_appointments", [])
+                if past_appts:
+                    st.table(past_appts)
+                else:
+                    st.write("Nessun appuntamento passato registrato.")
+
+st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,43 @@
+# ====================================================
+# 5) FEEDBACK
+# ====================================================
+
+import streamlit as st
+
+from backend import add_feedback, feedback_summary
+from nps import TOUCHPOINTS
+
+current_patient_id = st.session_state.get("current_patient_id")
+
+
+@st.fragment
+def feedback_panel(patient_id: int | None):
+    """Form feedback + sintesi NPS: l'invio aggiorna solo questo pannello."""
+    with st.form("feedback_form"):
+        rating = st.slider("Quanto consiglieresti l'ospedale ad un amico? (0-10)", 0, 10, 8)
+        touchpoint = st.selectbox("Esperienza a cui si riferisce il feedback", TOUCHPOINTS)
+        comment = st.text_area("Commento (facoltativo)")
+        submit_fb = st.form_submit_button("Invia feedback")
+
+    if submit_fb:
+        add_feedback(
+            patient_id=patient_id,
+            rating=int(rating),
+            comment=comment or None,
+            touchpoint=touchpoint,
+        )
+        st.success("Grazie, il feedback è stato registrato.")
+
+    st.subheader("Sintesi generale soddisfazione")
+    summary_fb = feedback_summary()
+    st.write(f"Numero di risposte: **{summary_fb['n_responses']}**")
+    st.write(f"Rating medio: **{summary_fb['average_rating']} / 10**")
+    st.write(f"NPS stimato: **{summary_fb['nps']}**")
+
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">💬 Feedback del paziente</div>', unsafe_allow_html=True)
+
+feedback_panel(current_patient_id)
+
+st.markdown('</div>', unsafe_allow_html=True)
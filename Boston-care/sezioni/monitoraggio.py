@@ -0,0 +1,56 @@
+# ====================================================
+# 3) MONITORAGGIO PAZIENTE
+# ====================================================
+
+import streamlit as st
+
+from backend import checkin_history, record_checkin
+from checkins import ALERT_STREAK_DAYS
+from triage import checkin_triage
+
+current_patient_id = st.session_state.get("current_patient_id")
+
+
+@st.fragment
+def checkin_panel(patient_id: int):
+    """Check-in post-procedura: "Invia check-in" riesegue solo questo pannello."""
+    col1, col2 = st.columns(2)
+    with col1:
+        days = st.number_input("Giorni dalla procedura", min_value=0, max_value=60, value=1)
+        pain = st.slider("Dolore (0-10)", 0, 10, 3)
+    with col2:
+        breath = st.checkbox("Fiato corto", value=False)
+        fever = st.checkbox("Febbre", value=False)
+    notes = st.text_area("Note aggiuntive (facoltativo)")
+
+    if st.button("Invia check-in"):
+        triage, message, action = checkin_triage(pain, breath, fever, days)
+
+        st.subheader("Risultato triage (demo)")
+        st.write(f"Livello: **{triage}**")
+        st.write(message)
+        st.info(action)
+
+        trend = record_checkin(patient_id, pain, breath, fever, days, triage)
+        if trend["alert_streak"] >= ALERT_STREAK_DAYS:
+            st.warning(
+                f"Da {trend['alert_streak']} giorni consecutivi il check-in è giallo o rosso: "
+                "il caso è segnalato nella dashboard clinica."
+            )
+
+    history = checkin_history(patient_id)
+    if len(history):
+        st.subheader("Andamento dei check-in")
+        st.line_chart(history, x="data", y="dolore")
+        st.caption(f"{len(history)} check-in registrati, ultimo livello: {history['livello'].iloc[-1]}.")
+
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">🩺 Monitoraggio post-visita/intervento</div>', unsafe_allow_html=True)
+
+if not current_patient_id:
+    st.info("Seleziona un paziente per registrare un monitoraggio.")
+else:
+    checkin_panel(current_patient_id)
+
+st.markdown('</div>', unsafe_allow_html=True)
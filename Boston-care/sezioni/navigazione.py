@@ -0,0 +1,39 @@
+# ====================================================
+# 7) NAVIGAZIONE OSPEDALE
+# ====================================================
+
+import streamlit as st
+
+
+@st.fragment
+def directions_panel():
+    """Form indicazioni reparto, rieseguito da solo."""
+    department = st.text_input("Reparto (es: Cardiologia, Ortopedia...)")
+    building = st.text_input("Corpo/Edificio (facoltativo)", value="")
+    floor = st.number_input("Piano (facoltativo, -1 a 10)", min_value=-1, max_value=10, value=2)
+
+    if st.button("Genera indicazioni"):
+        if not department:
+            st.warning("Inserisci almeno il nome del reparto.")
+        else:
+            building_final = building or "Corpo A"
+            floor_final = floor
+            guidance = [
+                "Entra dall'ingresso principale.",
+                f"Segui le indicazioni per il {building_final}.",
+                f"Sali al piano {floor_final}.",
+                f"Cerca la segnaletica per il reparto {department}.",
+            ]
+            st.subheader(f"Reparto: {department}")
+            st.write(f"Edificio: **{building_final}**, piano **{floor_final}**")
+            st.write("Indicazioni:")
+            for step in guidance:
+                st.markdown(f"- {step}")
+
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">🧭 Come arrivare al reparto</div>', unsafe_allow_html=True)
+
+directions_panel()
+
+st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,98 @@
+# ====================================================
+# 11) PAGAMENTI
+# ====================================================
+
+import streamlit as st
+
+from backend import (
+    get_payable_appointments,
+    get_payment_intent,
+    pay_appointment,
+    reconcile_payments,
+    settle_payments,
+)
+from payments import (
+    INTENT_AUTHORIZED,
+    INTENT_FAILED,
+    INTENT_SETTLED,
+    PAYMENT_METHODS,
+    format_eur,
+)
+
+current_patient_id = st.session_state.get("current_patient_id")
+
+
+@st.fragment
+def payment_row(a: dict):
+    """Riga di pagamento di una visita: "Paga ora" riesegue solo questa riga."""
+    st.markdown(f"**ID {a['id']} – {a['specialty']} ({a['date'].strftime('%d/%m/%Y')})**")
+    st.write(f"Importo: **{format_eur(a['amount_cents'])}**")
+
+    # Letto qui e non passato dalla pagina: la riga si riesegue da sola dopo il pagamento
+    intent = get_payment_intent(a["id"])
+    if intent and intent["status"] in (INTENT_AUTHORIZED, INTENT_SETTLED):
+        st.success(f"Visita pagata con {intent['method']} (rif. {intent['gateway_ref']}).")
+        st.markdown("---")
+        return
+
+    metodo = st.selectbox(
+        "Metodo di pagamento",
+        PAYMENT_METHODS,
+        key=f"pay_method_{a['id']}",
+    )
+    if st.button("Paga ora", key=f"pay_btn_{a['id']}"):
+        intent = pay_appointment(a, metodo)
+        if intent["status"] == INTENT_FAILED:
+            st.error(intent["error"])
+        else:
+            st.success(
+                f"Pagamento simulato completato per la visita {a['id']} "
+                f"con {intent['method']} (demo: nessuna transazione reale)."
+            )
+    st.markdown("---")
+
+
+@st.fragment
+def settlement_panel():
+    """Chiusura contabile: regolamento a lotti e riconciliazione con il gateway."""
+    with st.expander("Chiusura contabile (demo)"):
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Regola pagamenti autorizzati"):
+                batches = settle_payments()
+                if batches:
+                    for b in batches:
+                        st.write(f"Lotto {b['batch_id']}: {b['count']} pagamenti, {format_eur(b['amount_cents'])}")
+                else:
+                    st.write("Nessun pagamento da regolare.")
+        with col2:
+            if st.button("Riconcilia con il gateway"):
+                report = reconcile_payments()
+                st.write(f"Addebiti abbinati: {report['matched']} su {report['charges']}")
+                if report["issues"]:
+                    st.table(report["issues"])
+                else:
+                    st.success("Nessuna differenza tra registro e gateway.")
+
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">💳 Pagamento visite</div>', unsafe_allow_html=True)
+
+st.write(
+    "Sezione dimostrativa per il pagamento digitale delle visite. "
+    "I prezzi sono simulati a scopo di esempio."
+)
+
+if not current_patient_id:
+    st.info("Seleziona un paziente per vedere le visite da pagare.")
+else:
+    future_appts = get_payable_appointments(current_patient_id)
+    if not future_appts:
+        st.write("Non ci sono visite future da pagare.")
+    else:
+        for a in future_appts:
+            payment_row(a)
+
+settlement_panel()
+
+st.markdown('</div>', unsafe_allow_html=True)
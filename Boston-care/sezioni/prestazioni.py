@@ -0,0 +1,81 @@
+# ====================================================
+# 12) PRESTAZIONI (ADMIN, NASCOSTA)
+# ====================================================
+
+import pandas as pd
+import streamlit as st
+
+from backend import reminder_scheduler
+from profiling import PROFILER
+
+# Esportazione "endpoint": /admin-prestazioni?formato=prometheus (oppure json)
+export_format = st.query_params.get("formato")
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">⏱️ Prestazioni dei rerun</div>', unsafe_allow_html=True)
+
+if export_format == "prometheus":
+    st.code(PROFILER.prometheus_text(), language="text")
+elif export_format == "json":
+    st.code(PROFILER.json_dump(), language="json")
+elif not PROFILER.enabled:
+    st.info("Strumentazione disattivata (BSC_PROFILING=0).")
+else:
+    st.write(
+        "Tempi e allocazioni per sezione degli ultimi rerun di questo processo "
+        "(ring buffer in memoria, tutte le sessioni)."
+    )
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        tracing = st.toggle(
+            "Conta i byte allocati (tracemalloc, rallenta il processo)",
+            value=PROFILER.tracing(),
+        )
+        if tracing != PROFILER.tracing():
+            PROFILER.set_tracing(tracing)
+    with col2:
+        if st.button("Svuota buffer"):
+            PROFILER.clear()
+
+    st.subheader("Rerun per pagina")
+    pages = PROFILER.page_stats()
+    if pages:
+        st.dataframe(pd.DataFrame(pages).round(2), hide_index=True)
+    else:
+        st.write("Nessun rerun completo registrato.")
+
+    st.subheader("Sezioni (ordinate per tempo totale)")
+    sections = PROFILER.section_stats()
+    if sections:
+        st.dataframe(pd.DataFrame(sections).round(2), hide_index=True)
+
+    with st.expander("Dettaglio dell'ultimo rerun"):
+        last = PROFILER.last_rerun()
+        if last:
+            st.dataframe(
+                pd.DataFrame(last)[["page", "section", "depth", "ms", "blocks", "bytes"]].round(2),
+                hide_index=True,
+            )
+
+    st.subheader("Coda promemoria")
+    st.json(reminder_scheduler().metrics())
+
+    st.subheader("Esportazione")
+    col_p, col_j = st.columns(2)
+    with col_p:
+        st.download_button(
+            "Scarica metriche (Prometheus)",
+            PROFILER.prometheus_text(),
+            file_name="bsc_metrics.prom",
+            mime="text/plain",
+        )
+    with col_j:
+        st.download_button(
+            "Scarica misure (JSON)",
+            PROFILER.json_dump(),
+            file_name="bsc_metrics.json",
+            mime="application/json",
+        )
+
+st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,51 @@
+# ====================================================
+# 4) PREVENZIONE – SOLO CONDIZIONI NOTE
+# ====================================================
+
+import streamlit as st
+
+from backend import generate_prevention_plan
+
+
+@st.fragment
+def prevention_panel():
+    """Selezione condizioni e piano generato, come unità di rerun indipendente."""
+    # ✅ SOLO CONDIZIONI NELLA UI
+    conditions = st.multiselect(
+        "Condizioni note del paziente",
+        ["ipertensione", "diabete", "ipercolesterolemia", "fumo", "obesità"],
+    )
+
+    if st.button("Genera piano di prevenzione"):
+        # ✅ Valori interni di default (non mostrati in UI)
+        default_age = 50
+        default_sex = "Altro"
+
+        risk_profile, recs, screenings = generate_prevention_plan(
+            int(default_age),
+            default_sex,
+            conditions or [],
+        )
+
+        st.subheader(f"Profilo di rischio: **{risk_profile}**")
+        st.write("**Raccomandazioni:**")
+        for r in recs:
+            st.markdown(f"- {r}")
+
+        st.write("**Screening suggeriti:**")
+        for s in screenings:
+            st.markdown(f"- {s}")
+
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">🛡️ Piano di prevenzione personalizzato</div>', unsafe_allow_html=True)
+
+st.write(
+    "In questa sezione puoi selezionare eventuali condizioni note del paziente. "
+    "Il sistema genera un piano di prevenzione basato esclusivamente su queste informazioni "
+    "e su parametri di riferimento standard (età e sesso non vengono richiesti in questa demo)."
+)
+
+prevention_panel()
+
+st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,240 @@
+# ====================================================
+# 8) REFERTI DIGITALI
+# ====================================================
+
+import os
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from backend import (
+    archive_report,
+    get_job_status,
+    get_reports_by_patient,
+    search_reports,
+    submit_report_scan,
+    submit_upload_analysis,
+)
+from ingest import MAX_FILE_BYTES, QuotaExceeded
+from jobs import JOB_PENDING, JOB_RUNNING
+
+JOB_POLL_SECONDS = 1.0
+REPORTS_PAGE_SIZE = 20
+JOB_KIND_LABELS = {"scan": "📷 Scansione", "upload": "📄 Referto caricato"}
+JOB_STATUS_LABELS = {
+    "pending": "In coda",
+    "running": "In analisi...",
+    "done": "Completata",
+    "failed": "Errore",
+}
+
+
+@st.fragment
+def upload_panel():
+    """Caricamento referti: la lista dei file si aggiorna senza rerun della pagina."""
+    st.subheader("Carica referto esistente")
+    uploaded_files = st.file_uploader(
+        "Carica uno o più referti (PDF, JPG, PNG)",
+        type=["pdf", "jpg", "jpeg", "png"],
+        accept_multiple_files=True,
+    )
+
+    if uploaded_files:
+        st.success(f"Hai caricato {len(uploaded_files)} referto/i (demo).")
+
+        # Mostro i file caricati in tabella (nome + tipo + dimensione)
+        rows_upload = []
+        for f in uploaded_files:
+            size_kb = getattr(f, "size", None)
+            if size_kb is not None:
+                size_kb = round(size_kb / 1024, 1)
+                size_str = f"{size_kb} KB"
+            else:
+                size_str = "n.d."
+
+            ext = os.path.splitext(f.name)[1].lower().replace(".", "").upper()
+            if ext == "":
+                ext = "FILE"
+
+            rows_upload.append(
+                {
+                    "Tipo": f"📄 {ext}",
+                    "Nome file": f.name,
+                    "Dimensione": size_str,
+                }
+            )
+
+        if rows_upload:
+            df_upload = pd.DataFrame(rows_upload)
+            st.dataframe(df_upload, use_container_width=True)
+
+        st.info(
+            "I referti archiviati vengono salvati una sola volta (deduplicati per contenuto) "
+            f"fino a {MAX_FILE_BYTES // (1024 * 1024)} MB per file."
+        )
+
+        if st.button("Archivia e analizza referti caricati"):
+            patient_id = st.session_state.get("current_patient_id")
+            for f in uploaded_files:
+                try:
+                    report = archive_report(f, patient_id)
+                except QuotaExceeded as exc:
+                    st.session_state.setdefault("report_errors", []).append(f"{f.name}: {exc}")
+                    continue
+                if not report["duplicate"]:
+                    track_job(
+                        submit_upload_analysis(
+                            patient_id,
+                            f.name,
+                            report["size"],
+                            st.session_state.get("user_email"),
+                        )
+                    )
+            st.rerun()
+
+    for err in st.session_state.pop("report_errors", []):
+        st.warning(f"Referto non archiviato – {err}")
+
+    archived = get_reports_by_patient(st.session_state.get("current_patient_id"))
+    if archived:
+        st.caption(f"Referti archiviati per questo profilo: {len(archived)}")
+
+
+@st.fragment
+def scan_panel():
+    """Scansione da fotocamera (demo), rieseguita da sola."""
+    st.subheader("Scansiona referto (fotocamera)")
+    st.write(
+        "Simulazione della scansione di un referto cartaceo tramite fotocamera "
+        "dello smartphone o tablet."
+    )
+    if st.button("Scansiona referto (demo)"):
+        # L'analisi gira in background: la pagina resta utilizzabile
+        track_job(
+            submit_report_scan(
+                st.session_state.get("current_patient_id"),
+                st.session_state.get("user_email"),
+            )
+        )
+        st.rerun()
+
+
+def track_job(job_id: str):
+    st.session_state.setdefault("report_jobs", []).append(job_id)
+
+
+def render_jobs(job_ids: list[str]) -> bool:
+    """Tabella delle analisi della sessione; True se ce ne sono ancora in corso."""
+    statuses = [s for s in (get_job_status(jid) for jid in job_ids) if s is not None]
+    if not statuses:
+        return False
+    st.subheader("Analisi automatiche dei referti")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Tipo": JOB_KIND_LABELS.get(s["kind"], s["kind"]),
+                    "Stato": JOB_STATUS_LABELS[s["status"]],
+                    "Esito": (s["result"] or {}).get("summary") or s["error"] or "",
+                }
+                for s in reversed(statuses)
+            ]
+        ),
+        use_container_width=True,
+    )
+    st.caption(
+        "Funzionalità dimostrativa: nessuna analisi reale viene eseguita in questa versione."
+    )
+    return any(s["status"] in (JOB_PENDING, JOB_RUNNING) for s in statuses)
+
+
+def jobs_panel():
+    """Stato delle analisi: interroga la coda ogni secondo solo finché qualcosa è in corso."""
+    job_ids = st.session_state.get("report_jobs", [])
+    statuses = [get_job_status(jid) for jid in job_ids]
+    pending = any(s is not None and s["status"] in (JOB_PENDING, JOB_RUNNING) for s in statuses)
+
+    @st.fragment(run_every=JOB_POLL_SECONDS if pending else None)
+    def poll():
+        still_pending = render_jobs(st.session_state.get("report_jobs", []))
+        if pending and not still_pending:
+            # Tutto concluso: un ultimo rerun completo ferma il polling
+            st.rerun()
+
+    poll()
+
+
+@st.fragment
+def archive_panel(patient_id: int | None):
+    """Archivio referti del paziente: ricerca, filtro per periodo e paginazione sull'indice."""
+    st.subheader("Referti presenti in archivio")
+    st.caption(
+        "Referti digitalizzati e collegati al profilo paziente. "
+        "In una versione reale, questi dati verrebbero letti dal sistema informativo ospedaliero."
+    )
+
+    colQ, colD, colP = st.columns([2, 1.5, 0.7])
+    with colQ:
+        text = st.text_input("Cerca per esame, reparto o contenuto", key="report_search")
+    with colD:
+        period = st.date_input("Periodo", value=(), format="DD/MM/YYYY", key="report_period")
+    with colP:
+        page_no = int(st.number_input("Pagina", min_value=1, value=1, key="report_page"))
+
+    date_from = period[0] if len(period) > 0 else None
+    date_to = period[1] if len(period) > 1 else None
+    rows, total = search_reports(
+        patient_id, text, date_from, date_to, (page_no - 1) * REPORTS_PAGE_SIZE, REPORTS_PAGE_SIZE
+    )
+
+    if not rows:
+        st.write("Nessun referto trovato.")
+        return
+
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Tipo": f"📄 {r['file_type']}",
+                    "Esame": r["exam"],
+                    "Struttura / reparto": r["facility"],
+                    "Data": date.fromisoformat(r["exam_date"]).strftime("%d/%m/%Y"),
+                    "Stato referto": r["status"],
+                }
+                for r in rows
+            ]
+        ),
+        use_container_width=True,
+    )
+    n_pages = max(1, -(-total // REPORTS_PAGE_SIZE))
+    st.caption(f"Pagina {min(page_no, n_pages)} di {n_pages} – {total} referti trovati.")
+
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">📄 Referti digitali (demo)</div>', unsafe_allow_html=True)
+
+st.write(
+    "Sezione dimostrativa per la gestione dei referti clinici. "
+    "Il paziente può caricare un referto in PDF o immagine, oppure simulare "
+    "la scansione tramite fotocamera. In questa demo nessun file viene salvato "
+    "su sistemi esterni."
+)
+
+col1, col2 = st.columns(2)
+
+# Colonna sinistra: caricamento file
+with col1:
+    upload_panel()
+
+# Colonna destra: finta scansione da fotocamera
+with col2:
+    scan_panel()
+
+jobs_panel()
+
+# Archivio referti: ricerca nell'indice, una pagina alla volta
+st.markdown("---")
+archive_panel(st.session_state.get("current_patient_id"))
+
+st.markdown('</div>', unsafe_allow_html=True)
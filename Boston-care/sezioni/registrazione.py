@@ -0,0 +1,37 @@
+# ====================================================
+# 1) REGISTRAZIONE PAZIENTE
+# ====================================================
+
+import streamlit as st
+
+from backend import register_patient
+from store import PATIENT_SEXES
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">👤 Nuovo paziente</div>', unsafe_allow_html=True)
+
+login_email = st.session_state.get("user_email")
+st.caption(f"Accesso corrente (SPID/CIE demo): {login_email}")
+
+with st.form("register_patient"):
+    name = st.text_input("Nome e cognome")
+    phone = st.text_input("Numero di telefono (per SMS di notifica)", placeholder="+39...")
+    age = st.number_input("Età", min_value=0, max_value=120, value=40)
+    sex = st.selectbox("Sesso", PATIENT_SEXES)
+    submitted = st.form_submit_button("Registra paziente")
+
+if submitted:
+    if not name:
+        st.warning("Inserisci almeno il nome.")
+    else:
+        patient = register_patient(
+            name=name,
+            email=login_email,
+            age=int(age),
+            sex=sex,
+            phone=phone,
+        )
+        st.success(f"Paziente registrato con ID {patient['id']}.")
+        st.info("Questo profilo è legato all'accesso corrente (email).")
+
+st.markdown('</div>', unsafe_allow_html=True)
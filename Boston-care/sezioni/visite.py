@@ -0,0 +1,164 @@
+# ====================================================
+# 2) VISITE E PRENOTAZIONI
+# ====================================================
+
+import pandas as pd
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from backend import (
+    create_appointment,
+    get_appointments_by_patient,
+    get_patient_by_id,
+    get_reminders_by_patient,
+    schedule_booking_reminders,
+    slot_availability,
+)
+from slots import BOOKING_HORIZON_DAYS, SPECIALTIES, TIME_SLOTS, SlotUnavailable
+
+current_patient_id = st.session_state.get("current_patient_id")
+
+REMINDER_LABELS = {
+    "digiuno": "digiuno pre-esame",
+    "farmaci": "farmaci da verificare",
+    "sms": "SMS promemoria",
+}
+REMINDER_STATUS_LABELS = {
+    "pending": "programmato",
+    "sent": "inviato",
+    "failed": "non recapitato",
+    "cancelled": "annullato",
+}
+
+
+@st.fragment
+def booking_panel(patient_id: int):
+    """Form di prenotazione + elenco visite: la prenotazione riesegue solo questo pannello."""
+    col1, col2 = st.columns(2)
+    with col1:
+        specialty = st.selectbox("Specialità", SPECIALTIES, key="booking_specialty")
+    avail = slot_availability(specialty)
+    open_days = [d for d, n in zip(avail["days"], avail["free_per_day"]) if n]
+    with col2:
+        appt_date = st.date_input(
+            "Data appuntamento (gg/mm/aaaa)",
+            value=open_days[0] if open_days else avail["start"],
+            min_value=avail["days"][0],
+            max_value=avail["days"][-1],
+        )
+        if appt_date:
+            st.caption(f"📅 Data selezionata: {appt_date.strftime('%d/%m/%Y')}")
+
+    with st.expander(f"Disponibilità {specialty} nei prossimi {BOOKING_HORIZON_DAYS} giorni"):
+        st.bar_chart(
+            pd.DataFrame({"Giorno": avail["days"], "Posti liberi": avail["free_per_day"]}),
+            x="Giorno",
+            y="Posti liberi",
+        )
+
+    day_idx = (appt_date - avail["start"]).days
+    free = avail["free"][day_idx]
+    free_slots = [slot for i, slot in enumerate(TIME_SLOTS) if avail["bitmap"][day_idx] >> i & 1]
+
+    with st.form("create_appointment"):
+        if free_slots:
+            time_slot = st.selectbox(
+                "Fascia oraria",
+                free_slots,
+                format_func=lambda slot: f"{slot} ({free[TIME_SLOTS.index(slot)]} posti liberi)",
+            )
+        else:
+            time_slot = None
+            st.warning("Nessuna fascia libera in questa data: scegli un altro giorno.")
+
+        reason = st.text_area("Motivo della visita (facoltativo)")
+
+        st.markdown("#### 🔔 Notifiche di preparazione")
+        fasting = st.checkbox("Promemoria: digiuno 8 ore prima (se pertinente)")
+        prep_drugs = st.checkbox("Promemoria: verifica farmaci da sospendere con il medico")
+        sms_reminder = st.checkbox("Promemoria SMS il giorno prima della visita")
+
+        submit_appt = st.form_submit_button("Prenota visita")
+
+    if submit_appt and time_slot is None:
+        st.error("Seleziona una data con fasce orarie disponibili.")
+    elif submit_appt:
+        try:
+            appt = create_appointment(
+                patient_id=patient_id,
+                specialty=specialty,
+                d=appt_date,
+                time_slot=time_slot,
+                reason=reason or None,
+            )
+        except SlotUnavailable as exc:
+            st.error(str(exc))
+        else:
+            notice = [
+                f"Visita prenotata per il {appt_date.strftime('%d/%m/%Y')} "
+                f"nella fascia {time_slot} (demo).",
+                None,
+            ]
+            kinds = [
+                kind
+                for kind, wanted in (("digiuno", fasting), ("farmaci", prep_drugs), ("sms", sms_reminder))
+                if wanted
+            ]
+            if kinds:
+                schedule_booking_reminders(appt, kinds)
+                notice[1] = (
+                    "Promemoria programmati: "
+                    + ", ".join(REMINDER_LABELS[kind] for kind in kinds)
+                    + " (demo: i messaggi vengono registrati da un mittente simulato)."
+                )
+            # Disponibilità ricalcolata: la fascia appena occupata non resta proposta
+            st.session_state["booking_notice"] = notice
+            try:
+                st.rerun(scope="fragment")
+            except StreamlitAPIException:
+                st.rerun()  # pannello eseguito nel run completo della pagina, non come frammento
+
+    notice = st.session_state.pop("booking_notice", None)
+    if notice:
+        st.success(notice[0])
+        if notice[1]:
+            st.info(notice[1])
+
+    reminders = get_reminders_by_patient(patient_id)
+    if reminders:
+        st.subheader("Promemoria del paziente")
+        st.table(
+            [
+                {
+                    "Quando": r["due_at"],
+                    "Tipo": REMINDER_LABELS[r["kind"]],
+                    "Canale": r["channel"].upper(),
+                    "Stato": REMINDER_STATUS_LABELS.get(r["status"], r["status"]),
+                }
+                for r in reminders
+            ]
+        )
+
+    st.subheader("Tutte le visite del paziente")
+    appts = get_appointments_by_patient(patient_id)
+    if appts:
+        st.table(appts)
+    else:
+        st.write("Nessuna visita ancora registrata.")
+
+
+st.markdown('<div class="bs-card">', unsafe_allow_html=True)
+st.markdown('<div class="bs-section-title">📅 Prenotazione visite</div>', unsafe_allow_html=True)
+st.write("Prenota una visita, scegli data e fascia oraria e configura le notifiche di preparazione.")
+
+
+
+if not current_patient_id:
+    st.info("Seleziona o registra un paziente per prenotare una visita.")
+else:
+    current_patient = get_patient_by_id(current_patient_id)
+    patient_name = current_patient["name"] if current_patient else "Gentile paziente"
+
+    booking_panel(current_patient_id)
+
+st.markdown('</div>', unsafe_allow_html=True)
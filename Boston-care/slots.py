@@ -0,0 +1,145 @@
+"""
+Disponibilità delle visite per specialità, giorno e fascia oraria.
+
+Ogni (specialità, giorno, fascia) ha una capienza; la prenotazione controlla
+e consuma un posto in modo atomico (lock in memoria, transazione su SQLite),
+quindi due sessioni non possono occupare lo stesso ultimo posto. I posti
+occupati sono contatori NumPy per giorno sull'orizzonte di prenotazione
+(90 giorni): la disponibilità dell'intero orizzonte si calcola con poche
+operazioni vettoriali, insieme a una bitmap per giorno delle fasce libere.
+"""
+
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+
+SPECIALTIES = (
+    "Cardiologia",
+    "Ortopedia",
+    "Neurologia",
+    "Medicina generale",
+    "Oncologia",
+    "Prelievo sangue",
+    "Ecografia addome",
+    "Altro",
+)
+TIME_SLOTS = (
+    "08:30–09:30",
+    "09:30–10:30",
+    "10:30–11:30",
+    "11:30–12:30",
+    "14:00–15:00",
+    "15:00–16:00",
+    "16:00–17:00",
+)
+BOOKING_HORIZON_DAYS = 90
+
+# Posti per fascia oraria (ambulatori aperti dal lunedì al sabato)
+DEFAULT_CAPACITY = 3
+SPECIALTY_CAPACITY = {
+    "Medicina generale": 6,
+    "Prelievo sangue": 12,
+}
+CLOSED_WEEKDAYS = (6,)  # domenica
+
+
+class SlotUnavailable(ValueError):
+    """Fascia oraria piena, chiusa o fuori dall'orizzonte di prenotazione."""
+
+
+def slot_index(time_slot: str) -> int:
+    try:
+        return TIME_SLOTS.index(time_slot)
+    except ValueError:
+        raise SlotUnavailable(f"Fascia oraria non valida: {time_slot}") from None
+
+
+def capacity_grid(specialty: str, start: date, days: int) -> np.ndarray:
+    """Capienza (giorni × fasce) per la specialità a partire da `start`."""
+    per_slot = SPECIALTY_CAPACITY.get(specialty, DEFAULT_CAPACITY)
+    weekdays = (start.weekday() + np.arange(days)) % 7
+    open_days = ~np.isin(weekdays, CLOSED_WEEKDAYS)
+    return np.outer(open_days, np.full(len(TIME_SLOTS), per_slot)).astype(np.int32)
+
+
+def check_bookable(specialty: str, day: date, time_slot: str, today: date | None = None) -> int:
+    """Valida la richiesta e restituisce la capienza della fascia (solleva SlotUnavailable)."""
+    today = today or date.today()
+    if specialty not in SPECIALTIES:
+        raise SlotUnavailable(f"Specialità non prenotabile: {specialty}")
+    if not today <= day < today + timedelta(days=BOOKING_HORIZON_DAYS):
+        raise SlotUnavailable(
+            f"Si può prenotare da oggi a {BOOKING_HORIZON_DAYS} giorni: "
+            f"{day.strftime('%d/%m/%Y')} non è disponibile."
+        )
+    capacity = int(capacity_grid(specialty, day, 1)[0, slot_index(time_slot)])
+    if not capacity:
+        raise SlotUnavailable(f"Ambulatorio chiuso il {day.strftime('%d/%m/%Y')}.")
+    return capacity
+
+
+def availability(capacity: np.ndarray, booked: np.ndarray, start: date) -> dict:
+    """
+    Posti liberi (giorni × fasce), totale libero per giorno e bitmap delle
+    fasce libere (bit i = TIME_SLOTS[i] con almeno un posto).
+    """
+    free = np.maximum(capacity - booked, 0)
+    bitmap = (free > 0).astype(np.int64) @ (1 << np.arange(len(TIME_SLOTS), dtype=np.int64))
+    return {
+        "start": start,
+        "days": [start + timedelta(days=i) for i in range(len(free))],
+        "free": free,
+        "free_per_day": free.sum(axis=1),
+        "bitmap": bitmap,
+    }
+
+
+class SlotInventory:
+    """Posti occupati in memoria: una matrice (giorni × fasce) per specialità, con lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._origin = date.today()
+        self._booked: dict[str, np.ndarray] = {}
+
+    def _offset(self, day: date) -> int:
+        return (day - self._origin).days
+
+    def _counters(self, specialty: str, upto: int) -> np.ndarray:
+        # La matrice cresce quando l'orizzonte avanza oltre la data d'origine
+        booked = self._booked.get(specialty)
+        if booked is None or len(booked) < upto:
+            grown = np.zeros((max(upto, BOOKING_HORIZON_DAYS), len(TIME_SLOTS)), dtype=np.int32)
+            if booked is not None:
+                grown[: len(booked)] = booked
+            self._booked[specialty] = booked = grown
+        return booked
+
+    def book(self, specialty: str, day: date, time_slot: str):
+        """Controlla e consuma un posto in modo atomico (solleva SlotUnavailable se pieno)."""
+        capacity = check_bookable(specialty, day, time_slot)
+        band = slot_index(time_slot)
+        offset = self._offset(day)
+        with self._lock:
+            booked = self._counters(specialty, offset + 1)
+            if booked[offset, band] >= capacity:
+                raise SlotUnavailable(
+                    f"Fascia {time_slot} del {day.strftime('%d/%m/%Y')} al completo per {specialty}."
+                )
+            booked[offset, band] += 1
+
+    def release(self, specialty: str, day: date, time_slot: str):
+        offset = self._offset(day)
+        with self._lock:
+            booked = self._booked.get(specialty)
+            if booked is not None and 0 <= offset < len(booked):
+                band = slot_index(time_slot)
+                booked[offset, band] = max(0, booked[offset, band] - 1)
+
+    def availability(self, specialty: str, start: date, days: int = BOOKING_HORIZON_DAYS) -> dict:
+        offset = self._offset(start)
+        with self._lock:
+            booked = self._counters(specialty, offset + days)[offset : offset + days].copy()
+        return availability(capacity_grid(specialty, start, days), booked, start)
@@ -0,0 +1,636 @@
+"""
+Archivio persistente su SQLite per pazienti, appuntamenti e feedback.
+
+Espone gli stessi metodi di `store.MemoryStore`, così l'app può passare dal
+"database" in memoria a un file SQLite condiviso tra sessioni e repliche
+senza cambiare le funzioni di backend. Il database lavora in modalità WAL
+(letture concorrenti mentre un'altra sessione scrive) e le connessioni sono
+riutilizzate da un piccolo pool.
+"""
+
+import json
+import queue
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from appointments import APPOINTMENT_SCHEMA, STATUS_BOOKED, STATUS_COMPLETED, Appointment
+from columnar import frame_from_rows
+from ingest import QuotaExceeded
+from nps import DETRACTOR_MAX, PROMOTER_MIN, NpsAggregate, nps_counts
+from slots import (
+    BOOKING_HORIZON_DAYS,
+    TIME_SLOTS,
+    SlotUnavailable,
+    availability,
+    capacity_grid,
+    check_bookable,
+)
+from store import FEEDBACK_SCHEMA, PATIENT_SCHEMA, ROLLUP_SORT_KEYS
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    id      INTEGER PRIMARY KEY,
+    name    TEXT NOT NULL,
+    email   TEXT NOT NULL DEFAULT '',
+    age     INTEGER,
+    sex     TEXT,
+    phone   TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_patients_email ON patients(email);
+
+CREATE TABLE IF NOT EXISTS appointments (
+    id          INTEGER PRIMARY KEY,
+    patient_id  INTEGER NOT NULL REFERENCES patients(id),
+    specialty   TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    reason      TEXT,
+    status      TEXT NOT NULL DEFAULT 'prenotata',
+    time_slot   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments(patient_id, status);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient_date ON appointments(patient_id, date);
+CREATE INDEX IF NOT EXISTS idx_appointments_status_date ON appointments(status, date);
+
+-- Posti occupati per specialità/giorno/fascia: la prenotazione li incrementa
+-- nella stessa transazione dell'appuntamento, solo se sotto la capienza.
+CREATE TABLE IF NOT EXISTS slot_usage (
+    specialty   TEXT NOT NULL,
+    day         TEXT NOT NULL,
+    time_slot   TEXT NOT NULL,
+    booked      INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (specialty, day, time_slot)
+);
+
+CREATE TABLE IF NOT EXISTS feedbacks (
+    id          INTEGER PRIMARY KEY,
+    patient_id  INTEGER,
+    rating      INTEGER NOT NULL,
+    comment     TEXT,
+    touchpoint  TEXT NOT NULL,
+    created_on  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feedbacks_patient ON feedbacks(patient_id);
+
+CREATE TABLE IF NOT EXISTS reports (
+    id            INTEGER PRIMARY KEY,
+    patient_id    INTEGER,
+    sha256        TEXT NOT NULL,
+    file_name     TEXT NOT NULL,
+    content_type  TEXT NOT NULL DEFAULT '',
+    size          INTEGER NOT NULL,
+    uploaded_at   TEXT NOT NULL,
+    UNIQUE (patient_id, sha256)
+);
+CREATE INDEX IF NOT EXISTS idx_reports_patient ON reports(patient_id);
+
+-- Sequenze degli id: incrementate nella transazione dell'inserimento, quindi
+-- monotone tra processi e mai riassegnate dopo una cancellazione.
+CREATE TABLE IF NOT EXISTS sequences (
+    name   TEXT PRIMARY KEY,
+    value  INTEGER NOT NULL
+);
+
+-- Contatori NPS per giorno e touchpoint, aggiornati insieme a ogni feedback:
+-- le sintesi sommano poche righe invece di rileggere tutti i feedback.
+CREATE TABLE IF NOT EXISTS feedback_daily (
+    day         TEXT NOT NULL,
+    touchpoint  TEXT NOT NULL,
+    n           INTEGER NOT NULL DEFAULT 0,
+    total       INTEGER NOT NULL DEFAULT 0,
+    promoters   INTEGER NOT NULL DEFAULT 0,
+    detractors  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, touchpoint)
+);
+"""
+
+# Query costanti: sqlite3 mantiene una cache di statement preparati per
+# connessione, quindi testo identico = nessun nuovo parsing.
+SQL_INSERT_PATIENT = "INSERT INTO patients (id, name, email, age, sex, phone) VALUES (?, ?, ?, ?, ?, ?)"
+SQL_PATIENT_BY_ID = "SELECT id, name, email, age, sex, phone FROM patients WHERE id = ?"
+SQL_PATIENTS_BY_EMAIL = "SELECT id, name, email, age, sex, phone FROM patients WHERE email = ? ORDER BY id"
+SQL_ALL_PATIENTS = "SELECT id, name, email, age, sex, phone FROM patients ORDER BY id"
+SQL_COUNT_PATIENTS = "SELECT COUNT(*) AS n FROM patients"
+# Lista di id passata come un unico parametro JSON: testo costante per ogni lotto
+SQL_EXISTING_PATIENT_IDS = "SELECT id FROM patients WHERE id IN (SELECT value FROM json_each(?))"
+
+SQL_INSERT_APPOINTMENT = (
+    "INSERT INTO appointments (id, patient_id, specialty, date, reason, status, time_slot) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+APPOINTMENT_COLUMNS = "id, patient_id, specialty, date, reason, status, time_slot"
+SQL_APPOINTMENT_BY_ID = f"SELECT {APPOINTMENT_COLUMNS} FROM appointments WHERE id = ?"
+SQL_ALL_APPOINTMENTS = f"SELECT {APPOINTMENT_COLUMNS} FROM appointments ORDER BY id"
+SQL_APPOINTMENTS_BY_PATIENT = (
+    f"SELECT {APPOINTMENT_COLUMNS} FROM appointments WHERE patient_id = ? ORDER BY date, id"
+)
+SQL_APPOINTMENTS_BY_STATUS = f"SELECT {APPOINTMENT_COLUMNS} FROM appointments WHERE status = ? ORDER BY id"
+SQL_APPOINTMENTS_BY_PATIENT_STATUS = (
+    f"SELECT {APPOINTMENT_COLUMNS} FROM appointments WHERE patient_id = ? AND status = ? ORDER BY id"
+)
+SQL_UPCOMING_APPOINTMENTS = (
+    f"SELECT {APPOINTMENT_COLUMNS} FROM appointments WHERE patient_id = ? AND date >= ? ORDER BY date, id"
+)
+SQL_PAST_APPOINTMENTS = (
+    f"SELECT {APPOINTMENT_COLUMNS} FROM appointments WHERE patient_id = ? AND date < ? ORDER BY date, id"
+)
+SQL_SET_APPOINTMENT_STATUS = "UPDATE appointments SET status = ? WHERE id = ?"
+# Le date ISO si ordinano come testo: l'indice (status, date) basta per il blocco
+SQL_COMPLETE_ELAPSED = "UPDATE appointments SET status = ? WHERE status = ? AND date < ?"
+# Indici non usati da nessuna query (`status` è prefisso di (status, date)):
+# costavano solo scritture, soprattutto nelle importazioni a lotti
+OBSOLETE_INDEXES = ("idx_appointments_status", "idx_appointments_date")
+# Tabelle con id assegnato dalla sequenza omonima
+SEQUENCE_TABLES = ("patients", "appointments", "reports")
+SQL_SEED_SEQUENCE = "INSERT OR IGNORE INTO sequences (name, value) SELECT ?, COALESCE(MAX(id), 0) FROM {table}"
+SQL_NEXT_ID = "UPDATE sequences SET value = value + 1 WHERE name = ? RETURNING value"
+SQL_NEXT_IDS = "UPDATE sequences SET value = value + ? WHERE name = ? RETURNING value"
+SQL_ENSURE_SLOT = "INSERT OR IGNORE INTO slot_usage (specialty, day, time_slot) VALUES (?, ?, ?)"
+SQL_TAKE_SLOT = (
+    "UPDATE slot_usage SET booked = booked + 1 "
+    "WHERE specialty = ? AND day = ? AND time_slot = ? AND booked < ?"
+)
+SQL_SLOT_USAGE = (
+    "SELECT day, time_slot, booked FROM slot_usage WHERE specialty = ? AND day >= ? AND day < ?"
+)
+
+SQL_INSERT_FEEDBACK = (
+    "INSERT INTO feedbacks (patient_id, rating, comment, touchpoint, created_on) VALUES (?, ?, ?, ?, ?)"
+)
+FEEDBACK_COLUMNS = "patient_id, rating, comment, touchpoint, created_on"
+SQL_ALL_FEEDBACKS = f"SELECT {FEEDBACK_COLUMNS} FROM feedbacks ORDER BY id"
+SQL_FEEDBACKS_BY_PATIENT = f"SELECT {FEEDBACK_COLUMNS} FROM feedbacks WHERE patient_id = ? ORDER BY id"
+SQL_FEEDBACK_COUNT = "SELECT COUNT(*) AS n FROM feedbacks WHERE patient_id = ?"
+SQL_UPSERT_FEEDBACK_DAILY = """
+INSERT INTO feedback_daily (day, touchpoint, n, total, promoters, detractors)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (day, touchpoint) DO UPDATE SET
+    n = n + excluded.n,
+    total = total + excluded.total,
+    promoters = promoters + excluded.promoters,
+    detractors = detractors + excluded.detractors
+"""
+NPS_SUMS = (
+    "COALESCE(SUM(n), 0) AS n, COALESCE(SUM(total), 0) AS total, "
+    "COALESCE(SUM(promoters), 0) AS promoters, COALESCE(SUM(detractors), 0) AS detractors"
+)
+SQL_FEEDBACK_TOTALS = f"SELECT {NPS_SUMS} FROM feedback_daily"
+# Database precedenti ai contatori: feedback presenti ma feedback_daily vuota.
+# Controllo e inserimento in un'unica istruzione (nessun doppio riempimento tra processi).
+SQL_BACKFILL_FEEDBACK_DAILY = """
+INSERT INTO feedback_daily (day, touchpoint, n, total, promoters, detractors)
+SELECT created_on, touchpoint, COUNT(*), SUM(rating), SUM(rating >= ?), SUM(rating <= ?)
+FROM feedbacks
+WHERE NOT EXISTS (SELECT 1 FROM feedback_daily)
+GROUP BY created_on, touchpoint
+"""
+SQL_FEEDBACK_TOTALS_BY_TOUCHPOINT = f"SELECT touchpoint, {NPS_SUMS} FROM feedback_daily GROUP BY touchpoint"
+SQL_FEEDBACK_TOTALS_SINCE = f"SELECT {NPS_SUMS} FROM feedback_daily WHERE day > ? AND day <= ?"
+SQL_INSERT_REPORT = (
+    "INSERT OR IGNORE INTO reports (id, patient_id, sha256, file_name, content_type, size, uploaded_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+REPORT_COLUMNS = "id, patient_id, sha256, file_name, content_type, size, uploaded_at"
+SQL_REPORT_BY_DIGEST = f"SELECT {REPORT_COLUMNS} FROM reports WHERE patient_id IS ? AND sha256 = ?"
+SQL_REPORTS_BY_PATIENT = f"SELECT {REPORT_COLUMNS} FROM reports WHERE patient_id IS ? ORDER BY id"
+SQL_REPORT_BYTES = "SELECT COALESCE(SUM(size), 0) AS n FROM reports WHERE patient_id IS ?"
+
+
+# Riepilogo pazienti: un solo aggregato SQL per tutta la popolazione
+ROLLUP_FROM = """
+FROM patients p
+LEFT JOIN (
+    SELECT patient_id,
+           SUM(status = 'prenotata') AS upcoming,
+           SUM(status = 'completata') AS past
+    FROM appointments GROUP BY patient_id
+) a ON a.patient_id = p.id
+LEFT JOIN (
+    SELECT patient_id, COUNT(*) AS feedback_count
+    FROM feedbacks GROUP BY patient_id
+) f ON f.patient_id = p.id
+WHERE p.name LIKE ? ESCAPE '\\'
+"""
+SQL_ROLLUP = (
+    "SELECT p.id AS id, p.name AS name, COALESCE(a.upcoming, 0) AS upcoming, "
+    "COALESCE(a.past, 0) AS past, COALESCE(f.feedback_count, 0) AS feedback_count "
+    + ROLLUP_FROM
+    + "ORDER BY {sort_by} {direction}, id {direction} LIMIT ? OFFSET ?"
+)
+SQL_ROLLUP_COUNT = "SELECT COUNT(*) AS n FROM patients p WHERE p.name LIKE ? ESCAPE '\\'"
+
+
+def _dict_row(cursor, row):
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+
+class ConnectionPool:
+    """Pool di connessioni SQLite riutilizzabili tra thread e sessioni."""
+
+    def __init__(self, path: str, size: int = 4):
+        self.path = path
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._idle.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.row_factory = _dict_row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Connessione con commit automatico (rollback in caso di errore)."""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+
+class SQLiteStore:
+    """Archivio su file SQLite con la stessa interfaccia di MemoryStore."""
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self.pool = ConnectionPool(path, size=pool_size)
+        self._completed_through: date | None = None
+        with self.pool.transaction() as conn:
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+
+    def _fetch_one(self, sql: str, params: tuple = ()) -> dict | None:
+        with self.pool.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def _fetch_all(self, sql: str, params: tuple = ()) -> list[dict]:
+        with self.pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    # ------------------------------------------------
+    # PAZIENTI
+    # ------------------------------------------------
+
+    def add_patient(self, patient: dict) -> dict:
+        with self.pool.transaction() as conn:
+            pid = _next_id(conn, "patients")
+            conn.execute(
+                SQL_INSERT_PATIENT,
+                (
+                    pid,
+                    patient["name"],
+                    patient.get("email", "").lower(),
+                    patient.get("age"),
+                    patient.get("sex"),
+                    patient.get("phone", ""),
+                ),
+            )
+        return {"id": pid, **patient}
+
+    def add_patients(self, frame: pd.DataFrame) -> range:
+        """Lotto di pazienti in una sola transazione; restituisce gli id assegnati."""
+        with self.pool.transaction() as conn:
+            ids = _next_ids(conn, "patients", len(frame))
+            conn.executemany(
+                SQL_INSERT_PATIENT,
+                zip(
+                    ids,
+                    _sql_values(frame["name"]),
+                    _sql_values(frame["email"].str.lower()),
+                    _sql_values(frame["age"]),
+                    _sql_values(frame["sex"]),
+                    _sql_values(frame["phone"]),
+                ),
+            )
+        return ids
+
+    def get_patient(self, pid: int) -> dict | None:
+        return self._fetch_one(SQL_PATIENT_BY_ID, (pid,))
+
+    def all_patients(self) -> list[dict]:
+        return self._fetch_all(SQL_ALL_PATIENTS)
+
+    def patients_frame(self) -> pd.DataFrame:
+        return frame_from_rows(self._fetch_all(SQL_ALL_PATIENTS), PATIENT_SCHEMA)
+
+    def count_patients(self) -> int:
+        return self._fetch_one(SQL_COUNT_PATIENTS)["n"]
+
+    def existing_patient_ids(self, ids: list[int]) -> set[int]:
+        """Sottoinsieme degli id che corrispondono a un paziente."""
+        return {row["id"] for row in self._fetch_all(SQL_EXISTING_PATIENT_IDS, (json.dumps(ids),))}
+
+    def patients_by_email(self, email: str) -> list[dict]:
+        if not email:
+            return []
+        return self._fetch_all(SQL_PATIENTS_BY_EMAIL, (email.lower(),))
+
+    # ------------------------------------------------
+    # APPUNTAMENTI
+    # ------------------------------------------------
+
+    def add_appointment(self, appt: dict) -> dict:
+        with self.pool.transaction() as conn:
+            appt_id = _next_id(conn, "appointments")
+            conn.execute(SQL_INSERT_APPOINTMENT, (appt_id, *_appointment_params(appt)))
+        return Appointment.from_dict({"id": appt_id, **appt}).as_dict()
+
+    def add_appointments(self, frame: pd.DataFrame) -> range:
+        """Lotto di appuntamenti in una sola transazione, senza controllo di capienza (come `add_appointment`)."""
+        with self.pool.transaction() as conn:
+            ids = _next_ids(conn, "appointments", len(frame))
+            conn.executemany(
+                SQL_INSERT_APPOINTMENT,
+                zip(
+                    ids,
+                    _sql_values(frame["patient_id"]),
+                    _sql_values(frame["specialty"]),
+                    _sql_values(frame["date"]),
+                    _sql_values(frame["reason"]),
+                    _sql_values(frame["status"]),
+                    _sql_values(frame["time_slot"]),
+                ),
+            )
+        self._completed_through = None
+        return ids
+
+    def book_appointment(self, appt: dict) -> dict:
+        """Posto e appuntamento nella stessa transazione (SlotUnavailable se pieno)."""
+        day = appt["date"]
+        capacity = check_bookable(appt["specialty"], day, appt["time_slot"])
+        key = (appt["specialty"], day.isoformat(), appt["time_slot"])
+        with self.pool.transaction() as conn:
+            conn.execute(SQL_ENSURE_SLOT, key)
+            if conn.execute(SQL_TAKE_SLOT, (*key, capacity)).rowcount == 0:
+                raise SlotUnavailable(
+                    f"Fascia {appt['time_slot']} del {day.strftime('%d/%m/%Y')} "
+                    f"al completo per {appt['specialty']}."
+                )
+            appt_id = _next_id(conn, "appointments")
+            conn.execute(SQL_INSERT_APPOINTMENT, (appt_id, *_appointment_params(appt)))
+        return Appointment.from_dict({"id": appt_id, **appt}).as_dict()
+
+    def slot_availability(self, specialty: str, start: date, days: int = BOOKING_HORIZON_DAYS) -> dict:
+        end = start + timedelta(days=days)
+        booked = np.zeros((days, len(TIME_SLOTS)), dtype=np.int32)
+        for row in self._fetch_all(SQL_SLOT_USAGE, (specialty, start.isoformat(), end.isoformat())):
+            offset = (date.fromisoformat(row["day"]) - start).days
+            booked[offset, TIME_SLOTS.index(row["time_slot"])] = row["booked"]
+        return availability(capacity_grid(specialty, start, days), booked, start)
+
+    def _fetch_appointments(self, sql: str, params: tuple) -> list[dict]:
+        # Come in memoria: la data esce già convertita in `date`
+        return [Appointment.from_dict(row).as_dict() for row in self._fetch_all(sql, params)]
+
+    def get_appointment(self, appt_id: int) -> dict | None:
+        row = self._fetch_one(SQL_APPOINTMENT_BY_ID, (appt_id,))
+        return Appointment.from_dict(row).as_dict() if row else None
+
+    def appointments_by_patient(self, pid: int) -> list[dict]:
+        return self._fetch_appointments(SQL_APPOINTMENTS_BY_PATIENT, (pid,))
+
+    def upcoming_appointments(self, pid: int, today: date | None = None) -> list[dict]:
+        return self._fetch_appointments(SQL_UPCOMING_APPOINTMENTS, (pid, (today or date.today()).isoformat()))
+
+    def past_appointments(self, pid: int, today: date | None = None) -> list[dict]:
+        return self._fetch_appointments(SQL_PAST_APPOINTMENTS, (pid, (today or date.today()).isoformat()))
+
+    def appointments_by_status(self, status: str, pid: int | None = None) -> list[dict]:
+        if pid is None:
+            return self._fetch_appointments(SQL_APPOINTMENTS_BY_STATUS, (status,))
+        return self._fetch_appointments(SQL_APPOINTMENTS_BY_PATIENT_STATUS, (pid, status))
+
+    def appointments_frame(self, pid: int | None = None) -> pd.DataFrame:
+        if pid is None:
+            rows = self._fetch_all(SQL_ALL_APPOINTMENTS)
+        else:
+            rows = self._fetch_all(SQL_APPOINTMENTS_BY_PATIENT, (pid,))
+        return frame_from_rows(rows, APPOINTMENT_SCHEMA)
+
+    def set_appointment_status(self, appt_id: int, status: str) -> dict | None:
+        with self.pool.transaction() as conn:
+            conn.execute(SQL_SET_APPOINTMENT_STATUS, (status, appt_id))
+        return self.get_appointment(appt_id)
+
+    def complete_elapsed(self, today: date | None = None) -> int:
+        """Segna come completate, in un solo UPDATE, le visite prenotate ormai trascorse (una volta al giorno)."""
+        today = today or date.today()
+        if self._completed_through == today:
+            return 0
+        with self.pool.transaction() as conn:
+            done = conn.execute(SQL_COMPLETE_ELAPSED, (STATUS_COMPLETED, STATUS_BOOKED, today.isoformat())).rowcount
+        self._completed_through = today
+        return done
+
+    # ------------------------------------------------
+    # FEEDBACK
+    # ------------------------------------------------
+
+    def add_feedback(self, feedback: dict) -> dict:
+        rating = feedback["rating"]
+        with self.pool.transaction() as conn:
+            conn.execute(
+                SQL_INSERT_FEEDBACK,
+                (
+                    feedback.get("patient_id"),
+                    rating,
+                    feedback.get("comment"),
+                    feedback["touchpoint"],
+                    feedback["created_on"],
+                ),
+            )
+            conn.execute(
+                SQL_UPSERT_FEEDBACK_DAILY,
+                (
+                    feedback["created_on"],
+                    feedback["touchpoint"],
+                    1,
+                    rating,
+                    int(rating >= PROMOTER_MIN),
+                    int(rating <= DETRACTOR_MAX),
+                ),
+            )
+        return feedback
+
+    def add_feedbacks(self, frame: pd.DataFrame) -> int:
+        """Lotto di feedback e contatori giornalieri NPS nella stessa transazione."""
+        days = _sql_values(frame["created_on"])
+        daily = nps_counts(frame["rating"], day=days, touchpoint=_sql_values(frame["touchpoint"]))
+        with self.pool.transaction() as conn:
+            conn.executemany(
+                SQL_INSERT_FEEDBACK,
+                zip(
+                    _sql_values(frame["patient_id"]),
+                    _sql_values(frame["rating"]),
+                    _sql_values(frame["comment"]),
+                    _sql_values(frame["touchpoint"]),
+                    days,
+                ),
+            )
+            daily = daily[["day", "touchpoint", "n", "total", "promoters", "detractors"]]
+            conn.executemany(SQL_UPSERT_FEEDBACK_DAILY, daily.itertuples(index=False, name=None))
+        return len(frame)
+
+    def all_feedbacks(self) -> list[dict]:
+        return self._fetch_all(SQL_ALL_FEEDBACKS)
+
+    def feedbacks_frame(self) -> pd.DataFrame:
+        return frame_from_rows(self._fetch_all(SQL_ALL_FEEDBACKS), FEEDBACK_SCHEMA)
+
+    def feedbacks_by_patient(self, pid: int) -> list[dict]:
+        return self._fetch_all(SQL_FEEDBACKS_BY_PATIENT, (pid,))
+
+    def feedback_count(self, pid: int) -> int:
+        return self._fetch_one(SQL_FEEDBACK_COUNT, (pid,))["n"]
+
+    def iter_frames(self, table: str, chunk_size: int):
+        """Tabella ("patients", "appointments", "feedbacks") a blocchi di righe, per l'esportazione."""
+        sql, schema = {
+            "patients": (SQL_ALL_PATIENTS, PATIENT_SCHEMA),
+            "appointments": (SQL_ALL_APPOINTMENTS, APPOINTMENT_SCHEMA),
+            "feedbacks": (SQL_ALL_FEEDBACKS, FEEDBACK_SCHEMA),
+        }[table]
+        with self.pool.connection() as conn:
+            cursor = conn.execute(sql)
+            while rows := cursor.fetchmany(chunk_size):
+                yield frame_from_rows(rows, schema)
+
+    def feedback_summary(self) -> dict:
+        return _nps_from_row(self._fetch_one(SQL_FEEDBACK_TOTALS)).summary()
+
+    def feedback_touchpoint_summary(self) -> dict[str, dict]:
+        rows = self._fetch_all(SQL_FEEDBACK_TOTALS_BY_TOUCHPOINT)
+        return {row["touchpoint"]: _nps_from_row(row).summary() for row in rows}
+
+    def feedback_window_summary(self, days: int, today: date | None = None) -> dict:
+        today = today or date.today()
+        since = today - timedelta(days=days)
+        row = self._fetch_one(SQL_FEEDBACK_TOTALS_SINCE, (since.isoformat(), today.isoformat()))
+        return _nps_from_row(row).summary()
+
+    # ------------------------------------------------
+    # REFERTI (METADATI; I FILE SONO NELLO STORAGE SU DISCO)
+    # ------------------------------------------------
+
+    def add_report(self, report: dict, max_patient_bytes: int | None = None) -> tuple[dict, bool]:
+        """
+        Registra il referto; se il paziente ha già lo stesso contenuto restituisce
+        (esistente, False). Con `max_patient_bytes` quota e inserimento stanno
+        nella stessa transazione (QuotaExceeded se oltre).
+        """
+        with self.pool.transaction() as conn:
+            # Prima scrittura della transazione: da qui si tiene il lock di scrittura, quindi
+            # duplicati e totale letti sotto non cambiano fino al commit (caricamenti paralleli
+            # dello stesso paziente passano uno alla volta)
+            report_id = _next_id(conn, "reports")
+            existing = conn.execute(SQL_REPORT_BY_DIGEST, (report["patient_id"], report["sha256"])).fetchone()
+            if existing is not None:
+                return existing, False
+            if max_patient_bytes is not None:
+                used = conn.execute(SQL_REPORT_BYTES, (report["patient_id"],)).fetchone()["n"]
+                if used + report["size"] > max_patient_bytes:
+                    raise QuotaExceeded("Spazio referti del paziente esaurito")
+            conn.execute(
+                SQL_INSERT_REPORT,
+                (
+                    report_id,
+                    report["patient_id"],
+                    report["sha256"],
+                    report["file_name"],
+                    report.get("content_type", ""),
+                    report["size"],
+                    report["uploaded_at"],
+                ),
+            )
+        return {"id": report_id, **report}, True
+
+    def report_by_digest(self, pid: int | None, digest: str) -> dict | None:
+        return self._fetch_one(SQL_REPORT_BY_DIGEST, (pid, digest))
+
+    def reports_by_patient(self, pid: int | None) -> list[dict]:
+        return self._fetch_all(SQL_REPORTS_BY_PATIENT, (pid,))
+
+    def report_bytes_by_patient(self, pid: int | None) -> int:
+        return self._fetch_one(SQL_REPORT_BYTES, (pid,))["n"]
+
+    # ------------------------------------------------
+    # RIEPILOGO PER LA DASHBOARD CLINICA
+    # ------------------------------------------------
+
+    def patient_rollup(
+        self,
+        name_filter: str = "",
+        sort_by: str = "id",
+        descending: bool = False,
+        offset: int = 0,
+        limit: int = 25,
+    ) -> tuple[list[dict], int]:
+        """Stesso contratto di MemoryStore.patient_rollup, calcolato con un aggregato SQL."""
+        if sort_by not in ROLLUP_SORT_KEYS:
+            raise ValueError(f"Colonna di ordinamento non valida: {sort_by}")
+        pattern = _like_pattern(name_filter)
+        sql = SQL_ROLLUP.format(sort_by=sort_by, direction="DESC" if descending else "ASC")
+        rows = self._fetch_all(sql, (pattern, limit, offset))
+        total = self._fetch_one(SQL_ROLLUP_COUNT, (pattern,))["n"]
+        return rows, total
+
+
+def _migrate(conn: sqlite3.Connection):
+    # Database creati prima dell'introduzione delle fasce orarie
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(appointments)")}
+    if "time_slot" not in columns:
+        conn.execute("ALTER TABLE appointments ADD COLUMN time_slot TEXT")
+    for index in OBSOLETE_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {index}")
+    # Le sequenze partono dall'id massimo già presente (database esistenti)
+    for table in SEQUENCE_TABLES:
+        conn.execute(SQL_SEED_SEQUENCE.format(table=table), (table,))
+    conn.execute(SQL_BACKFILL_FEEDBACK_DAILY, (PROMOTER_MIN, DETRACTOR_MAX))
+
+
+def _next_id(conn: sqlite3.Connection, name: str) -> int:
+    return conn.execute(SQL_NEXT_ID, (name,)).fetchone()["value"]
+
+
+def _next_ids(conn: sqlite3.Connection, name: str, n: int) -> range:
+    last = conn.execute(SQL_NEXT_IDS, (n, name)).fetchone()["value"]
+    return range(last - n + 1, last + 1)
+
+
+def _sql_values(series: pd.Series) -> list:
+    """Colonna come valori Python per sqlite3: date ISO, None per i mancanti."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.dt.strftime("%Y-%m-%d")
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _appointment_params(appt: dict) -> tuple:
+    return (
+        appt["patient_id"],
+        appt["specialty"],
+        appt["date"].isoformat() if isinstance(appt["date"], date) else appt["date"],
+        appt.get("reason"),
+        appt.get("status", "prenotata"),
+        appt.get("time_slot"),
+    )
+
+
+def _nps_from_row(row: dict) -> NpsAggregate:
+    return NpsAggregate(row["n"], row["total"], row["promoters"], row["detractors"])
+
+
+def _like_pattern(text: str) -> str:
+    escaped = (text or "").strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
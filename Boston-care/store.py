@@ -0,0 +1,371 @@
+"""
+Archivio in memoria per pazienti, appuntamenti e feedback.
+
+Pazienti, appuntamenti e feedback sono tabelle colonnari (vedi columnar.py):
+pochi byte per record, categorie codificate a dizionario, conteggi e filtri
+vettoriali ed esportazione a pandas senza copie (`*_frame()`). Verso le
+pagine i record escono come dict, come dal backend SQLite. Gli id vengono
+da contatori monotoni (vedi ids.py) presi fuori dal lock: un inserimento
+fallito lascia un buco, come le sequenze SQLite, e la riga di un id si
+legge dall'indice della tabella. I referti, pochi per paziente, restano
+dict indicizzati.
+
+Un solo archivio è condiviso da tutte le sessioni del processo, quindi ogni
+area (pazienti, appuntamenti, feedback, referti) ha il suo lock: scritture
+e letture che scorrono gli indici di un'area si serializzano solo tra loro.
+I record restituiti sono condivisi e vanno trattati in sola lettura.
+"""
+
+import threading
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from appointments import (
+    STATUS_BOOKED,
+    STATUS_COMPLETED,
+    Appointment,
+    AppointmentIndex,
+)
+from columnar import CATEGORY, DATE, TEXT, ColumnTable
+from ids import IdAllocator
+from ingest import QuotaExceeded
+from nps import FeedbackAggregator
+from slots import BOOKING_HORIZON_DAYS, SlotInventory
+
+
+PATIENT_SEXES = ("M", "F", "Altro")
+
+# Colonne ordinabili del riepilogo pazienti della dashboard clinica
+ROLLUP_SORT_KEYS = ("id", "name", "upcoming", "past", "feedback_count")
+
+PATIENT_SCHEMA = {
+    "id": np.int64,
+    "name": TEXT,
+    "email": TEXT,
+    "age": np.int16,
+    "sex": CATEGORY,
+    "phone": TEXT,
+}
+FEEDBACK_SCHEMA = {
+    "patient_id": np.int64,
+    "rating": np.int8,
+    "comment": TEXT,
+    "touchpoint": CATEGORY,
+    "created_on": DATE,
+}
+
+
+class MemoryStore:
+    """Archivio in memoria con indici per id, email, paziente e stato (thread-safe)."""
+
+    def __init__(self):
+        # Ordine di acquisizione quando servono più lock: pazienti, appuntamenti, feedback, referti
+        self._patients_lock = threading.RLock()
+        self._appointments_lock = threading.RLock()
+        self._feedback_lock = threading.RLock()
+        self._reports_lock = threading.RLock()
+
+        self.patients = ColumnTable(PATIENT_SCHEMA, {"sex": PATIENT_SEXES}, key="id")
+        self.feedbacks = ColumnTable(FEEDBACK_SCHEMA)
+
+        # Indici (sempre coerenti con le tabelle sopra)
+        self._patient_ids_by_email: dict[str, list[int]] = defaultdict(list)
+        self._appointments = AppointmentIndex()
+        self._completed_through: date | None = None
+        self._feedback_counts = np.zeros(1024, dtype=np.int32)  # indice = id paziente
+        self._feedback_stats = FeedbackAggregator()
+        self.reports: list[dict] = []
+        self._reports_by_patient: dict[int | None, list[dict]] = defaultdict(list)
+        self._report_by_digest: dict[tuple[int | None, str], dict] = {}
+        self._report_bytes_by_patient: dict[int | None, int] = defaultdict(int)
+        self._slots = SlotInventory()
+        self._patient_ids = IdAllocator()
+        self._appointment_ids = IdAllocator()
+        self._report_ids = IdAllocator()
+
+    # ------------------------------------------------
+    # PAZIENTI
+    # ------------------------------------------------
+
+    def add_patient(self, patient: dict) -> dict:
+        """Inserisce un paziente (assegnando l'id) e aggiorna l'indice per email."""
+        patient = {**patient, "id": self._patient_ids.next_id()}
+        with self._patients_lock:
+            row = self.patients.append(patient)
+            self._patient_ids_by_email[(patient.get("email") or "").lower()].append(patient["id"])
+            return self.patients.row(row)
+
+    def add_patients(self, frame: pd.DataFrame) -> range:
+        """Inserisce un lotto di pazienti (colonne dello schema, senza id) e restituisce gli id."""
+        ids = self._patient_ids.next_ids(len(frame))
+        with self._patients_lock:
+            self.patients.extend({**_columns(frame), "id": np.arange(ids.start, ids.stop)})
+            for pid, email in zip(ids, frame["email"]):
+                self._patient_ids_by_email[(email or "").lower()].append(pid)
+            return ids
+
+    def get_patient(self, pid: int) -> dict | None:
+        with self._patients_lock:
+            row = self.patients.row_of(pid)
+            return None if row is None else self.patients.row(row)
+
+    def all_patients(self) -> list[dict]:
+        with self._patients_lock:
+            return self.patients.rows(range(len(self.patients)))
+
+    def count_patients(self) -> int:
+        return len(self.patients)
+
+    def existing_patient_ids(self, ids: list[int]) -> set[int]:
+        """Sottoinsieme degli id che corrispondono a un paziente."""
+        with self._patients_lock:
+            return {pid for pid in ids if self.patients.row_of(pid) is not None}
+
+    def patients_by_email(self, email: str) -> list[dict]:
+        if not email:
+            return []
+        with self._patients_lock:
+            ids = self._patient_ids_by_email.get(email.lower(), [])
+            return self.patients.rows(self.patients.rows_of(ids))
+
+    def patients_frame(self) -> pd.DataFrame:
+        """Tutti i pazienti come DataFrame, sugli stessi buffer della tabella."""
+        with self._patients_lock:
+            return self.patients.to_pandas()
+
+    # ------------------------------------------------
+    # APPUNTAMENTI
+    # ------------------------------------------------
+
+    def add_appointment(self, appt: dict) -> dict:
+        """Inserisce un appuntamento (assegnando l'id) e lo indicizza per id, paziente, data e stato."""
+        record = Appointment.from_dict({**appt, "id": self._appointment_ids.next_id()})
+        with self._appointments_lock:
+            return self._appointments.add(record)
+
+    def add_appointments(self, frame: pd.DataFrame) -> range:
+        """Lotto di appuntamenti, come `add_appointment` (nessun controllo di capienza delle fasce)."""
+        ids = self._appointment_ids.next_ids(len(frame))
+        with self._appointments_lock:
+            self._appointments.extend({**_columns(frame), "id": np.arange(ids.start, ids.stop)})
+            # Eventuali visite trascorse ancora prenotate si completano al prossimo accesso
+            self._completed_through = None
+            return ids
+
+    def book_appointment(self, appt: dict) -> dict:
+        """Occupa il posto nella fascia (SlotUnavailable se pieno) e inserisce l'appuntamento."""
+        self._slots.book(appt["specialty"], appt["date"], appt["time_slot"])
+        try:
+            return self.add_appointment(appt)
+        except Exception:
+            # Inserimento fallito: il posto torna libero
+            self._slots.release(appt["specialty"], appt["date"], appt["time_slot"])
+            raise
+
+    def slot_availability(self, specialty: str, start: date, days: int = BOOKING_HORIZON_DAYS) -> dict:
+        return self._slots.availability(specialty, start, days)
+
+    def get_appointment(self, appt_id: int) -> dict | None:
+        with self._appointments_lock:
+            return self._appointments.get(appt_id)
+
+    def appointments_by_patient(self, pid: int) -> list[dict]:
+        with self._appointments_lock:
+            return self._appointments.by_patient(pid)
+
+    def upcoming_appointments(self, pid: int, today: date | None = None) -> list[dict]:
+        """Appuntamenti del paziente da oggi in poi, in ordine di data."""
+        with self._appointments_lock:
+            return self._appointments.upcoming(pid, today or date.today())
+
+    def past_appointments(self, pid: int, today: date | None = None) -> list[dict]:
+        with self._appointments_lock:
+            return self._appointments.past(pid, today or date.today())
+
+    def appointments_by_status(self, status: str, pid: int | None = None) -> list[dict]:
+        """Appuntamenti con un certo stato, eventualmente di un solo paziente."""
+        with self._appointments_lock:
+            return self._appointments.by_status(status, pid)
+
+    def appointments_frame(self, pid: int | None = None) -> pd.DataFrame:
+        """Appuntamenti (di tutti o di un paziente) come DataFrame con colonne categoriche."""
+        with self._appointments_lock:
+            return self._appointments.to_pandas(pid)
+
+    def set_appointment_status(self, appt_id: int, status: str) -> dict | None:
+        with self._appointments_lock:
+            return self._appointments.set_status(appt_id, status)
+
+    def complete_elapsed(self, today: date | None = None) -> int:
+        """Segna come completate, in blocco, le visite prenotate ormai trascorse (una volta al giorno)."""
+        today = today or date.today()
+        if self._completed_through == today:
+            return 0  # percorso veloce, senza lock: è la chiamata di ogni rerun
+        with self._appointments_lock:
+            if self._completed_through == today:
+                return 0
+            done = self._appointments.complete_elapsed(today)
+            self._completed_through = today
+            return done
+
+    # ------------------------------------------------
+    # FEEDBACK
+    # ------------------------------------------------
+
+    def add_feedback(self, feedback: dict) -> dict:
+        day = date.fromisoformat(feedback["created_on"])
+        pid = feedback.get("patient_id")
+        with self._feedback_lock:
+            self.feedbacks.append(feedback)
+            if pid is not None:
+                if pid >= len(self._feedback_counts):
+                    grown = np.zeros(2 * pid, dtype=np.int32)
+                    grown[: len(self._feedback_counts)] = self._feedback_counts
+                    self._feedback_counts = grown
+                self._feedback_counts[pid] += 1
+            self._feedback_stats.add(feedback["rating"], feedback["touchpoint"], day)
+        return feedback
+
+    def add_feedbacks(self, frame: pd.DataFrame) -> int:
+        """Inserisce un lotto di feedback aggiornando conteggi per paziente e aggregati NPS."""
+        pids = frame["patient_id"].dropna().to_numpy(dtype=np.int64)
+        with self._feedback_lock:
+            self.feedbacks.extend(_columns(frame))
+            if len(pids):
+                counts = np.bincount(pids)
+                if len(counts) > len(self._feedback_counts):
+                    self._feedback_counts = self._feedback_counts_upto(2 * len(counts))
+                self._feedback_counts[: len(counts)] += counts.astype(np.int32)
+            self._feedback_stats.add_many(frame["rating"], frame["touchpoint"], frame["created_on"])
+        return len(frame)
+
+    def all_feedbacks(self) -> list[dict]:
+        with self._feedback_lock:
+            return self.feedbacks.rows(range(len(self.feedbacks)))
+
+    def feedbacks_by_patient(self, pid: int) -> list[dict]:
+        with self._feedback_lock:
+            return self.feedbacks.rows(np.flatnonzero(self.feedbacks.column("patient_id") == pid))
+
+    def feedback_count(self, pid: int) -> int:
+        counts = self._feedback_counts
+        return int(counts[pid]) if 0 <= pid < len(counts) else 0
+
+    def _feedback_counts_upto(self, size: int) -> np.ndarray:
+        counts = self._feedback_counts
+        if len(counts) >= size:
+            return counts
+        padded = np.zeros(size, dtype=np.int32)
+        padded[: len(counts)] = counts
+        return padded
+
+    def feedbacks_frame(self) -> pd.DataFrame:
+        with self._feedback_lock:
+            return self.feedbacks.to_pandas()
+
+    def iter_frames(self, table: str, chunk_size: int):
+        """Tabella ("patients", "appointments", "feedbacks") a blocchi di righe, per l'esportazione."""
+        frame = {
+            "patients": self.patients_frame,
+            "appointments": self.appointments_frame,
+            "feedbacks": self.feedbacks_frame,
+        }[table]()
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start : start + chunk_size]
+
+    def feedback_summary(self) -> dict:
+        with self._feedback_lock:
+            return self._feedback_stats.summary()
+
+    def feedback_touchpoint_summary(self) -> dict[str, dict]:
+        with self._feedback_lock:
+            return self._feedback_stats.touchpoint_summary()
+
+    def feedback_window_summary(self, days: int, today: date | None = None) -> dict:
+        with self._feedback_lock:
+            return self._feedback_stats.window_summary(days, today)
+
+    # ------------------------------------------------
+    # REFERTI (METADATI; I FILE SONO NELLO STORAGE SU DISCO)
+    # ------------------------------------------------
+
+    def add_report(self, report: dict, max_patient_bytes: int | None = None) -> tuple[dict, bool]:
+        """
+        Registra il referto; se il paziente ha già lo stesso contenuto restituisce
+        (esistente, False). Con `max_patient_bytes` la quota del paziente si
+        controlla sotto lo stesso lock dell'inserimento (QuotaExceeded se oltre).
+        """
+        pid = report["patient_id"]
+        with self._reports_lock:
+            existing = self._report_by_digest.get((pid, report["sha256"]))
+            if existing is not None:
+                return existing, False
+            if max_patient_bytes is not None and self._report_bytes_by_patient[pid] + report["size"] > max_patient_bytes:
+                raise QuotaExceeded("Spazio referti del paziente esaurito")
+            report = {"id": self._report_ids.next_id(), **report}
+            self.reports.append(report)
+            self._reports_by_patient[pid].append(report)
+            self._report_by_digest[(pid, report["sha256"])] = report
+            self._report_bytes_by_patient[pid] += report["size"]
+        return report, True
+
+    def report_by_digest(self, pid: int | None, digest: str) -> dict | None:
+        return self._report_by_digest.get((pid, digest))
+
+    def reports_by_patient(self, pid: int | None) -> list[dict]:
+        return list(self._reports_by_patient.get(pid, []))
+
+    def report_bytes_by_patient(self, pid: int | None) -> int:
+        return self._report_bytes_by_patient.get(pid, 0)
+
+    # ------------------------------------------------
+    # RIEPILOGO PER LA DASHBOARD CLINICA
+    # ------------------------------------------------
+
+    def patient_rollup(
+        self,
+        name_filter: str = "",
+        sort_by: str = "id",
+        descending: bool = False,
+        offset: int = 0,
+        limit: int = 25,
+    ) -> tuple[list[dict], int]:
+        """
+        Visite future/passate e feedback di tutti i pazienti in un solo passaggio
+        (conteggi letti dagli indici), con filtro sul nome, ordinamento e paginazione.
+        Restituisce (righe della pagina, totale righe filtrate).
+        """
+        if sort_by not in ROLLUP_SORT_KEYS:
+            raise ValueError(f"Colonna di ordinamento non valida: {sort_by}")
+        needle = (name_filter or "").strip().lower()
+        with self._patients_lock, self._appointments_lock, self._feedback_lock:
+            ids = self.patients.column("id").copy()
+            names = self.patients.column("name").copy()
+            size = int(ids.max()) + 1 if len(ids) else 1
+            columns = {
+                "id": ids,
+                "name": names,
+                "upcoming": self._appointments.status_counts(STATUS_BOOKED, size)[ids],
+                "past": self._appointments.status_counts(STATUS_COMPLETED, size)[ids],
+                "feedback_count": self._feedback_counts_upto(size)[ids],
+            }
+        if needle:
+            keep = np.fromiter((needle in name.lower() for name in names), dtype=bool, count=len(names))
+            columns = {key: values[keep] for key, values in columns.items()}
+        # Ordine per (colonna, id), invertito per il decrescente come nel backend SQLite
+        order = np.lexsort((columns["id"], columns[sort_by]))
+        if descending:
+            order = order[::-1]
+        page = order[offset:offset + limit]
+        rows = [
+            {key: (values[i] if key == "name" else int(values[i])) for key, values in columns.items()}
+            for i in page
+        ]
+        return rows, len(order)
+
+
+def _columns(frame: pd.DataFrame) -> dict:
+    return {name: frame[name] for name in frame.columns}
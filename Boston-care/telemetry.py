@@ -0,0 +1,508 @@
+"""
+Acquisizione della telemetria da dispositivi impiantabili e wearable.
+
+I gateway inviano letture a lotti (paziente, istante, parametro, valore)
+tramite socket TCP (una riga JSON per lotto) oppure depositando file CSV/JSONL
+nella cartella `inbox/`. Le letture grezze finiscono in segmenti NumPy mappati
+in memoria (`paz<id>/<parametro>-<n>.npy`), mentre per ogni paziente e
+parametro vengono mantenuti aggregati a 1 minuto, 1 ora e 1 giorno: la
+dashboard legge le medie degli ultimi 30 giorni dagli aggregati giornalieri,
+mai dai campioni grezzi.
+
+Uso da riga di comando (dalla cartella Boston-care):
+    python telemetry.py simulate --patient 1 --days 30 > letture.csv
+    python telemetry.py ingest letture.csv --root telemetria
+    python telemetry.py send letture.csv --port 9100
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+METRICS = ("hr", "spo2", "arrhythmia")  # bpm, %, episodi (valore 1 per episodio)
+SAMPLE_DTYPE = np.dtype([("ts", "<i8"), ("value", "<f4")])
+SEGMENT_ROWS = 1 << 16  # campioni per segmento pieno (~780 KB su disco)
+SEGMENT_MIN_ROWS = 1 << 8  # primo segmento di una serie (~3 KB), raddoppiato fino a SEGMENT_ROWS
+
+# (nome, durata del bucket in secondi, conservazione in secondi)
+RESOLUTIONS = (
+    ("1min", 60, 2 * 86400),
+    ("1h", 3600, 90 * 86400),
+    ("1d", 86400, None),
+)
+DASHBOARD_DAYS = 30
+INBOX_POLL_SECONDS = 10  # intervallo della scansione di inbox/ in background
+
+
+# ====================================================
+# SEGMENTI GREZZI (MEMMAP)
+# ====================================================
+
+class RawLog:
+    """
+    Campioni grezzi di un parametro di un paziente, in segmenti .npy mappati
+    in memoria. Solo l'ultimo segmento può essere più corto di SEGMENT_ROWS:
+    nasce da SEGMENT_MIN_ROWS righe e raddoppia quando è pieno, così una
+    serie con pochi campioni occupa pochi KB su disco.
+    """
+
+    def __init__(self, directory: str, metric: str):
+        self.directory = directory
+        self.metric = metric
+        self._segments: list[np.memmap] = []
+        self._fill = 0  # campioni scritti nell'ultimo segmento
+        os.makedirs(directory, exist_ok=True)
+        names = sorted(
+            n for n in os.listdir(directory) if n.startswith(metric + "-") and n.endswith(".npy")
+        )
+        for name in names:
+            self._segments.append(np.load(os.path.join(directory, name), mmap_mode="r+"))
+        if self._segments:
+            # i segmenti si riempiono in ordine: il primo ts a 0 segna la fine dei dati
+            empty = np.flatnonzero(self._segments[-1]["ts"] == 0)
+            self._fill = int(empty[0]) if len(empty) else len(self._segments[-1])
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"{self.metric}-{index:06d}.npy")
+
+    def _new_segment(self, rows: int) -> np.memmap:
+        path = self._segment_path(len(self._segments))
+        segment = np.lib.format.open_memmap(path, mode="w+", dtype=SAMPLE_DTYPE, shape=(rows,))
+        self._segments.append(segment)
+        self._fill = 0
+        return segment
+
+    def _grow_segment(self, rows: int):
+        # Copia su un file temporaneo e sostituzione atomica: un arresto a metà
+        # lascia il segmento precedente intatto
+        path = self._segment_path(len(self._segments) - 1)
+        tmp_path = path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=SAMPLE_DTYPE, shape=(rows,))
+        grown[: self._fill] = self._segments[-1][: self._fill]
+        grown.flush()
+        del grown
+        del self._segments[-1]  # la mappa va chiusa prima di sostituire il file
+        os.replace(tmp_path, path)
+        self._segments.append(np.load(path, mmap_mode="r+"))
+
+    def append(self, ts: np.ndarray, values: np.ndarray):
+        done = 0
+        while done < len(ts):
+            remaining = len(ts) - done
+            if not self._segments or self._fill == SEGMENT_ROWS:
+                self._new_segment(_segment_rows(remaining))
+            elif self._fill + remaining > len(self._segments[-1]) and len(self._segments[-1]) < SEGMENT_ROWS:
+                self._grow_segment(_segment_rows(self._fill + remaining))
+            segment = self._segments[-1]
+            n = min(remaining, len(segment) - self._fill)
+            segment["ts"][self._fill : self._fill + n] = ts[done : done + n]
+            segment["value"][self._fill : self._fill + n] = values[done : done + n]
+            self._fill += n
+            done += n
+            segment.flush()
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self._segments[:-1]) + self._fill
+
+    def segments(self):
+        """Viste (senza copia) sulla parte scritta di ogni segmento."""
+        for i, segment in enumerate(self._segments):
+            yield segment if i < len(self._segments) - 1 else segment[: self._fill]
+
+
+def _segment_rows(needed: int) -> int:
+    """Righe del segmento: SEGMENT_MIN_ROWS raddoppiato fino a contenere `needed` (max SEGMENT_ROWS)."""
+    rows = SEGMENT_MIN_ROWS
+    while rows < needed and rows < SEGMENT_ROWS:
+        rows *= 2
+    return rows
+
+
+# ====================================================
+# AGGREGATI MULTI-RISOLUZIONE
+# ====================================================
+
+def bucket_stats(ts: np.ndarray, values: np.ndarray, resolution: int):
+    """Raggruppa un lotto per bucket: (inizio bucket, n, somma, minimo, massimo)."""
+    buckets = ts // resolution * resolution
+    order = np.argsort(buckets, kind="stable")
+    buckets, values = buckets[order], values[order].astype(np.float64)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, len(buckets)])
+    return (
+        buckets[starts],
+        counts,
+        np.add.reduceat(values, starts),
+        np.minimum.reduceat(values, starts),
+        np.maximum.reduceat(values, starts),
+    )
+
+
+class Rollup:
+    """Aggregati (n, somma, min, max) per bucket di durata fissa."""
+
+    def __init__(self, resolution: int, retention: int | None):
+        self.resolution = resolution
+        self.retention = retention
+        self._buckets: dict[int, list] = {}
+
+    def merge(self, ts: np.ndarray, values: np.ndarray):
+        for key, n, total, lo, hi in zip(*bucket_stats(ts, values, self.resolution)):
+            agg = self._buckets.get(int(key))
+            if agg is None:
+                self._buckets[int(key)] = [int(n), float(total), float(lo), float(hi)]
+            else:
+                agg[0] += int(n)
+                agg[1] += float(total)
+                agg[2] = min(agg[2], float(lo))
+                agg[3] = max(agg[3], float(hi))
+
+    def prune(self, now: int):
+        if self.retention is None:
+            return
+        cutoff = now - self.retention
+        for key in [k for k in self._buckets if k < cutoff]:
+            del self._buckets[key]
+
+    def aggregate(self, since: int, until: int) -> dict:
+        n, total, lo, hi = 0, 0.0, None, None
+        for key, agg in self._buckets.items():
+            if since <= key < until:
+                n += agg[0]
+                total += agg[1]
+                lo = agg[2] if lo is None else min(lo, agg[2])
+                hi = agg[3] if hi is None else max(hi, agg[3])
+        return {"n": n, "mean": total / n if n else None, "min": lo, "max": hi}
+
+    def series(self) -> list[tuple[int, int, float, float, float]]:
+        return sorted((k, a[0], a[1] / a[0], a[2], a[3]) for k, a in self._buckets.items())
+
+
+# ====================================================
+# MOTORE DI ACQUISIZIONE
+# ====================================================
+
+class TelemetryEngine:
+    """Ingestione a lotti, segmenti grezzi e aggregati per paziente/parametro (thread-safe)."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.inbox = os.path.join(root, "inbox")
+        self._processing = os.path.join(root, "inbox", "in_lavorazione")
+        self._done = os.path.join(root, "inbox", "elaborati")
+        self._rejected = os.path.join(root, "inbox", "scartati")
+        for directory in (self._processing, self._done, self._rejected):
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._demo_lock = threading.Lock()
+        self._raw: dict[tuple[int, str], RawLog] = {}
+        self._rollups: dict[tuple[int, str], dict[str, Rollup]] = {}
+        self._last_ts: dict[int, int] = {}
+        self._server: socketserver.BaseServer | None = None
+        self._poller: threading.Thread | None = None
+        self._load()
+
+    def _patient_dir(self, patient_id: int) -> str:
+        return os.path.join(self.root, f"paz{patient_id}")
+
+    def _new_rollups(self) -> dict[str, Rollup]:
+        return {name: Rollup(res, keep) for name, res, keep in RESOLUTIONS}
+
+    def _load(self):
+        # Gli aggregati si ricostruiscono dai segmenti grezzi, una volta all'avvio
+        for name in os.listdir(self.root):
+            if not name.startswith("paz"):
+                continue
+            patient_id = int(name[3:])
+            for metric in METRICS:
+                log = RawLog(self._patient_dir(patient_id), metric)
+                if not len(log):
+                    continue
+                key = (patient_id, metric)
+                self._raw[key] = log
+                self._rollups[key] = self._new_rollups()
+                for segment in log.segments():
+                    if len(segment):
+                        self._update_rollups(key, segment["ts"], segment["value"])
+
+    def _update_rollups(self, key: tuple[int, str], ts: np.ndarray, values: np.ndarray):
+        now = int(time.time())
+        for rollup in self._rollups[key].values():
+            rollup.merge(ts, values)
+            rollup.prune(now)
+        self._last_ts[key[0]] = max(self._last_ts.get(key[0], 0), int(ts.max()))
+
+    def ingest(self, patient_ids, ts, metrics, values) -> int:
+        """Acquisisce un lotto di letture (sequenze parallele); restituisce le letture accettate."""
+        patient_ids = np.asarray(patient_ids, dtype=np.int64)
+        ts = np.asarray(ts, dtype=np.int64)
+        metrics = np.asarray(metrics, dtype=object)
+        values = np.asarray(values, dtype=np.float32)
+        codes = np.full(len(metrics), -1, dtype=np.int64)
+        for code, metric in enumerate(METRICS):
+            codes[metrics == metric] = code
+        valid = (patient_ids > 0) & (ts > 0) & np.isfinite(values) & (codes >= 0)
+        patient_ids, ts, codes, values = patient_ids[valid], ts[valid], codes[valid], values[valid]
+        if not len(ts):
+            return 0
+        # Un solo raggruppamento per (paziente, parametro): chiave combinata,
+        # ordinamento stabile (l'ordine di arrivo resta) e taglio ai confini
+        keys, inverse = np.unique(patient_ids * len(METRICS) + codes, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        groups = np.split(order, np.flatnonzero(np.diff(inverse[order])) + 1)
+        with self._lock:
+            for combined, rows in zip(keys.tolist(), groups):
+                patient_id, code = divmod(combined, len(METRICS))
+                key = (patient_id, METRICS[code])
+                if key not in self._raw:
+                    self._raw[key] = RawLog(self._patient_dir(patient_id), METRICS[code])
+                    self._rollups[key] = self._new_rollups()
+                self._raw[key].append(ts[rows], values[rows])
+                self._update_rollups(key, ts[rows], values[rows])
+        return len(ts)
+
+    def ingest_records(self, records: list[dict]) -> int:
+        if not records:
+            return 0
+        return self.ingest(
+            [r["patient_id"] for r in records],
+            [r["ts"] for r in records],
+            [r["metric"] for r in records],
+            [r["value"] for r in records],
+        )
+
+    def ingest_file(self, path: str, batch_size: int = 50_000) -> int:
+        """
+        Acquisisce un file CSV (patient_id,ts,metric,value) o JSONL, a lotti.
+        Le righe non valide (campi mancanti o vuoti, JSON rotto) si saltano:
+        un errore su una riga non lascia il file acquisito a metà.
+        """
+        total = 0
+        with open(path, newline="", encoding="utf-8", errors="replace") as fh:
+            rows = _jsonl_rows(fh) if path.endswith(".jsonl") else csv.DictReader(fh)
+            batch = []
+            for row in rows:
+                record = _coerce_row(row)
+                if record is None:
+                    continue
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    total += self.ingest_records(batch)
+                    batch = []
+            total += self.ingest_records(batch)
+        return total
+
+    def poll_inbox(self) -> int:
+        """
+        Acquisisce i file depositati in inbox/ e li sposta in inbox/elaborati/.
+        Ogni file viene prima reclamato con un `os.rename` atomico in
+        inbox/in_lavorazione/: se un altro thread o processo l'ha già preso,
+        il rename fallisce e il file si salta, quindi nessun file è acquisito
+        due volte. Se un poll è già in corso nel processo si esce subito.
+        Un file illeggibile finisce in inbox/scartati/ con il motivo in
+        <nome>.errore.txt e la scansione prosegue con gli altri.
+        """
+        if not self._poll_lock.acquire(blocking=False):
+            return 0
+        try:
+            total = 0
+            for name in sorted(os.listdir(self.inbox)):
+                path = os.path.join(self.inbox, name)
+                if not (name.endswith(".csv") or name.endswith(".jsonl")) or not os.path.isfile(path):
+                    continue
+                claimed = os.path.join(self._processing, name)
+                try:
+                    os.rename(path, claimed)
+                except FileNotFoundError:
+                    continue
+                try:
+                    total += self.ingest_file(claimed)
+                except Exception as exc:
+                    self._quarantine(claimed, name, exc)
+                    continue
+                shutil.move(claimed, os.path.join(self._done, name))
+            return total
+        finally:
+            self._poll_lock.release()
+
+    def _quarantine(self, path: str, name: str, exc: Exception):
+        target = os.path.join(self._rejected, name)
+        shutil.move(path, target)
+        with open(target + ".errore.txt", "w", encoding="utf-8") as fh:
+            fh.write(f"{type(exc).__name__}: {exc}\n")
+
+    def poll_background(self, interval: float = INBOX_POLL_SECONDS) -> threading.Thread:
+        """Avvia in un thread la scansione periodica di inbox/, fuori dal rendering delle pagine."""
+        if self._poller is not None:
+            return self._poller
+
+        def run():
+            while True:
+                try:
+                    self.poll_inbox()
+                except OSError:
+                    pass  # inbox/ momentaneamente non accessibile: si riprova al giro successivo
+                time.sleep(interval)
+
+        self._poller = threading.Thread(target=run, name="telemetria-inbox", daemon=True)
+        self._poller.start()
+        return self._poller
+
+    def has_data(self, patient_id: int) -> bool:
+        with self._lock:
+            return any((patient_id, metric) in self._raw for metric in METRICS)
+
+    def simulate_patient(self, patient_id: int, days: int = DASHBOARD_DAYS) -> int:
+        """Demo: acquisisce `days` giorni di letture simulate solo se il paziente non ne ha già."""
+        with self._demo_lock:
+            if self.has_data(patient_id):
+                return 0
+            return self.ingest_records(simulate(patient_id, days))
+
+    def summary(self, patient_id: int, days: int = DASHBOARD_DAYS, now: int | None = None) -> dict:
+        """Aggregati degli ultimi `days` giorni letti dai bucket giornalieri."""
+        now = int(now or time.time())
+        until = now // 86400 * 86400 + 86400
+        since = until - days * 86400
+        with self._lock:
+            metrics = {
+                metric: self._rollups[(patient_id, metric)]["1d"].aggregate(since, until)
+                for metric in METRICS
+                if (patient_id, metric) in self._rollups
+            }
+            last_ts = self._last_ts.get(patient_id)
+        return {"last_ts": last_ts, "days": days, "metrics": metrics}
+
+    def rollup_series(self, patient_id: int, metric: str, resolution: str = "1h") -> list[tuple]:
+        """(inizio bucket, n, media, min, max) per il grafico dell'andamento."""
+        with self._lock:
+            rollups = self._rollups.get((patient_id, metric))
+            return rollups[resolution].series() if rollups else []
+
+    # --- ingresso via socket -------------------------------------------------
+
+    def serve_background(self, host: str = "127.0.0.1", port: int = 9100):
+        """Avvia in un thread il listener TCP (una riga JSON per lotto di letture)."""
+        if self._server is not None:
+            return self._server
+        engine = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        accepted = engine.ingest_records(_coerce(json.loads(line)))
+                        reply = {"accepted": accepted}
+                    except (ValueError, KeyError, TypeError) as exc:
+                        reply = {"error": str(exc)}
+                    self.wfile.write((json.dumps(reply) + "\n").encode())
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+
+def _record(r: dict) -> dict:
+    return {
+        "patient_id": int(r["patient_id"]),
+        "ts": int(float(r["ts"])),
+        "metric": str(r["metric"]),
+        "value": float(r["value"]),
+    }
+
+
+def _coerce(rows: list[dict]) -> list[dict]:
+    return [_record(r) for r in rows]
+
+
+def _coerce_row(row) -> dict | None:
+    """Lettura convertita, oppure None se la riga non è valida."""
+    try:
+        return _record(row)
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _jsonl_rows(fh):
+    for line in fh:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def simulate(patient_id: int, days: int, now: int | None = None, seed: int = 0) -> list[dict]:
+    """Letture plausibili (una al minuto per FC e SpO₂) per gli ultimi `days` giorni."""
+    rng = np.random.default_rng(seed + patient_id)
+    now = int(now or time.time())
+    ts = np.arange(now - days * 86400, now, 60, dtype=np.int64)
+    hour = (ts % 86400) / 3600
+    hr = 68 + 8 * np.sin((hour - 14) / 24 * 2 * np.pi) + rng.normal(0, 4, len(ts))
+    spo2 = np.clip(rng.normal(97, 1, len(ts)), 88, 100)
+    episodes = rng.choice(ts, size=rng.poisson(days / 10), replace=False)
+    records = [
+        {"patient_id": patient_id, "ts": int(t), "metric": m, "value": round(float(v), 1)}
+        for m, series in (("hr", hr), ("spo2", spo2))
+        for t, v in zip(ts, series)
+    ]
+    records += [{"patient_id": patient_id, "ts": int(t), "metric": "arrhythmia", "value": 1.0} for t in episodes]
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Acquisizione telemetria dispositivi")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_sim = sub.add_parser("simulate", help="scrive su stdout un CSV di letture simulate")
+    p_sim.add_argument("--patient", type=int, required=True)
+    p_sim.add_argument("--days", type=int, default=DASHBOARD_DAYS)
+
+    p_ing = sub.add_parser("ingest", help="acquisisce file CSV/JSONL nella cartella dati")
+    p_ing.add_argument("files", nargs="+")
+    p_ing.add_argument("--root", default="telemetria")
+
+    p_send = sub.add_parser("send", help="invia un file al listener TCP dell'app")
+    p_send.add_argument("file")
+    p_send.add_argument("--host", default="127.0.0.1")
+    p_send.add_argument("--port", type=int, default=9100)
+    p_send.add_argument("--batch", type=int, default=5000)
+
+    args = parser.parse_args(argv)
+    if args.command == "simulate":
+        writer = csv.DictWriter(sys.stdout, fieldnames=["patient_id", "ts", "metric", "value"])
+        writer.writeheader()
+        writer.writerows(simulate(args.patient, args.days))
+    elif args.command == "ingest":
+        engine = TelemetryEngine(args.root)
+        for path in args.files:
+            print(f"{path}: {engine.ingest_file(path)} letture acquisite")
+    else:
+        with open(args.file, newline="", encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+        with socket.create_connection((args.host, args.port)) as sock:
+            stream = sock.makefile("rw", encoding="utf-8")
+            for start in range(0, len(rows), args.batch):
+                stream.write(json.dumps(rows[start : start + args.batch]) + "\n")
+                stream.flush()
+                print(stream.readline().strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Test dell'esportazione a lotti: anche una tabella vuota produce il file,
+con l'intestazione CSV o lo schema Parquet, e si reimporta senza errori.
+
+Uso (dalla cartella Boston-care):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk import SCHEMAS, export_file, import_file  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+
+@pytest.mark.parametrize("ext", ["csv", "jsonl", "parquet"])
+def test_export_empty_table_writes_file(tmp_path, ext):
+    path = str(tmp_path / f"feedbacks.{ext}")
+    assert export_file(MemoryStore(), "feedbacks", path) == 0
+    assert os.path.exists(path)
+    if ext == "csv":
+        assert list(pd.read_csv(path).columns) == list(SCHEMAS["feedbacks"])
+    elif ext == "parquet":
+        import pyarrow.parquet as pq
+
+        assert pq.read_schema(path).names == list(SCHEMAS["feedbacks"])
+    assert import_file(MemoryStore(), "feedbacks", path) == {"rows": 0, "imported": 0, "rejected": 0}
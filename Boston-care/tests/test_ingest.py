@@ -0,0 +1,90 @@
+"""
+Test della quota referti: caricamenti paralleli dello stesso paziente non
+superano mai lo spazio consentito, in memoria e su SQLite (anche con più
+archivi sullo stesso file, come più processi).
+
+Uso (dalla cartella Boston-care):
+    python -m pytest tests
+"""
+
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import QuotaExceeded, ReportStorage, ingest_upload  # noqa: E402
+from sqlite_store import SQLiteStore  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+FILE_BYTES = 1000
+QUOTA_FILES = 3
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def stores(request, tmp_path) -> list:
+    if request.param == "memory":
+        return [MemoryStore()]
+    path = str(tmp_path / "bsc.db")
+    return [SQLiteStore(path), SQLiteStore(path)]
+
+
+class _Upload(io.BytesIO):
+    def __init__(self, name: str, data: bytes):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def test_concurrent_uploads_respect_patient_quota(stores, tmp_path):
+    storage = ReportStorage(str(tmp_path / "referti"))
+    uploads = [_Upload(f"referto-{i}.pdf", bytes([i]) * FILE_BYTES) for i in range(12)]
+    # Tutti i caricamenti superano insieme il controllo anticipato in `store_stream`
+    barrier = threading.Barrier(len(uploads))
+
+    class _Store:
+        def __init__(self, store):
+            self._store = store
+
+        def __getattr__(self, name):
+            return getattr(self._store, name)
+
+        def add_report(self, report, **kwargs):
+            barrier.wait()
+            return self._store.add_report(report, **kwargs)
+
+    def upload(i: int) -> bool:
+        try:
+            ingest_upload(
+                uploads[i],
+                1,
+                storage,
+                _Store(stores[i % len(stores)]),
+                max_patient_bytes=QUOTA_FILES * FILE_BYTES,
+            )
+            return True
+        except QuotaExceeded:
+            return False
+
+    with ThreadPoolExecutor(max_workers=len(uploads)) as pool:
+        accepted = list(pool.map(upload, range(len(uploads))))
+
+    assert sum(accepted) == QUOTA_FILES
+    assert len(stores[0].reports_by_patient(1)) == QUOTA_FILES
+    assert stores[0].report_bytes_by_patient(1) == QUOTA_FILES * FILE_BYTES
+
+
+def test_duplicate_upload_does_not_consume_quota(stores, tmp_path):
+    storage = ReportStorage(str(tmp_path / "referti"))
+    data = b"x" * FILE_BYTES
+    first = ingest_upload(_Upload("a.pdf", data), 1, storage, stores[0], max_patient_bytes=FILE_BYTES)
+    again = ingest_upload(_Upload("b.pdf", data), 1, storage, stores[-1], max_patient_bytes=FILE_BYTES)
+
+    assert not first["duplicate"]
+    assert again["duplicate"] and again["id"] == first["id"]
+    with pytest.raises(QuotaExceeded):
+        ingest_upload(_Upload("c.pdf", b"y" * FILE_BYTES), 1, storage, stores[0], max_patient_bytes=FILE_BYTES)
@@ -0,0 +1,103 @@
+"""
+Test del registro pagamenti: la chiave di idempotenza impedisce doppi
+addebiti (anche con richieste concorrenti) e il regolamento a lotti chiude
+ogni intento autorizzato una sola volta.
+
+Uso (dalla cartella Boston-care):
+    python -m pytest tests
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from payments import (  # noqa: E402
+    INTENT_AUTHORIZED,
+    INTENT_FAILED,
+    INTENT_SETTLED,
+    MockGateway,
+    PaymentLedger,
+    price_for,
+)
+
+
+class CountingGateway(MockGateway):
+    """Gateway simulato che conta le richieste di autorizzazione."""
+
+    def __init__(self, fail_first: Exception | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self._fail_first = fail_first
+
+    def authorize(self, key: str, amount_cents: int, method: str) -> str:
+        self.calls += 1
+        if self._fail_first is not None:
+            exc, self._fail_first = self._fail_first, None
+            raise exc
+        return super().authorize(key, amount_cents, method)
+
+
+def _appointment(appt_id: int, specialty: str = "Cardiologia") -> dict:
+    return {
+        "id": appt_id,
+        "patient_id": 1,
+        "specialty": specialty,
+        "date": date.today() + timedelta(days=3),
+        "status": "prenotata",
+    }
+
+
+def test_repeated_payment_returns_same_intent_and_charges_once():
+    gateway = CountingGateway()
+    ledger = PaymentLedger(gateway)
+    first = ledger.pay(_appointment(1), "carta")
+    again = ledger.pay(_appointment(1), "bonifico")
+
+    assert first["status"] == INTENT_AUTHORIZED
+    assert again == first
+    assert gateway.calls == 1
+    assert len(gateway.statement()) == 1
+
+
+def test_concurrent_payments_charge_once():
+    gateway = CountingGateway()
+    ledger = PaymentLedger(gateway)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        intents = list(pool.map(lambda _: ledger.pay(_appointment(1), "carta"), range(16)))
+
+    assert gateway.calls == 1
+    assert {intent["idempotency_key"] for intent in intents} == {"visita-1"}
+    assert ledger.intent(1)["status"] == INTENT_AUTHORIZED
+
+
+def test_unexpected_gateway_error_allows_retry():
+    gateway = CountingGateway(fail_first=TimeoutError("gateway"))
+    ledger = PaymentLedger(gateway)
+    with pytest.raises(TimeoutError):
+        ledger.pay(_appointment(1), "carta")
+    assert ledger.intent(1)["status"] == INTENT_FAILED
+
+    assert ledger.pay(_appointment(1), "carta")["status"] == INTENT_AUTHORIZED
+
+
+def test_settle_in_batches_once():
+    ledger = PaymentLedger(MockGateway(decline_methods=("bonifico",)))
+    for appt_id in (1, 2, 3):
+        ledger.pay(_appointment(appt_id), "carta")
+    assert ledger.pay(_appointment(4), "bonifico")["status"] == INTENT_FAILED
+
+    batches = ledger.settle(batch_size=2)
+    assert [batch["count"] for batch in batches] == [2, 1]
+    assert sum(batch["amount_cents"] for batch in batches) == 3 * price_for("Cardiologia")
+    assert all(ledger.intent(appt_id)["status"] == INTENT_SETTLED for appt_id in (1, 2, 3))
+    assert ledger.intent(4)["status"] == INTENT_FAILED
+
+    assert ledger.settle() == []
+    report = ledger.reconcile()
+    assert report["matched"] == report["charges"] == 3
+    assert report["issues"] == []
@@ -0,0 +1,38 @@
+"""
+Test di ReportIndex: i referti dimostrativi si caricano una sola volta e la
+ricerca di un profilo già popolato non prende il lock di scrittura del file.
+
+Uso (dalla cartella Boston-care):
+    python -m pytest tests
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_index import DEMO_REPORTS, ReportIndex  # noqa: E402
+
+
+def test_ensure_demo_once_and_read_only_when_seeded(tmp_path):
+    path = str(tmp_path / "bsc.db")
+    indexes = [ReportIndex(path) for _ in range(3)]
+    threads = [threading.Thread(target=indexes[i % 3].ensure_demo, args=(7,)) for i in range(9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert indexes[0].search(7)[1] == len(DEMO_REPORTS)
+
+    # Un altro processo sta scrivendo sul file: la ricerca deve comunque riuscire
+    writer = sqlite3.connect(path, timeout=0)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        indexes[1]._conn.execute("PRAGMA busy_timeout = 0")
+        indexes[1].ensure_demo(7)
+        assert indexes[1].search(7)[1] == len(DEMO_REPORTS)
+    finally:
+        writer.rollback()
+        writer.close()
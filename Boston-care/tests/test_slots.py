@@ -0,0 +1,60 @@
+"""
+Test dell'inventario delle fasce: prenotazioni concorrenti sulla stessa
+fascia non superano mai la capienza, in memoria e su SQLite (anche con più
+archivi sullo stesso file, come più processi).
+
+Uso (dalla cartella Boston-care):
+    python -m pytest tests
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slots import DEFAULT_CAPACITY, TIME_SLOTS, SlotUnavailable  # noqa: E402
+from sqlite_store import SQLiteStore  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+SPECIALTY = "Cardiologia"  # capienza DEFAULT_CAPACITY per fascia
+
+
+def _open_day() -> date:
+    day = date.today() + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def stores(request, tmp_path) -> list:
+    if request.param == "memory":
+        return [MemoryStore()]
+    path = str(tmp_path / "bsc.db")
+    return [SQLiteStore(path), SQLiteStore(path)]
+
+
+def test_concurrent_bookings_never_exceed_capacity(stores):
+    day = _open_day()
+    pid = stores[0].add_patient({"name": "Paziente", "email": "test@example.com", "age": 40, "sex": "F", "phone": ""})["id"]
+    appt = {"patient_id": pid, "specialty": SPECIALTY, "date": day, "time_slot": TIME_SLOTS[0], "reason": None}
+
+    def book(i: int) -> bool:
+        try:
+            stores[i % len(stores)].book_appointment(appt)
+            return True
+        except SlotUnavailable:
+            return False
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        booked = list(pool.map(book, range(24)))
+
+    assert sum(booked) == DEFAULT_CAPACITY
+    assert len(stores[0].appointments_by_patient(pid)) == DEFAULT_CAPACITY
+    availability = stores[0].slot_availability(SPECIALTY, day, 1)
+    assert availability["free"][0][0] == 0
+    assert not availability["bitmap"][0] & 1
@@ -0,0 +1,40 @@
+"""
+Test di SQLiteStore: i contatori NPS giornalieri di un database esistente
+vengono ricostruiti dai feedback alla prima apertura, una sola volta.
+
+Uso (dalla cartella Boston-care):
+    python -m pytest tests
+"""
+
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlite_store import SQLiteStore  # noqa: E402
+
+
+def _feedback(rating: int, touchpoint: str, day: str) -> dict:
+    return {"patient_id": None, "rating": rating, "comment": "", "touchpoint": touchpoint, "created_on": day}
+
+
+def _daily(path: str) -> list[tuple]:
+    with sqlite3.connect(path) as conn:
+        return sorted(conn.execute("SELECT * FROM feedback_daily"))
+
+
+def test_feedback_daily_backfilled_once(tmp_path):
+    path = str(tmp_path / "bsc.db")
+    store = SQLiteStore(path)
+    for rating, touchpoint, day in [(10, "visita", "2026-10-01"), (5, "visita", "2026-10-01"), (8, "referti", "2026-10-02")]:
+        store.add_feedback(_feedback(rating, touchpoint, day))
+    expected = _daily(path)
+
+    # Database creato prima dei contatori giornalieri
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE feedback_daily")
+    SQLiteStore(path)
+    SQLiteStore(path)
+
+    assert _daily(path) == expected == [("2026-10-01", "visita", 2, 15, 1, 1), ("2026-10-02", "referti", 1, 8, 0, 0)]
@@ -0,0 +1,98 @@
+"""
+Test di MemoryStore: id da contatori monotoni anche con inserimenti
+concorrenti; un inserimento fallito lascia un buco, mai righe vuote, e la
+riga di un id si ritrova dall'indice della tabella.
+
+Uso (dalla cartella Boston-care):
+    python -m pytest tests
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store import MemoryStore  # noqa: E402
+
+
+def _patient(i: int, **overrides) -> dict:
+    return {"name": f"Paziente {i}", "email": "test@example.com", "age": 40, "sex": "F", "phone": "", **overrides}
+
+
+def _appointment(pid: int, **overrides) -> dict:
+    return {
+        "patient_id": pid,
+        "specialty": "Cardiologia",
+        "date": date.today() + timedelta(days=1),
+        "time_slot": "08:30–09:30",
+        "reason": None,
+        "status": "prenotata",
+        **overrides,
+    }
+
+
+def test_failed_patient_insert_leaves_gap_and_lookups_work():
+    store = MemoryStore()
+    store.add_patient(_patient(1))
+    store.add_patient(_patient(2))
+    with pytest.raises(OverflowError):
+        store.add_patient(_patient(3, age=40_000))  # fuori range per la colonna int16
+
+    # Come con le sequenze SQLite l'id fallito resta un buco, senza righe vuote
+    third = store.add_patient(_patient(3))
+    assert third["id"] == 4
+    assert store.get_patient(3) is None
+    assert store.get_patient(4) == third
+    assert store.count_patients() == 3
+    assert [p["id"] for p in store.patients_by_email("test@example.com")] == [1, 2, 4]
+    assert store.existing_patient_ids([1, 2, 3, 4, 5]) == {1, 2, 4}
+
+
+def test_failed_appointment_insert_leaves_gap_and_lookups_work():
+    store = MemoryStore()
+    pid = store.add_patient(_patient(1))["id"]
+    store.add_appointment(_appointment(pid))
+    with pytest.raises(ValueError):
+        store.add_appointment(_appointment(pid, date="non-una-data"))
+
+    second = store.add_appointment(_appointment(pid))
+    assert store.get_appointment(second["id"]) == second
+    assert [a["id"] for a in store.appointments_by_patient(pid)] == [1, second["id"]]
+    assert store.set_appointment_status(second["id"], "completata")["status"] == "completata"
+
+
+def test_concurrent_inserts_get_unique_ids():
+    store = MemoryStore()
+
+    def register(i: int):
+        patient = store.add_patient(_patient(i))
+        store.add_appointment(_appointment(patient["id"]))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(register, range(400)))
+
+    patients = store.all_patients()
+    assert len({p["id"] for p in patients}) == 400
+    assert all(store.get_patient(p["id"]) == p for p in patients)
+    assert all(len(store.appointments_by_patient(p["id"])) == 1 for p in patients)
+
+
+def test_failed_booking_releases_slot(monkeypatch):
+    store = MemoryStore()
+    pid = store.add_patient(_patient(1))["id"]
+    day = date.today() + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    free = store.slot_availability("Cardiologia", day, 1)["free_per_day"][0]
+
+    def broken_insert(appt):
+        raise RuntimeError("inserimento fallito")
+
+    monkeypatch.setattr(store, "add_appointment", broken_insert)
+    with pytest.raises(RuntimeError):
+        store.book_appointment(_appointment(pid, date=day))
+    assert store.slot_availability("Cardiologia", day, 1)["free_per_day"][0] == free
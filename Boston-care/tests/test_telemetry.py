@@ -0,0 +1,89 @@
+"""
+Test di TelemetryEngine: raggruppamento del lotto per (paziente, parametro),
+acquisizione dei file in inbox/ e crescita dei segmenti grezzi.
+
+Uso (dalla cartella Boston-care):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry import SEGMENT_MIN_ROWS, SEGMENT_ROWS, RawLog, TelemetryEngine  # noqa: E402
+
+T0 = 1_760_000_000
+
+
+def _samples(engine: TelemetryEngine, patient_id: int, metric: str) -> np.ndarray:
+    return np.concatenate(list(engine._raw[(patient_id, metric)].segments()))
+
+
+def test_ingest_groups_by_patient_and_metric(tmp_path):
+    engine = TelemetryEngine(str(tmp_path))
+    rng = np.random.default_rng(0)
+    n = 2_000
+    patient_ids = rng.integers(1, 40, n)
+    ts = T0 + np.arange(n)
+    metrics = np.array(["hr", "spo2", "arrhythmia", "temp"])[rng.integers(0, 4, n)]
+    values = rng.normal(70, 5, n)
+    values[::97] = np.nan
+
+    valid = (metrics != "temp") & np.isfinite(values)
+    assert engine.ingest(patient_ids, ts, metrics, values) == valid.sum()
+    for patient_id in np.unique(patient_ids):
+        for metric in ("hr", "spo2", "arrhythmia"):
+            mask = valid & (patient_ids == patient_id) & (metrics == metric)
+            if not mask.any():
+                assert (int(patient_id), metric) not in engine._raw
+                continue
+            # Ordine di arrivo conservato dentro ogni serie
+            assert np.array_equal(_samples(engine, int(patient_id), metric)["ts"], ts[mask])
+
+
+def test_segments_grow_from_small_and_reload(tmp_path):
+    log = RawLog(str(tmp_path), "hr")
+    log.append(np.array([T0], dtype=np.int64), np.array([70.0], dtype=np.float32))
+    assert len(log._segments[0]) == SEGMENT_MIN_ROWS
+
+    ts = T0 + 1 + np.arange(SEGMENT_ROWS + 1000, dtype=np.int64)
+    for chunk in np.array_split(ts, 7):
+        log.append(chunk, np.full(len(chunk), 70.0, dtype=np.float32))
+    assert [len(segment) for segment in log._segments] == [SEGMENT_ROWS, 1024]
+    assert len(log) == len(ts) + 1
+
+    reloaded = RawLog(str(tmp_path), "hr")
+    assert len(reloaded) == len(ts) + 1
+    assert np.array_equal(np.concatenate(list(reloaded.segments()))["ts"], np.r_[T0, ts])
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_poll_inbox_skips_bad_rows_and_quarantines_failed_files(tmp_path, monkeypatch):
+    engine = TelemetryEngine(str(tmp_path))
+    inbox = tmp_path / "inbox"
+    (inbox / "a.csv").write_text(
+        f"patient_id,ts,metric,value\n1,{T0},hr,70\n1,{T0 + 60},hr,\n1,{T0 + 120},hr,72\n", encoding="utf-8"
+    )
+    (inbox / "b.jsonl").write_text(
+        f'{{"patient_id": 2, "ts": {T0}, "metric": "spo2", "value": 97}}\n{{rotto\n', encoding="utf-8"
+    )
+    (inbox / "c.csv").write_text(f"patient_id,ts,metric,value\n3,{T0},hr,80\n", encoding="utf-8")
+
+    ingest_file = engine.ingest_file
+
+    def failing(path, *args, **kwargs):
+        if path.endswith("c.csv"):
+            raise OSError("disco non leggibile")
+        return ingest_file(path, *args, **kwargs)
+
+    monkeypatch.setattr(engine, "ingest_file", failing)
+    assert engine.poll_inbox() == 3
+
+    assert list(_samples(engine, 1, "hr")["value"]) == [70, 72]
+    assert sorted(os.listdir(inbox / "elaborati")) == ["a.csv", "b.jsonl"]
+    assert sorted(os.listdir(inbox / "scartati")) == ["c.csv", "c.csv.errore.txt"]
+    assert os.listdir(inbox / "in_lavorazione") == []
+    assert engine.poll_inbox() == 0
@@ -0,0 +1,208 @@
+"""
+Motore di triage a tabella di regole.
+
+Le regole del check-in post-procedura e del chatbot sintomi sono dati, non
+catene di `if`: la stessa tabella alimenta sia la valutazione del singolo
+paziente (usata dalle pagine) sia il calcolo vettoriale NumPy su un intero
+lotto di record (pandas DataFrame o dizionario di array), che restituisce
+esattamente gli stessi livelli.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# ====================================================
+# TABELLE DI REGOLE
+# ====================================================
+
+# Check-in: punti per fascia di dolore (prima soglia soddisfatta, dall'alto)
+PAIN_BANDS = ((7, 2), (4, 1))
+# Check-in: punti per ciascun sintomo presente
+SYMPTOM_POINTS = {"breath": 2, "fever": 1}
+# Check-in: punti se il controllo avviene entro N giorni dalla procedura
+EARLY_DAYS, EARLY_POINTS = 2, 1
+
+# (punteggio massimo incluso, livello, messaggio, azione); l'ultima fascia è aperta
+CHECKIN_LEVELS = (
+    (
+        1,
+        "verde",
+        "Controllo post-procedura nella norma.",
+        "Prosegui con le indicazioni ricevute e ripeti il check-in domani.",
+    ),
+    (
+        3,
+        "giallo",
+        "Alcuni sintomi meritano attenzione.",
+        "Valuta un contatto telefonico con il reparto o il medico curante.",
+    ),
+    (
+        None,
+        "rosso",
+        "Sintomi importanti rilevati.",
+        "Contatta subito il numero indicato dall'ospedale o valuta l'accesso al pronto soccorso.",
+    ),
+)
+
+# Segnali d'allarme del chatbot, codificati come bit per il calcolo a lotti
+RED_FLAGS = ("dolore toracico", "mancanza di respiro", "svenimento", "febbre alta")
+RED_FLAG_BITS = {flag: 1 << i for i, flag in enumerate(RED_FLAGS)}
+
+# Chatbot: regole in ordine di priorità, vince la prima soddisfatta.
+# (segnali d'allarme richiesti, gravità minima, livello, messaggio)
+CHATBOT_RULES = (
+    (
+        ("dolore toracico", "mancanza di respiro"),
+        None,
+        "alto",
+        "Segnali potenzialmente seri. In un contesto reale dovresti contattare subito "
+        "un medico o il servizio di emergenza (112).",
+    ),
+    (
+        (),
+        7,
+        "medio-alto",
+        "Sintomi intensi. In un contesto reale sarebbe consigliabile un contatto rapido con il medico "
+        "o la guardia medica.",
+    ),
+    (
+        ("febbre alta",),
+        None,
+        "medio",
+        "Febbre significativa. In un contesto reale dovresti monitorare e sentire il medico "
+        "se non migliora.",
+    ),
+)
+CHATBOT_DEFAULT = (
+    "basso",
+    "Sintomi lievi: contatta il tuo medico di base nei prossimi giorni per un confronto.",
+)
+CHATBOT_MESSAGES = {level: message for _, _, level, message in CHATBOT_RULES}
+CHATBOT_MESSAGES[CHATBOT_DEFAULT[0]] = CHATBOT_DEFAULT[1]
+
+_LEVEL_LIMITS = np.array([limit for limit, *_ in CHECKIN_LEVELS[:-1]])
+_LEVEL_NAMES = np.array([level for _, level, *_ in CHECKIN_LEVELS], dtype=object)
+
+
+def red_flag_mask(red_flags) -> int:
+    """Elenco di segnali d'allarme -> maschera di bit (segnali sconosciuti ignorati)."""
+    mask = 0
+    for flag in red_flags or ():
+        mask |= RED_FLAG_BITS.get(flag, 0)
+    return mask
+
+
+# ====================================================
+# VALUTAZIONE SINGOLA
+# ====================================================
+
+def checkin_points(pain: int, breath: bool, fever: bool, days: int) -> int:
+    points = 0
+    for threshold, band_points in PAIN_BANDS:
+        if pain >= threshold:
+            points += band_points
+            break
+    symptoms = {"breath": breath, "fever": fever}
+    points += sum(p for name, p in SYMPTOM_POINTS.items() if symptoms[name])
+    if days <= EARLY_DAYS:
+        points += EARLY_POINTS
+    return points
+
+
+def checkin_triage(pain: int, breath: bool, fever: bool, days: int) -> tuple[str, str, str]:
+    """Check-in post-procedura -> (livello, messaggio, azione consigliata)."""
+    points = checkin_points(pain, breath, fever, days)
+    for limit, level, message, action in CHECKIN_LEVELS:
+        if limit is None or points <= limit:
+            return level, message, action
+    raise AssertionError("CHECKIN_LEVELS deve terminare con una fascia aperta")
+
+
+def chatbot_level(severity: int, red_flags) -> str:
+    mask = red_flags if isinstance(red_flags, int) else red_flag_mask(red_flags)
+    for flags, min_severity, level, _ in CHATBOT_RULES:
+        if flags and mask & red_flag_mask(flags):
+            return level
+        if min_severity is not None and severity >= min_severity:
+            return level
+    return CHATBOT_DEFAULT[0]
+
+
+def chatbot_triage(severity: int, red_flags, free_text: str = "") -> tuple[str, str]:
+    """Valutazione del chatbot sintomi -> (livello, messaggio con i dettagli forniti)."""
+    level = chatbot_level(severity, red_flags)
+    dettaglio = ""
+    if free_text.strip():
+        dettaglio = " Dettagli forniti: \"" + free_text.strip()[:200] + "\"."
+    return level, CHATBOT_MESSAGES[level] + dettaglio
+
+
+# ====================================================
+# VALUTAZIONE A LOTTI (NumPy)
+# ====================================================
+
+def checkin_points_batch(pain, breath, fever, days) -> np.ndarray:
+    pain = np.asarray(pain)
+    symptoms = {"breath": np.asarray(breath, dtype=bool), "fever": np.asarray(fever, dtype=bool)}
+    points = np.select(
+        [pain >= threshold for threshold, _ in PAIN_BANDS],
+        [band_points for _, band_points in PAIN_BANDS],
+        default=0,
+    )
+    for name, p in SYMPTOM_POINTS.items():
+        points = points + symptoms[name] * p
+    return points + (np.asarray(days) <= EARLY_DAYS) * EARLY_POINTS
+
+
+def checkin_triage_batch(pain, breath, fever, days) -> np.ndarray:
+    """Livelli di check-in (array di stringhe) per un lotto di record."""
+    points = checkin_points_batch(pain, breath, fever, days)
+    return _LEVEL_NAMES[np.searchsorted(_LEVEL_LIMITS, points, side="left")]
+
+
+def chatbot_level_batch(severity, red_flags) -> np.ndarray:
+    """
+    Livelli del chatbot per un lotto. `red_flags` è un array di maschere
+    (vedi `red_flag_mask`) oppure una sequenza di elenchi di segnali.
+    """
+    severity = np.asarray(severity)
+    if isinstance(red_flags, np.ndarray) and red_flags.dtype.kind in "iu":
+        masks = red_flags
+    else:
+        masks = np.fromiter((red_flag_mask(f) for f in red_flags), dtype=np.int64, count=len(severity))
+    conditions = []
+    for flags, min_severity, _, _ in CHATBOT_RULES:
+        cond = np.zeros(len(severity), dtype=bool)
+        if flags:
+            cond |= (masks & red_flag_mask(flags)) != 0
+        if min_severity is not None:
+            cond |= severity >= min_severity
+        conditions.append(cond)
+    return np.select(
+        conditions, [level for _, _, level, _ in CHATBOT_RULES], default=CHATBOT_DEFAULT[0]
+    ).astype(object)
+
+
+def score_batch(records) -> pd.DataFrame:
+    """
+    Triage di un intero lotto in una chiamata. `records` è un DataFrame (o
+    un dizionario di colonne) con pain, breath, fever, days, severity,
+    red_flags; restituisce le colonne `checkin` e `chatbot`.
+    """
+    frame = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+    red_flags = frame["red_flags"]
+    if red_flags.dtype.kind in "iu":
+        red_flags = red_flags.to_numpy()
+    return pd.DataFrame(
+        {
+            "checkin": checkin_triage_batch(
+                frame["pain"].to_numpy(),
+                frame["breath"].to_numpy(),
+                frame["fever"].to_numpy(),
+                frame["days"].to_numpy(),
+            ),
+            "chatbot": chatbot_level_batch(frame["severity"].to_numpy(), red_flags),
+        },
+        index=frame.index,
+    )
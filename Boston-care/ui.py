@@ -0,0 +1,220 @@
+"""
+Elementi grafici condivisi: CSS globale, logo e footer.
+"""
+
+import streamlit as st
+
+from assets import get_logo_src
+
+
+# ====================================================
+# TEMA CHIARO FORZATO + COLORI PERSONALIZZATI
+# ====================================================
+
+GLOBAL_CSS = """
+    <style>
+    :root, html[data-theme="dark"] {
+        --primary-color: #004a80 !important;
+        --background-color: #ffffff !important;
+        --secondary-background-color: #e9f4ff !important;
+        --text-color: #004a80 !important;
+        --font: "sans serif" !important;
+        color-scheme: light !important;
+    }
+
+    html, body, [data-testid="stAppViewContainer"], [data-testid="stApp"] {
+        background-color: var(--background-color) !important;
+        color: var(--text-color) !important;
+    }
+
+    [data-testid="stSidebar"] {
+        background-color: var(--secondary-background-color) !important;
+        color: var(--text-color) !important;
+    }
+
+    /* Mostro l'header di Streamlit con sfondo trasparente,
+       così si vede l'hamburger ma senza barra bianca brutta */
+    header[data-testid="stHeader"] {
+        background-color: transparent !important;
+        box-shadow: none !important;
+    }
+
+    /* Nascondo solo il footer */
+    footer {
+        display: none !important;
+    }
+
+    /* Contenitore principale più compatto in alto */
+    .block-container {
+        padding-top: 0.1rem !important;
+    }
+
+    /* Top bar grigia, ABBASSATA per far vedere l'hamburger sopra */
+    .bs-top-bar {
+        margin-top: 2.2rem;  /* spazio sotto l'header con hamburger */
+        z-index: 10;
+        background: #f0f2f5;
+        padding: 0.35rem 0.9rem;
+        display: flex;
+        align-items: center;
+        justify-content: space-between;
+        box-shadow: 0 2px 6px rgba(0,0,0,0.12);
+        border-radius: 0 0 10px 10px;
+    }
+
+    .bs-logo {
+        height: 32px;
+        filter: brightness(1.05);
+        transition: transform 0.25s ease, filter 0.25s ease;
+    }
+    .bs-logo:hover {
+        transform: scale(1.03);
+        filter: brightness(1.2);
+    }
+
+    .bs-top-title-small {
+        font-size: 0.75rem;
+        letter-spacing: 0.08em;
+        text-transform: uppercase;
+        color: #004a80;
+        opacity: 0.9;
+    }
+    .bs-top-title-main {
+        font-size: 1.0rem;
+        font-weight: 700;
+        color: #004a80;
+    }
+
+    /* Logout stile link blu dentro la top bar */
+    .logout-btn > button {
+        background: transparent !important;
+        color: #005c99 !important;
+        font-weight: 600 !important;
+        border: none !important;
+        padding: 0 !important;
+        box-shadow: none !important;
+    }
+    .logout-btn > button:hover {
+        text-decoration: underline !important;
+        color: #003d70 !important;
+    }
+
+    /* Card generiche (background tabellare azzurro) */
+    .bs-card {
+        background-color: rgba(233, 244, 255, 0.95) !important;
+        border-radius: 16px !important;
+        padding: 1.0rem 1.1rem !important;
+        margin-bottom: 1rem !important;
+        box-shadow: 0 4px 12px rgba(15, 23, 42, 0.08) !important;
+        border: 1px solid rgba(148, 181, 225, 0.6) !important;
+    }
+
+    .bs-section-title {
+        font-size: 1.02rem !important;
+        font-weight: 700 !important;
+        color: #005c99 !important;
+        border-left: 4px solid #005c99 !important;
+        padding-left: 0.5rem !important;
+        margin-bottom: 0.5rem !important;
+    }
+
+    /* Testi generali blu */
+    h1, h2, h3, h4, h5, h6, label, p, span, div, li, th, td {
+        color: #004a80 !important;
+    }
+
+    /* Pulsanti principali */
+    .stButton > button {
+        background-color: #ffffff !important;
+        color: #ffffff !important;
+        border-radius: 999px !important;
+        border: none !important;
+        padding: 0.4rem 1.2rem !important;
+        font-weight: 600 !important;
+        box-shadow: 0 2px 6px rgba(0, 60, 120, 0.25) !important;
+    }
+    .stButton > button:hover {
+        background-color: #E6F4FF !important;
+        color: #ffffff !important;
+    }
+
+    /* Input fields */
+    input, textarea, select, .stTextInput input, .stSelectbox div {
+        background-color: #E6F4FF !important;
+        border: 1px solid #bcd0e0 !important;
+        color: #003a72 !important;
+        border-radius: 8px !important;
+    }
+
+    /* Giorni della settimana in italiano (calendar) */
+    .DayPicker-Weekday abbr {
+        visibility: hidden !important;
+    }
+    .DayPicker-Weekday:nth-child(1)::after { content: "Lu"; }
+    .DayPicker-Weekday:nth-child(2)::after { content: "Ma"; }
+    .DayPicker-Weekday:nth-child(3)::after { content: "Me"; }
+    .DayPicker-Weekday:nth-child(4)::after { content: "Gi"; }
+    .DayPicker-Weekday:nth-child(5)::after { content: "Ve"; }
+    .DayPicker-Weekday:nth-child(6)::after { content: "Sa"; }
+    .DayPicker-Weekday:nth-child(7)::after { content: "Do"; }
+    .DayPicker-Weekday {
+        font-size: 0.8rem !important;
+        font-weight: 600 !important;
+        color: #003b73 !important;
+    }
+
+    /* Footer */
+    .bs-footer {
+        font-size: 0.8rem;
+        color: #446388;
+        padding: 0.4rem 0 0.8rem 0;
+        text-align: center;
+    }
+
+    /* Mobile: top bar più compatta */
+    @media (max-width: 768px) {
+        .bs-top-bar {
+            flex-direction: column;
+            align-items: flex-start;
+            gap: 0.3rem;
+        }
+        .bs-card {
+            padding: 0.8rem !important;
+            margin-bottom: 0.7rem !important;
+        }
+    }
+
+    </style>
+    """
+
+
+def inject_css():
+    """CSS globale, emesso una volta per rerun dall'entrypoint (non dalle singole sezioni)."""
+    st.markdown(GLOBAL_CSS, unsafe_allow_html=True)
+
+
+# ====================================================
+# LOGO HELPER
+# ====================================================
+
+def get_logo_html() -> str:
+    logo_src = get_logo_src()
+    if logo_src:
+        return f'<img src="{logo_src}" class="bs-logo" alt="Boston Scientific logo" />'
+    return '<div class="bs-top-title-main">Boston Scientific</div>'
+
+
+# ====================================================
+# FOOTER
+# ====================================================
+
+def render_footer():
+    st.markdown(
+        """
+        <div class="bs-footer">
+            Concept demo – non è un dispositivo medico né sostituisce il giudizio clinico.<br/>
+            © 2024 Boston Scientific Corporation o sue affiliate. Tutti i diritti privacy riservati.
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )